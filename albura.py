@@ -1,11 +1,23 @@
 import streamlit as st
-import graphviz
 import streamlit.components.v1 as components
-import re
 import base64
+import functools
 import json
+import time
 from pathlib import Path
 
+from lsc.background import BackgroundRenderer
+from lsc.bundle import BundleReader, is_bundle
+from lsc.cache import RenderCache, canonical_hash
+from lsc.model import EMPTY_DIAGRAM, LAYER_OPERATORS, Diagram
+from lsc.export import MIME_TYPES, Exporter, export_available
+from lsc.layout import budget_from_env
+from lsc.native_layout import preview_enabled
+from lsc.render import render_drawing, render_preview, render_within_budget
+from lsc.scheduler import RenderScheduler
+from lsc.session import form_key, next_form, session_memory
+from lsc.trace import NULL_TRACE, Trace, trace_enabled
+
 st.set_page_config(
     page_title="Albura - RRG LSC Diagram Assistant",
     page_icon="favicon.png",
@@ -50,18 +62,6 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
-OP_ABBR = {
-    "Aspect": "ASP",
-    "Negation": "NEG",
-    "Directionals": "DIR",
-    "Event quantification": "EVQ",
-    "Modality": "MOD",
-    "Status": "STA",
-    "Tense": "TNS",
-    "Evidentiality": "EVID",
-    "Illocutionary force": "IF",
-}
-
 # --- STATE (for true reset on "New") ---
 if "form_id" not in st.session_state:
     st.session_state["form_id"] = 0
@@ -72,1083 +72,224 @@ if "loaded_data" not in st.session_state:
 
 
 def reset_state():
-    st.session_state["form_id"] += 1
-    st.session_state["loaded_data"] = None
+    st.session_state.pop("bundle_index", None)
+    next_form(st.session_state)
+
+
+def on_file_uploaded():
+    """Load the uploaded .albura file before the rerun that follows the upload."""
+    uploaded_file = st.session_state.get(get_key("file_uploader"))
+    st.session_state.pop("bundle_index", None)
+    if uploaded_file is not None and load_albura_file(uploaded_file):
+        st.session_state["load_success"] = True
 
 
 def load_albura_file(uploaded_file):
-    """Load data from an .albura file and store in session state."""
+    """Load data from an .albura file and store in session state.
+
+    A corpus bundle (.albundle) with a single diagram opens it. For larger
+    bundles only the index (entry ids and sentences) is kept, for the
+    picker in ``load_section``; the chosen entry is read from the upload
+    itself. Returns True once a diagram is loaded.
+    """
     try:
-        content = uploaded_file.read().decode("utf-8")
-        data = json.loads(content)
-        st.session_state["loaded_data"] = data
-        st.session_state["form_id"] += 1  # Force re-render with new data
+        content = uploaded_file.getvalue()
+        if is_bundle(content):
+            with BundleReader(content) as bundle:
+                if not len(bundle):
+                    raise ValueError("bundle contains no documents")
+                if len(bundle) > 1:
+                    st.session_state["bundle_index"] = [(entry.id, entry.sentence) for entry in bundle]
+                    return False
+                data = Diagram.from_dict(bundle.load(bundle.entries[0].id))
+        else:
+            data = Diagram.from_dict(json.loads(content.decode("utf-8")))
+        next_form(st.session_state, data)  # Force re-render with new data
         return True
     except Exception as e:
         st.error(f"Error loading file: {e}")
         return False
 
 
-def ld(keys, default=""):
-    """Get a value from loaded data using dot notation keys.
-    
-    Examples:
-        ld("nucleus.text") -> loaded_data["nucleus"]["text"]
-        ld("items_pre") -> loaded_data["items_pre"]
-    """
-    if st.session_state["loaded_data"] is None:
-        return default
-    
-    data = st.session_state["loaded_data"]
-    parts = keys.split(".")
-    
+def on_bundle_entry_selected():
+    """Open the diagram picked from the uploaded bundle and drop the bundle's index."""
+    entry_id = st.session_state.get(get_key("bundle_entry"))
+    uploaded_file = st.session_state.get(get_key("file_uploader"))
+    if entry_id is None or uploaded_file is None:
+        return
     try:
-        result = data
-        for part in parts:
-            if isinstance(result, dict):
-                result = result.get(part, default)
-            else:
-                return default
-        return result if result is not None else default
-    except (KeyError, TypeError):
-        return default
-
-
-def ld_len(key):
-    """Get length of a list from loaded data."""
-    val = ld(key, [])
-    return len(val) if isinstance(val, list) else 0
+        with BundleReader(uploaded_file.getvalue()) as bundle:
+            data = Diagram.from_dict(bundle.load(entry_id))
+    except (ValueError, KeyError) as e:
+        st.error(f"Error loading diagram {entry_id}: {e}")
+        return
+    st.session_state.pop("bundle_index", None)
+    next_form(st.session_state, data)
+    st.session_state["load_success"] = True
 
 
-def ld_item(key, index, subkey, default=""):
-    """Get a value from a list item in loaded data.
-    
-    Example:
-        ld_item("items_pre", 0, "text") -> loaded_data["items_pre"][0]["text"]
-    """
-    if st.session_state["loaded_data"] is None:
-        return default
-    
-    data = st.session_state["loaded_data"]
-    try:
-        items = data.get(key, [])
-        if isinstance(items, list) and index < len(items):
-            item = items[index]
-            if isinstance(item, dict):
-                return item.get(subkey, default)
-    except (KeyError, TypeError, IndexError):
-        pass
-    return default
-
-
-def ld_operators_by_layer(layer_code):
-    """Get operators for a specific layer from loaded data.
-    
-    Returns a list of operator dicts for the given layer (NUC, CORE, CLAUSE).
-    """
-    if st.session_state["loaded_data"] is None:
-        return []
-    
-    data = st.session_state["loaded_data"]
-    operators = data.get("operators", [])
-    
-    return [op for op in operators if op.get("layer") == layer_code]
+def loaded_diagram():
+    """The loaded diagram (a validated ``Diagram``), or an empty one with the editor defaults."""
+    return st.session_state["loaded_data"] or EMPTY_DIAGRAM
 
 
 def get_key(base_name):
-    return f"{base_name}_{st.session_state['form_id']}"
-
+    return form_key(st.session_state, base_name)
 
-#=====================
-# DRAWING FUNCTION
-#=====================
-def draw_lsc_tree(data):
-    # Retrieve data
-    prdp = data.get("prdp")
-    prcs = data.get("prcs")
-    items_pre = data.get("items_pre", [])
-    items_post = data.get("items_post", [])
-    pocs = data.get("pocs")
-    podp = data.get("podp")
 
-    pred_type = data.get("pred_type", "verbal")
-    nucleus = data.get("nucleus", {})
-    nuc_word = nucleus.get("text", "")
-    nuc_pos = nucleus.get("pos", "")
+@st.cache_resource
+def get_render_cache():
+    """Render cache shared by every session on this server."""
+    return RenderCache(maxsize=256)
 
-    copula = data.get("copula", {})
-    cop_word = copula.get("text", "")
-    cop_pos = copula.get("pos", "")
 
-    attribute = data.get("attribute", {})
-    attr_word = attribute.get("text", "")
-    attr_pos = attribute.get("pos", "")
+@st.cache_resource
+def get_render_scheduler():
+    """Bounded, fair queue that runs every session's dot and cairo jobs (one per core)."""
+    return RenderScheduler(per_core=1)
 
-    items_between = data.get("items_between", [])
 
-    # Realization forms
-    realization_forms = data.get("realization_forms", [])
+@st.cache_resource
+def get_exporter():
+    """SVG/PNG/PDF/EPS exporter (cache on top of the render scheduler) shared by every session."""
+    return Exporter(scheduler=get_render_scheduler())
 
-    # Extra-Core Slots
-    extra_core_slots = data.get("extra_core_slots", [])
 
-    def is_morph(item):
-        return item.get("arg_type") == "Morphological"
+def get_renderer():
+    """This session's background renderer: keeps the last good diagram while a new one renders."""
+    if "renderer" not in st.session_state:
+        st.session_state["renderer"] = BackgroundRenderer(get_render_scheduler())
+    return st.session_state["renderer"]
 
-    def morph_form(item):
-        return (item.get("morph_form") or "").strip()
 
-    def is_affix_morph(item):
-        # legacy empty -> treat as Affix
-        return is_morph(item) and (morph_form(item) == "" or morph_form(item) == "Affix")
-
-    def is_clitic_morph(item):
-        return is_morph(item) and morph_form(item) == "Clitic"
-
-    # Detect if we need COREw/NUCw:
-    # -> should exist whenever there is ANY morphological argument (Affix or Clitic)
-    has_morphological = any(
-        is_morph(item) for item in (items_pre + items_post + items_between)
-    )
-
-    # Map reference codes -> node IDs
-    reference_to_node = {}
-
-    dot = graphviz.Digraph(comment="LSC")
-
-    # GRAPH SETTINGS
-    dot.attr(dpi="72")
-    dot.attr(splines="line", nodesep="0.4", ranksep="0.25", margin="0")
-    dot.attr("node", fontname="Helvetica", fontsize="11", height="0.2", width="0.2")
-    dot.attr("edge", fontname="Helvetica", arrowhead="none", penwidth="0.8")
-
-    # ALIGNMENT LISTS (filled during build; final order computed at the end)
-    layer_cl = {"pre": [], "center": ["CL"], "post": []}
-    layer_core = {"pre": [], "center": ["CORE"], "post": []}
-    layer_nuc = {"pre": [], "center": [], "post": []}
-
-    terminal_words = []
-    ordered_bottom = []
-
-    # Store tops of morph args for alignment with NUCw (includes AFF and CL)
-    morph_arg_top_nodes = []
-
-    # Row-node -> word-node mapping (for vertical alignment ordering)
-    row_node_to_word = {}
-
-    # 1) SPINE
-    dot.node("S", "SENTENCE", shape="plaintext", fontname="Helvetica", group="main")
-    dot.node("CL", "CLAUSE", shape="plaintext", fontname="Helvetica", group="main")
-    dot.node("CORE", "CORE", shape="plaintext", fontname="Helvetica", group="main")
-
-    dot.edge("S:s", "CL:n", weight="100")
-    dot.edge("CL:s", "CORE:n", weight="100")
-
-    # 2) WORD DRAWER
-    def draw_word_structure(parent_id, item, uid):
-        word_id = f"{uid}_W"
-        dot.node(word_id, item["text"], shape="none", group=uid)
-
-        if item.get("pos"):
-            pos_id = f"{uid}_P"
-            dot.node(pos_id, item["pos"], shape="plaintext", fontsize="10", group=uid)
-            dot.edge(f"{parent_id}:s", f"{pos_id}:n", weight="100")
-            dot.edge(f"{pos_id}:s", f"{word_id}:n", weight="100")
-        else:
-            dot.edge(f"{parent_id}:s", f"{word_id}:n", weight="100")
-
-        return word_id
-
-    # For postprocessing SVG dashed operator-links
-    pending_op_connections = []
-
-    # OPERATORS PROJECTION
-    def draw_operator_projection(anchor_word_id, operators, ref_to_node):
-        if not operators:
-            return
-
-        ops_by_layer = {"NUC": [], "CORE": [], "CLAUSE": []}
-        for op in operators:
-            layer = op.get("layer")
-            if layer in ops_by_layer:
-                ops_by_layer[layer].append(op)
-
-        def op_text(op):
-            op_name = (op.get("operator") or "").strip()
-            abbr = OP_ABBR.get(op_name, op_name)
-            val = (op.get("value") or "").strip()
-            return f"{abbr}: {val}" if val else f"{abbr}"
-
-        global_op_index = [0]
-
-        def build_layer_stack(layer_name):
-            stack = []
-            ops = ops_by_layer[layer_name]
-            n = max(1, len(ops))
-
-            for i in range(n):
-                layer_id = f"OP_{layer_name}_{i}"
-                dot.node(layer_id, layer_name, shape="plaintext", fontsize="11", group="op_layer")
-
-                if i < len(ops):
-                    lbl_id = f"{layer_id}_LBL"
-                    dot.node(lbl_id, op_text(ops[i]), shape="plaintext", fontsize="11", group="op_lbl")
-
-                    side = (ops[i].get("side") or "Right").strip()
-
-                    base_minlen = 1
-                    increment = 1
-                    current_minlen = str(base_minlen + global_op_index[0] * increment)
-                    global_op_index[0] += 1
-
-                    with dot.subgraph() as s:
-                        s.attr(rank="same")
-                        s.node(layer_id)
-                        s.node(lbl_id)
-                        if side == "Left":
-                            s.edge(lbl_id, layer_id, style="invis", weight="50", minlen=current_minlen)
-                        else:
-                            s.edge(layer_id, lbl_id, style="invis", weight="50", minlen=current_minlen)
-
-                    if side == "Left":
-                        dot.edge(f"{lbl_id}:e", f"{layer_id}:w", arrowhead="vee", penwidth="0.8", constraint="false")
-                    else:
-                        dot.edge(f"{lbl_id}:w", f"{layer_id}:e", arrowhead="vee", penwidth="0.8", constraint="false")
-
-                    target_codes = ops[i].get("targets", [])
-                    if target_codes:
-                        target_node_ids = []
-                        for tc in target_codes:
-                            node_id = ref_to_node.get(tc)
-                            if node_id:
-                                target_node_ids.append(node_id)
-                        if target_node_ids:
-                            pending_op_connections.append(
-                                {"lbl_id": lbl_id, "target_node_ids": target_node_ids, "side": side, "layer": layer_name}
-                            )
-
-                stack.append(layer_id)
-
-            for j in range(len(stack) - 1):
-                dot.edge(stack[j] + ":s", stack[j + 1] + ":n", weight="100")
-
-            return stack
-
-        nuc_stack = build_layer_stack("NUC")
-        core_stack = build_layer_stack("CORE")
-        clause_stack = build_layer_stack("CLAUSE")
-
-        sent_id = "OP_SENTENCE"
-        dot.node(sent_id, "SENTENCE", shape="plaintext", fontsize="11", group="op_layer")
-
-        dot.edge(anchor_word_id + ":s", nuc_stack[0] + ":n", weight="100")
-        dot.edge(nuc_stack[-1] + ":s", core_stack[0] + ":n", weight="100")
-        dot.edge(core_stack[-1] + ":s", clause_stack[0] + ":n", weight="100")
-        dot.edge(clause_stack[-1] + ":s", sent_id + ":n", weight="100")
-
-    # 3) SLOT DRAWER (PrDP/PrCS/PoCS/PoDP/ExCS)
-    def draw_slot(uid, data_dict, parent, target_list, ref_code=None, show_uid_label=True, parent_edge_constraint=True):
-        if not data_dict or not data_dict.get("text"):
-            return None
-
-        lbl_id = f"{uid}_L"
-        w_id = f"{uid}_W"
-        row_node_id = None
-
-        if show_uid_label:
-            dot.node(uid, uid, shape="plaintext", group=uid)
-            dot.edge(f"{parent}:s", f"{uid}:n", weight="1")
-            dot.node(lbl_id, data_dict.get("label", "XP"), shape="plaintext", group=uid)
-            dot.edge(f"{uid}:s", f"{lbl_id}:n", weight="100")
-            row_node_id = uid
-        else:
-            dot.node(lbl_id, data_dict.get("label", "XP"), shape="plaintext", group=uid)
-            dot.edge(
-                f"{parent}:s",
-                f"{lbl_id}:n",
-                weight="1",
-                constraint="true" if parent_edge_constraint else "false",
-            )
-            row_node_id = lbl_id
-
-        dot.node(w_id, data_dict["text"], shape="none", group=uid)
-
-        if data_dict.get("pos"):
-            pos_id = f"{uid}_P"
-            dot.node(pos_id, data_dict["pos"], shape="plaintext", fontsize="10", group=uid)
-            dot.edge(f"{lbl_id}:s", f"{pos_id}:n", weight="100")
-            dot.edge(f"{pos_id}:s", f"{w_id}:n", weight="100")
-        else:
-            dot.edge(f"{lbl_id}:s", f"{w_id}:n", weight="100")
-
-        terminal_words.append(w_id)
-
-        if target_list is not None:
-            target_list.append(row_node_id)
-
-        # Row -> word alignment mapping
-        if row_node_id:
-            row_node_to_word[row_node_id] = w_id
-
-        if ref_code:
-            reference_to_node[ref_code] = w_id
-
-        return w_id
-
-    # ------------- NUCLEUS presence flags -------------
-    has_nuc = (pred_type == "verbal" and nuc_word) or (pred_type == "copular" and attr_word)
-
-    # Anchor for clitics: PoS under PRED if available, else PRED
-    def get_clitic_anchor_id():
-        if not has_nuc:
-            return "CORE"
-        if pred_type == "verbal":
-            return "NucP" if nuc_pos else "PRED"
-        return "AttrP" if attr_pos else "PRED_A"
-
-    # 4) ITEMS PROCESSOR (pre/post arguments/peripheries)
-    def process_item_group(items, side_prefix):
-        last_conn_type = None
-        current_peri_parent = None
-
-        for i, item in enumerate(items):
-            if not item.get("text"):
-                continue
-
-            uid = f"{side_prefix}_{i}"
-            conn_type = item.get("conn_type")
-
-            if conn_type == "Arg":
-                last_conn_type = None
-                current_peri_parent = None
-
-                top_id = f"{uid}_Top"
-
-                if is_morph(item):
-                    forced_lbl = "AFF" if is_affix_morph(item) else "CL"
-                    dot.node(top_id, forced_lbl, shape="plaintext", group=uid)
-                else:
-                    dot.node(top_id, item.get("label", "XP"), shape="plaintext", group=uid)
-
-                # Decide anchor
-                if is_clitic_morph(item):
-                    parent_anchor = get_clitic_anchor_id()
-                elif is_morph(item):
-                    parent_anchor = "COREw" if (has_nuc and has_morphological) else "CORE"
-                else:
-                    parent_anchor = "CORE"
-
-                # IMPORTANT: do NOT let morphological (AFF/CL) anchors constrain horizontal layout
-                dot.edge(
-                    f"{parent_anchor}:s",
-                    f"{top_id}:n",
-                    weight="1",
-                    constraint="false" if is_morph(item) else "true",
-                )
-
-                # Horizontal ordering:
-                # - Only syntactic args participate in NUC-row ordering
-                if not is_morph(item):
-                    if side_prefix == "Pre":
-                        layer_nuc["pre"].append(top_id)
-                    else:
-                        layer_nuc["post"].append(top_id)
-
-                # Morph args (AFF and CL) should align with NUCw
-                if is_morph(item):
-                    morph_arg_top_nodes.append(top_id)
-
-                wid = draw_word_structure(top_id, item, uid)
-                terminal_words.append(wid)
-                ordered_bottom.append(wid)
-
-                row_node_to_word[top_id] = wid
-                reference_to_node[f"{side_prefix.lower()}_{i}"] = wid
-
-            else:
-                # Periphery
-                if conn_type == last_conn_type and current_peri_parent:
-                    parent_id = current_peri_parent
-                    uid_for_group = f"{side_prefix}_{i}"
-                else:
-                    parent_id = f"PERI_Group_{uid}"
-                    dot.node(parent_id, "PERIPHERY", shape="plaintext", group=uid)
-                    uid_for_group = uid
-
-                    target_layer_id = ""
-                    if conn_type == "Peri-Clause":
-                        target_layer_id = "CL"
-                        (layer_cl["pre"] if side_prefix == "Pre" else layer_cl["post"]).append(parent_id)
-                    elif conn_type == "Peri-Core":
-                        target_layer_id = "CORE"
-                        (layer_core["pre"] if side_prefix == "Pre" else layer_core["post"]).append(parent_id)
-                    elif conn_type == "Peri-Nuc":
-                        target_layer_id = "NUC"
-                        (layer_nuc["pre"] if side_prefix == "Pre" else layer_nuc["post"]).append(parent_id)
-
-                    src, tgt = (":e", ":w") if side_prefix == "Pre" else (":w", ":e")
-                    dot.edge(
-                        f"{parent_id}{src}",
-                        f"{target_layer_id}{tgt}",
-                        arrowhead="vee",
-                        constraint="false",
-                        minlen="1",
-                    )
-
-                    last_conn_type = conn_type
-                    current_peri_parent = parent_id
-
-                item_top_id = f"{uid}_Top"
-                dot.node(item_top_id, item.get("label", "XP"), shape="plaintext", group=uid_for_group)
-                dot.edge(f"{parent_id}:s", f"{item_top_id}:n", weight="100")
-
-                wid = draw_word_structure(item_top_id, item, uid_for_group)
-                terminal_words.append(wid)
-                ordered_bottom.append(wid)
-
-                if parent_id and parent_id not in row_node_to_word:
-                    row_node_to_word[parent_id] = wid
-
-                reference_to_node[f"{side_prefix.lower()}_{i}"] = wid
-
-    # DRAW SLOTS (topics/foci)
-    w_prdp = draw_slot("PrDP", prdp, "S", layer_cl["pre"], "prdp")
-    if w_prdp:
-        ordered_bottom.append(w_prdp)
-
-    w_prcs = draw_slot("PrCS", prcs, "CL", layer_core["pre"], "prcs")
-    if w_prcs:
-        ordered_bottom.append(w_prcs)
-
-    nucleus_anchor = None
-
-    # NUCLEUS
-    if has_nuc:
-        layer_nuc["center"].append("NUC")
-        dot.node("NUC", "NUC", shape="plaintext", group="main")
-        dot.edge("CORE:s", "NUC:n", weight="100")
-
-        # COREw / NUCw should exist if there is ANY morphological argument
-        if has_morphological:
-            dot.node(
-                "COREw",
-                label="<<font face='Helvetica'>CORE<sub>W</sub></font>>",
-                shape="plaintext",
-                fontsize="10",
-                group="main",
-            )
-            dot.node(
-                "NUCw",
-                label="<<font face='Helvetica'>NUC<sub>W</sub></font>>",
-                shape="plaintext",
-                fontsize="10",
-                group="main",
-            )
-
-        # Pre items
-        process_item_group(items_pre, "Pre")
-
-        if pred_type == "verbal":
-            dot.node("PRED", "PRED", shape="plaintext", fontsize="10", group="main")
-            dot.node("NucW", nuc_word, shape="none", group="main")
-            dot.edge("NUC:s", "PRED:n", weight="100")
-
-            if has_morphological:
-                if nuc_pos:
-                    dot.node("NucP", nuc_pos, shape="plaintext", fontsize="10", group="main")
-                    dot.edge("PRED:s", "NucP:n", weight="100")
-                    dot.edge("NucP:s", "COREw:n", weight="100")
-                    dot.edge("COREw:s", "NUCw:n", weight="100")
-                    dot.edge("NUCw:s", "NucW:n", weight="100")
-                else:
-                    dot.edge("PRED:s", "COREw:n", weight="100")
-                    dot.edge("COREw:s", "NUCw:n", weight="100")
-                    dot.edge("NUCw:s", "NucW:n", weight="100")
-            else:
-                if nuc_pos:
-                    dot.node("NucP", nuc_pos, shape="plaintext", fontsize="10", group="main")
-                    dot.edge("PRED:s", "NucP:n", weight="100")
-                    dot.edge("NucP:s", "NucW:n", weight="100")
-                else:
-                    dot.edge("PRED:s", "NucW:n", weight="100")
+# A full-quality layout that ran over the interactive budget (and was shown
+# as a draft) is retried in the background with this many times the time.
+REFINE_TIME_FACTOR = 10
 
-            terminal_words.append("NucW")
-            ordered_bottom.append("NucW")
-
-            reference_to_node["nucleus"] = "NucW"
-            nucleus_anchor = "NucW"
-
-        elif pred_type == "copular":
-            nuc_level_order = []
-
-            if cop_word:
-                dot.node("AUX", "AUX", shape="plaintext", fontsize="10", group="aux_group")
-                dot.node("AuxW", cop_word, shape="none", group="aux_group")
-
-                # IMPORTANT: keep AUX connected but do NOT let it pull the horizontal spine
-                dot.edge("NUC:s", "AUX:n", weight="1", constraint="false")
-
-                nuc_level_order.append("AUX")
-
-                if layer_nuc["pre"]:
-                    last_pre_nuc = layer_nuc["pre"][-1]
-                    dot.edge(last_pre_nuc, "AUX", style="invis", weight="5")
-
-                if cop_pos:
-                    dot.node("AuxP", cop_pos, shape="plaintext", fontsize="10", group="aux_group")
-                    dot.edge("AUX:s", "AuxP:n", weight="100")
-                    dot.edge("AuxP:s", "AuxW:n", weight="100")
-                else:
-                    dot.edge("AUX:s", "AuxW:n", weight="100")
-
-                terminal_words.append("AuxW")
-                ordered_bottom.append("AuxW")
-
-                reference_to_node["copula"] = "AuxW"
-                nucleus_anchor = "AuxW"  # temporary; later fixed to AttrW
-
-            # Items between AUX and PRED (attribute)
-            if items_between:
-                last_conn_type_between = None
-                current_peri_parent_between = None
-
-                for i, item in enumerate(items_between):
-                    if not item.get("text"):
-                        continue
-
-                    uid = f"Between_{i}"
-                    conn_type = item.get("conn_type")
-
-                    if conn_type == "Arg":
-                        last_conn_type_between = None
-                        current_peri_parent_between = None
-
-                        top_id = f"{uid}_Top"
-
-                        if is_morph(item):
-                            forced_lbl = "AFF" if is_affix_morph(item) else "CL"
-                            dot.node(top_id, forced_lbl, shape="plaintext", group=uid)
-                        else:
-                            dot.node(top_id, item.get("label", "XP"), shape="plaintext", group=uid)
-
-                        # Anchor for between-args
-                        if is_clitic_morph(item):
-                            parent_anchor = get_clitic_anchor_id()
-                        elif is_morph(item):
-                            parent_anchor = "COREw" if (has_nuc and has_morphological) else "CORE"
-                        else:
-                            parent_anchor = "CORE"
-
-                        dot.edge(
-                            f"{parent_anchor}:s",
-                            f"{top_id}:n",
-                            weight="1",
-                            constraint="false" if is_morph(item) else "true",
-                        )
-
-                        # ordering only for syntactic args
-                        if not is_morph(item):
-                            nuc_level_order.append(top_id)
-
-                        if is_morph(item):
-                            morph_arg_top_nodes.append(top_id)
-
-                        wid = draw_word_structure(top_id, item, uid)
-                        terminal_words.append(wid)
-                        ordered_bottom.append(wid)
-
-                        row_node_to_word[top_id] = wid
-                        reference_to_node[f"between_{i}"] = wid
-
-                    else:
-                        # periphery between
-                        if conn_type == last_conn_type_between and current_peri_parent_between:
-                            parent_id = current_peri_parent_between
-                            uid_for_group = f"Between_{i}"
-                        else:
-                            parent_id = f"PERI_Between_{uid}"
-                            dot.node(parent_id, "PERIPHERY", shape="plaintext", group=uid)
-                            uid_for_group = uid
-
-                            if conn_type == "Peri-Clause":
-                                target_layer_id = "CL"
-                                layer_cl["pre"].append(parent_id)
-                            elif conn_type == "Peri-Core":
-                                target_layer_id = "CORE"
-                                layer_core["pre"].append(parent_id)
-                            else:
-                                target_layer_id = "NUC"
-                                layer_nuc["pre"].append(parent_id)
-
-                            dot.edge(
-                                f"{parent_id}:e",
-                                f"{target_layer_id}:w",
-                                arrowhead="vee",
-                                constraint="false",
-                                minlen="1",
-                            )
-
-                            last_conn_type_between = conn_type
-                            current_peri_parent_between = parent_id
-
-                        item_top_id = f"{uid}_Top"
-                        dot.node(item_top_id, item.get("label", "XP"), shape="plaintext", group=uid_for_group)
-                        dot.edge(f"{parent_id}:s", f"{item_top_id}:n", weight="100")
-
-                        wid = draw_word_structure(item_top_id, item, uid_for_group)
-                        terminal_words.append(wid)
-                        ordered_bottom.append(wid)
-
-                        if parent_id and parent_id not in row_node_to_word:
-                            row_node_to_word[parent_id] = wid
-
-                        reference_to_node[f"between_{i}"] = wid
-
-            dot.node("PRED_A", "PRED", shape="plaintext", fontsize="10", group="main")
-            dot.node("AttrW", attr_word, shape="none", group="main")
-            dot.edge("NUC:s", "PRED_A:n", weight="100")
-            nuc_level_order.append("PRED_A")
-
-            if has_morphological:
-                if attr_pos:
-                    dot.node("AttrP", attr_pos, shape="plaintext", fontsize="10", group="main")
-                    dot.edge("PRED_A:s", "AttrP:n", weight="100")
-                    dot.edge("AttrP:s", "COREw:n", weight="100")
-                    dot.edge("COREw:s", "NUCw:n", weight="100")
-                    dot.edge("NUCw:s", "AttrW:n", weight="100")
-                else:
-                    dot.edge("PRED_A:s", "COREw:n", weight="100")
-                    dot.edge("COREw:s", "NUCw:n", weight="100")
-                    dot.edge("NUCw:s", "AttrW:n", weight="100")
-            else:
-                if attr_pos:
-                    dot.node("AttrP", attr_pos, shape="plaintext", fontsize="10", group="main")
-                    dot.edge("PRED_A:s", "AttrP:n", weight="100")
-                    dot.edge("AttrP:s", "AttrW:n", weight="100")
-                else:
-                    dot.edge("PRED_A:s", "AttrW:n", weight="100")
-
-            terminal_words.append("AttrW")
-            ordered_bottom.append("AttrW")
-
-            reference_to_node["attribute"] = "AttrW"
-            nucleus_anchor = "AttrW"
-
-            # align AUX / between-args / PRED
-            if len(nuc_level_order) > 1:
-                with dot.subgraph() as s:
-                    s.attr(rank="same")
-                    for node_id in nuc_level_order:
-                        s.node(node_id)
-                    for k in range(len(nuc_level_order) - 1):
-                        s.edge(nuc_level_order[k], nuc_level_order[k + 1], style="invis", weight="10")
-            elif cop_word:
-                with dot.subgraph() as s:
-                    s.attr(rank="same")
-                    s.node("AUX")
-                    s.node("PRED_A")
-
-        # Post items
-        process_item_group(items_post, "Post")
-
-    else:
-        process_item_group(items_pre, "Pre")
-        process_item_group(items_post, "Post")
-
-    # Post slots
-    w_pocs = draw_slot("PoCS", pocs, "CL", layer_core["post"], "pocs")
-    if w_pocs:
-        ordered_bottom.append(w_pocs)
-
-    w_podp = draw_slot("PoDP", podp, "S", layer_cl["post"], "podp")
-    if w_podp:
-        ordered_bottom.append(w_podp)
-
-    # =========================
-    # EXTRA-CORE SLOTS
-    # =========================
-    def _side_relative_to_nuc(ref_code: str) -> str:
-        if not nucleus_anchor or nucleus_anchor not in ordered_bottom:
-            return "right"
-
-        nuc_idx = ordered_bottom.index(nucleus_anchor)
-
-        if not ref_code:
-            return "right"
-
-        ref_node = reference_to_node.get(ref_code)
-        if not ref_node or ref_node not in ordered_bottom:
-            return "right"
-
-        ref_idx = ordered_bottom.index(ref_node)
-
-        if ref_idx < nuc_idx:
-            return "left"
-        if ref_idx > nuc_idx:
-            return "right"
-        return "center"
-
-    for i, slot in enumerate(extra_core_slots):
-        if not slot or not slot.get("text"):
-            continue
-
-        uid = f"ExCS{i}"
-
-        ref_code = (slot.get("reference") or "").strip()
-        pos = (slot.get("position") or "right").strip().lower()
-
-        ref_side = _side_relative_to_nuc(ref_code)
-
-        if ref_side == "left":
-            target_list = layer_core["pre"]
-        elif ref_side == "right":
-            target_list = layer_core["post"]
-        else:
-            target_list = layer_core["pre"] if pos == "left" else layer_core["post"]
-
-        # IMPORTANT: do not allow the CL→ExCS edge to pull CL/CORE horizontally
-        w_excs = draw_slot(
-            uid,
-            slot,
-            parent="CL",
-            target_list=target_list,
-            ref_code=f"excs_{i}",
-            show_uid_label=False,
-            parent_edge_constraint=False,
-        )
-        if not w_excs:
-            continue
-
-        ref_node_id = reference_to_node.get(ref_code) if ref_code else None
-
-        if ref_node_id and ref_node_id in ordered_bottom:
-            ref_idx = ordered_bottom.index(ref_node_id)
-            if pos == "left":
-                ordered_bottom.insert(ref_idx, w_excs)
-            else:
-                ordered_bottom.insert(ref_idx + 1, w_excs)
-        else:
-            ordered_bottom.append(w_excs)
-
-    # =========================
-    # INSERT REALIZATION FORMS (after Extra-Core Slots)
-    # =========================
-    for idx, form in enumerate(realization_forms):
-        form_text = (form.get("text", "") or "").strip()
-        if not form_text:
-            continue
-
-        position = (form.get("position", "right") or "right").strip().lower()
-        reference_code = (form.get("reference", "") or "").strip()
-
-        ref_node_id = reference_to_node.get(reference_code)
-        if not ref_node_id:
-            continue
-
-        form_node_id = f"REAL_{idx}"
-        dot.node(form_node_id, form_text, shape="none", fontsize="11", group="real")
-        terminal_words.append(form_node_id)
-        reference_to_node[f"real_{idx}"] = form_node_id
-
-        if ref_node_id in ordered_bottom:
-            ref_index = ordered_bottom.index(ref_node_id)
-            if position == "left":
-                ordered_bottom.insert(ref_index, form_node_id)
-            else:
-                ordered_bottom.insert(ref_index + 1, form_node_id)
-        else:
-            ordered_bottom.append(form_node_id)
-
-    # OPERATORS
-    operators = data.get("operators", [])
-    if operators and nucleus_anchor:
-        draw_operator_projection(nucleus_anchor, operators, reference_to_node)
-
-    # ==========================================================
-    # ALIGNMENT FIX FINAL:
-    # ==========================================================
-    def _word_index(word_id: str) -> int:
-        try:
-            return ordered_bottom.index(word_id)
-        except ValueError:
-            return 10**9
-
-    def _row_index(row_node_id: str) -> int:
-        w = row_node_to_word.get(row_node_id)
-        if w:
-            return _word_index(w)
-        return _word_index(row_node_id)
-
-    anchor_idx = len(ordered_bottom) // 2
-    if nucleus_anchor and nucleus_anchor in ordered_bottom:
-        anchor_idx = ordered_bottom.index(nucleus_anchor)
-
-    def _unique(seq):
-        return list(dict.fromkeys(seq))
-
-    def _build_row(layer_dict, spine_node: str):
-        items = _unique(layer_dict.get("pre", []) + layer_dict.get("post", []))
-        items = [n for n in items if n != spine_node]
-        items_sorted = sorted(items, key=_row_index)
-        left = [n for n in items_sorted if _row_index(n) < anchor_idx]
-        right = [n for n in items_sorted if _row_index(n) >= anchor_idx]
-        return left + ([spine_node] if spine_node else []) + right
-
-    def enforce_rank(row_nodes):
-        row_nodes = [n for n in row_nodes if n]
-        if not row_nodes:
-            return
-        with dot.subgraph() as s:
-            s.attr(rank="same")
-            for n in row_nodes:
-                s.node(n)
-            for i in range(1, len(row_nodes)):
-                s.edge(row_nodes[i - 1], row_nodes[i], style="invis", weight="100")
-
-    enforce_rank(_build_row(layer_cl, "CL"))
-    enforce_rank(_build_row(layer_core, "CORE"))
-
-    if has_nuc:
-        enforce_rank(_build_row(layer_nuc, "NUC"))
-
-    # Align morph arg tops (AFF/CL) with NUCw,
-    # placing pre-nuclear morphs to the LEFT of NUCw and post-nuclear morphs to the RIGHT.
-    if has_nuc and has_morphological and morph_arg_top_nodes:
-        morph_unique = _unique(morph_arg_top_nodes)
-
-        # anchor_idx already computed above (nucleus position in ordered_bottom)
-        left_morph = [n for n in morph_unique if _row_index(n) < anchor_idx]
-        right_morph = [n for n in morph_unique if _row_index(n) >= anchor_idx]
-
-        left_sorted = sorted(left_morph, key=_row_index)
-        right_sorted = sorted(right_morph, key=_row_index)
-
-        with dot.subgraph() as s:
-            s.attr(rank="same")
-
-            for n in left_sorted:
-                s.node(n)
-
-            s.node("NUCw")
-
-            for n in right_sorted:
-                s.node(n)
-
-            # keep order among left morphs
-            for i in range(1, len(left_sorted)):
-                s.edge(left_sorted[i - 1], left_sorted[i], style="invis", weight="100")
-
-            # left morphs must end before NUCw
-            if left_sorted:
-                s.edge(left_sorted[-1], "NUCw", style="invis", weight="80", minlen="2")
-
-            # NUCw must come before right morphs
-            if right_sorted:
-                s.edge("NUCw", right_sorted[0], style="invis", weight="80", minlen="2")
-
-            # keep order among right morphs
-            for i in range(1, len(right_sorted)):
-                s.edge(right_sorted[i - 1], right_sorted[i], style="invis", weight="100")
-
-    # All words same horizontal baseline
-    if terminal_words:
-        with dot.subgraph() as s:
-            s.attr(rank="same")
-            for n in terminal_words:
-                s.node(n)
-
-    # Keep linear order at bottom (this is the main order constraint)
-    for i in range(len(ordered_bottom) - 1):
-        dot.edge(ordered_bottom[i], ordered_bottom[i + 1], style="invis", weight="10")
-
-    return dot, pending_op_connections, reference_to_node
-
-
-def postprocess_svg_with_connections(svg_code, connections, ref_to_node):
-    import xml.etree.ElementTree as ET
-
-    if not connections:
-        return svg_code, 0, 0
-
-    ET.register_namespace("", "http://www.w3.org/2000/svg")
-    ET.register_namespace("xlink", "http://www.w3.org/1999/xlink")
 
+def finish_job_trace(trace, result):
+    """Log a worker's trace and return ``result`` carrying its stages for the
+    rerun that shows it (see ``merge_render_trace``)."""
+    if not trace:
+        return result
     try:
-        root = ET.fromstring(svg_code)
-    except ET.ParseError:
-        return svg_code, 0, 0
-
-    def find_node_bbox(node_id):
-        for g in root.findall(".//{http://www.w3.org/2000/svg}g[@class='node']"):
-            title = g.find("{http://www.w3.org/2000/svg}title")
-            if title is not None and title.text == node_id:
-                text_elem = g.find("{http://www.w3.org/2000/svg}text")
-                if text_elem is not None:
-                    x = float(text_elem.get("x", 0))
-                    y = float(text_elem.get("y", 0))
-                    text_content = text_elem.text or ""
-                    width = len(text_content) * 7
-                    height = 14
-                    return {
-                        "x": x,
-                        "y": y,
-                        "width": width,
-                        "height": height,
-                        "cx": x,
-                        "cy": y - height * 0.35,
-                    }
+        trace.write()
+    except OSError:
+        pass  # a failing log must not fail the render; show_trace reports it
+    event = trace.meta["event"]
+    return result.with_stages({**record, "stage": f"{event}.{record['stage']}"} for record in trace.stages)
+
+
+def render_job(cache, data, key, traced=False):
+    """Render on a worker thread within the layout budget (draft layout on
+    overrun) and publish full-quality results to the shared cache."""
+    trace = Trace(event="render", key=key[:12]) if traced else NULL_TRACE
+    result = render_within_budget(data, budget_from_env(), trace)
+    if not result.draft:
+        cache.put(key, result)
+    return finish_job_trace(trace, result)
+
+
+def refine_job(cache, data, key, traced=False):
+    """Full-quality layout for a diagram shown as a draft, with a longer budget."""
+    trace = Trace(event="refine", key=key[:12]) if traced else NULL_TRACE
+    result = render_drawing(data, trace, budget_from_env().scaled(REFINE_TIME_FACTOR))
+    cache.put(key, result)
+    return finish_job_trace(trace, result)
+
+
+def merge_render_trace(trace, drawing):
+    """Add the worker-side stages of the shown ``drawing`` to this rerun's
+    trace, once per render (later reruns showing it again add nothing)."""
+    if not trace or drawing is None or not drawing.stages:
+        return
+    if st.session_state.get("traced_render") == id(drawing):
+        return
+    st.session_state["traced_render"] = id(drawing)
+    trace.merge(drawing.stages)
+
+
+def live_preview(data, trace=NULL_TRACE):
+    """Native-layout drawing to show while dot runs, or None (switched off or failed)."""
+    if not preview_enabled():
         return None
+    try:
+        return render_preview(data, trace)
+    except Exception:
+        return None  # the full render reports the error
 
-    graph_g = root.find(".//{http://www.w3.org/2000/svg}g[@class='graph']")
-    if graph_g is None:
-        graph_g = root.find(".//{http://www.w3.org/2000/svg}g")
-    if graph_g is None:
-        return svg_code, 0, 0
-
-    vb = root.get("viewBox")
-    original_min_x = 0
-    original_max_x = 0
-    if vb:
-        parts = vb.strip().split()
-        if len(parts) == 4:
-            vb_x, vb_y, vb_w, vb_h = map(float, parts)
-            original_min_x = vb_x
-            original_max_x = vb_x + vb_w
-
-    min_x_used = original_min_x
-    max_x_used = original_max_x
-
-    for conn in connections:
-        lbl_id = conn["lbl_id"]
-        target_ids = conn.get("target_node_ids", [])
-        side = conn["side"]
-        layer = conn.get("layer", "NUC")
-
-        if not target_ids:
-            continue
-
-        lbl_bbox = find_node_bbox(lbl_id)
-        if lbl_bbox is None:
-            continue
-
-        target_bboxes = []
-        for tid in target_ids:
-            bbox = find_node_bbox(tid)
-            if bbox:
-                target_bboxes.append(bbox)
-        if not target_bboxes:
-            continue
-
-        if side == "Left":
-            p1_x = lbl_bbox["cx"] - lbl_bbox["width"] / 2 - 2
-        else:
-            p1_x = lbl_bbox["cx"] + lbl_bbox["width"] / 2 + 2
-        p1_y = lbl_bbox["cy"]
-
-        if layer == "CLAUSE":
-            distance = 10
-        elif layer == "CORE":
-            distance = 8
-        else:
-            distance = 5
-
-        if side == "Left":
-            p2_x = p1_x - distance
-        else:
-            p2_x = p1_x + distance
-        p2_y = p1_y
-
-        p3_x = p2_x
-        avg_target_y = sum(tb["cy"] for tb in target_bboxes) / len(target_bboxes)
-        p3_y = p2_y - distance if avg_target_y < p2_y else p2_y + distance
-
-        trunk_d = f"M {p1_x},{p1_y} L {p2_x},{p2_y} L {p3_x},{p3_y}"
-        trunk_elem = ET.SubElement(graph_g, "{http://www.w3.org/2000/svg}path")
-        trunk_elem.set("d", trunk_d)
-        trunk_elem.set("stroke", "black")
-        trunk_elem.set("stroke-width", "0.8")
-        trunk_elem.set("stroke-dasharray", "5,3")
-        trunk_elem.set("fill", "none")
-
-        min_x_used = min(min_x_used, p1_x, p2_x, p3_x)
-        max_x_used = max(max_x_used, p1_x, p2_x, p3_x)
-
-        for tb in target_bboxes:
-            # separación extra para que la línea no "toque" visualmente las letras
-            offset = (tb.get("height", 14) * 0.25) + 8  # ajusta el 6 si quieres más/menos aire
-
-            p4_x = tb["cx"]
-            p4_y = tb["cy"] + offset if tb["cy"] < p3_y else tb["cy"] - offset
-
-            branch_d = f"M {p3_x},{p3_y} L {p4_x},{p4_y}"
-            branch_elem = ET.SubElement(graph_g, "{http://www.w3.org/2000/svg}path")
-            branch_elem.set("d", branch_d)
-            branch_elem.set("stroke", "black")
-            branch_elem.set("stroke-width", "0.8")
-            branch_elem.set("stroke-dasharray", "5,3")
-            branch_elem.set("fill", "none")
 
-            min_x_used = min(min_x_used, p4_x)
-            max_x_used = max(max_x_used, p4_x)
+def trace_requested():
+    """True if tracing is on for this session (env var or ?trace=1)."""
+    return trace_enabled() or st.query_params.get("trace") == "1"
 
-    extra_left = max(0, original_min_x - min_x_used + 20)
-    extra_right = max(0, max_x_used - original_max_x + 20)
 
-    return ET.tostring(root, encoding="unicode"), extra_left, extra_right
+def start_trace():
+    """Start a stage trace for this rerun if tracing is on."""
+    if trace_requested():
+        return Trace(form_id=st.session_state["form_id"])
+    return NULL_TRACE
 
 
-def expand_svg_viewbox(svg_code, pad_left=0, pad_right=0, pad_top=0, pad_bottom=0):
-    import xml.etree.ElementTree as ET
+def export_file(renderer, fmt, dpi=300, traced=False):
+    """Export the newest diagram for a download button (only when it is clicked)."""
+    renderer.latest(timeout=60)
+    state = renderer.poll()
+    if state.value is None:
+        raise RuntimeError("No diagram has been rendered yet")
+    start = time.perf_counter()
+    revision = (state.key, state.value.draft, state.value.engine)
+    payload = get_exporter().export(revision, state.value, fmt, dpi, session=renderer)
+    if traced:
+        trace = Trace(event="export", format=fmt, dpi=dpi)
+        trace.add("export", (time.perf_counter() - start) * 1000, out_bytes=len(payload))
+        try:
+            trace.write()
+        except OSError:
+            pass  # the download must not fail over the log
+    return payload
 
-    NS = "http://www.w3.org/2000/svg"
-    ET.register_namespace("", NS)
 
+def show_trace(trace, log=True):
+    """Debug panel with this rerun's stage timings; also appends them to the trace log."""
+    with st.expander("Render timings (debug)", expanded=False):
+        st.caption(
+            f"Total {trace.total_ms:.1f} ms · render {trace.meta.get('render', 'not used')}"
+        )
+        st.table(trace.stages)
+        st.json(
+            {
+                "render": get_render_cache().stats(),
+                "export": get_exporter().stats(),
+                "scheduler": get_render_scheduler().stats(),
+            },
+            expanded=False,
+        )
+        memory = session_memory(st.session_state, shared=(get_render_scheduler(), get_render_cache()))
+        st.caption(
+            f"Session memory {sum(size for _, size in memory) / 1024:.1f} KiB in {len(memory)} keys"
+        )
+        st.table([{"key": key, "KiB": round(size / 1024, 1)} for key, size in memory[:10]])
+    if not log:
+        return
     try:
-        root = ET.fromstring(svg_code)
-    except ET.ParseError:
-        return svg_code
-
-    vb = root.get("viewBox")
-    if not vb:
-        return svg_code
-
-    parts = vb.strip().split()
-    if len(parts) != 4:
-        return svg_code
-
-    x, y, w, h = map(float, parts)
-
-    new_x = x - pad_left
-    new_y = y - pad_top
-    new_w = w + pad_left + pad_right
-    new_h = h + pad_top + pad_bottom
+        trace.write()
+    except OSError as e:
+        st.warning(f"Could not write trace log: {e}")
 
-    root.set("viewBox", f"{new_x:.2f} {new_y:.2f} {new_w:.2f} {new_h:.2f}")
 
-    w_attr = root.get("width")
-    h_attr = root.get("height")
-
-    if w_attr:
-        m = re.match(r"^\s*([0-9.]+)", w_attr)
-        if m:
-            wn = float(m.group(1))
-            root.set("width", f"{wn + pad_left + pad_right:.2f}pt")
-    if h_attr:
-        m = re.match(r"^\s*([0-9.]+)", h_attr)
-        if m:
-            hn = float(m.group(1))
-            root.set("height", f"{hn + pad_top + pad_bottom:.2f}pt")
-
-    return ET.tostring(root, encoding="unicode")
+@st.cache_data
+def load_image_base64(filename):
+    """Read a bundled image once per process and return it base64-encoded."""
+    with open(Path(__file__).parent / filename, "rb") as f:
+        return base64.b64encode(f.read()).decode()
 
 
 # ==========================================
 # INTERFACE
 # ==========================================
 try:
-    logo_path = Path(__file__).parent / "albura_logo.png"
-    with open(logo_path, "rb") as f:
-        logo_data = base64.b64encode(f.read()).decode()
+    logo_data = load_image_base64("albura_logo.png")
     st.markdown(
         f'<img src="data:image/png;base64,{logo_data}" alt="Albura" width="300">',
         unsafe_allow_html=True,
@@ -1159,74 +300,210 @@ except Exception:
 st.caption("An assistant for diagramming the Layered Structure of the Clause (LSC) in Role and Reference Grammar")
 st.markdown("---")
 
-main_c1, main_c2 = st.columns([1, 3])
 
-p_type_key = "verbal"
 
-with main_c1:
-    # --- Load a diagram ---
-    with st.expander("Load a diagram", expanded=False):
-        uploaded_file = st.file_uploader(
-            "Load .albura file",
-            type=None,
-            key=get_key("file_uploader"),
-            help="Load a previously saved .albura file to continue editing"
-        )
-        if uploaded_file is not None:
-            if load_albura_file(uploaded_file):
-                st.success("File loaded successfully!")
-                st.rerun()
 
-    st.subheader("Constituents")
+# How long a rerun waits for a fresh render before showing the previous
+# diagram as "updating", and how often the diagram then checks again.
+FIRST_PAINT_WAIT = 0.03
+POLL_INTERVAL = 0.25
+
+
+def settle_render(renderer, refine_args=(), timeout=0):
+    """Poll the renderer, starting ``refine_job(*refine_args)`` if a draft
+    layout (the full one ran over its budget) has landed."""
+    state = renderer.poll(timeout)
+    if refine_args and state.value is not None and state.value.draft and not state.updating:
+        renderer.refine(state.key, refine_job, *refine_args)
+        state = renderer.poll()
+    return state
+
+
+def show_diagram(renderer, refine_args=(), trace=NULL_TRACE):
+    """Diagram display. Keeps the last good SVG on screen, dimmed, while the
+    newest one renders in the background; a live preview of the newest one
+    (native layout) is shown undimmed instead. A draft layout is shown as is
+    while ``refine_job(*refine_args)`` produces the full one. The render's
+    worker-side stages go to ``trace``."""
+    state = settle_render(renderer, refine_args)
+    merge_render_trace(trace, state.value)
+
+    if state.error is not None:
+        st.error(f"Technical error: {state.error}")
+
+    if state.value is not None:
+        svg_view = state.value.svg_view
+        stale = state.updating and state.key != renderer.key
+        opacity = "0.55" if stale else "1"
+        if stale:
+            status = "Updating…"
+        elif state.updating:
+            status = "Preview · laying out…"
+        elif state.value.draft:
+            status = "Draft layout · refining…" if state.refining else "Draft layout"
+        else:
+            status = ""
+        html_content = f"""
+        <div style="border: 1px solid #e0e0e0; border-radius: 8px;
+                    padding: 10px; background-color: white;
+                    box-sizing: border-box; position: relative;">
+            <div style="position: absolute; top: 6px; right: 12px;
+                        font-family: Helvetica, Arial, sans-serif;
+                        font-size: 12px; color: #6c757d;">{status}</div>
+            <div style="width: 100%; height: 700px; overflow: auto;
+                        display: flex; justify-content: center;
+                        align-items: flex-start; padding-top: 20px;
+                        opacity: {opacity}; transition: opacity 0.2s;">
+                <style>
+                    svg {{
+                        height: auto;
+                        max-height: 700px;
+                    }}
+                    text {{
+                        font-family: Helvetica, Arial, sans-serif !important;
+                    }}
+                </style>
+                {svg_view}
+            </div>
+        </div>
+        """
+        components.html(html_content, height=780, scrolling=False)
+    elif state.updating:
+        st.caption("Rendering diagram…")
+
+    if state.value is not None and state.value.draft and not (state.updating or state.refining):
+        st.caption("This diagram is too complex to lay out in full within the time limit; showing a draft layout.")
+
+
+def diagram_view(renderer, refine_args=()):
+    """The diagram and, when tracing, the debug panel. The first run shows
+    the trace of the diagram panel's rerun; later polls trace only the
+    renders that land meanwhile."""
+    trace = st.session_state.pop("rerun_trace", None) or start_trace()
+    show_diagram(renderer, refine_args, trace)
+    if trace:
+        if trace.stages:
+            st.session_state["shown_trace"] = trace
+            show_trace(trace)
+        else:
+            show_trace(st.session_state.get("shown_trace", trace), log=False)
+
+
+# While a render is in flight the view polls on its own, so a landed render
+# reruns neither the form nor the page. It stops polling the next time the
+# diagram panel reruns and finds nothing in flight.
+polling_diagram_view = st.fragment(diagram_view, run_every=POLL_INTERVAL)
+
+
+# ==========================================
+# FORM SECTIONS
+# ==========================================
+# Each section is a fragment that reruns on its own widgets, together with
+# the later sections that offer its constituents as references (only if
+# such a list is on screen) and the diagram; the page around them reruns
+# only on loading a file or starting a new diagram.
+SECTIONS = ("nucleus", "arguments", "topics", "extra_core", "realizations", "operators")
+# Item counts that put a section's reference lists on screen
+REFERENCE_COUNTS = {
+    "extra_core": ("num_excs",),
+    "realizations": ("num_realizations",),
+    "operators": ("op_nuc_n", "op_core_n", "op_clause_n"),
+}
+DATA_KEYS = (
+    "prdp", "prcs", "pred_type", "nucleus", "copula", "attribute", "items_between",
+    "items_pre", "items_post", "pocs", "podp", "operators", "realization_forms", "extra_core_slots",
+)
+POS_HELP = "Optional Part of Speech or category tag (e.g., N, P, Adv). It will be rendered between the node label and the word."
+
+
+def section_data(*names):
+    """The .albura fields produced by the form sections ``names`` on their last run."""
+    data = {}
+    for name in names:
+        data.update(st.session_state.get(get_key(f"section_{name}"), {}))
+    return data
+
+
+def section_changed(name):
+    """Widget callback: rerun section ``name``, the later sections whose
+    reference lists are on screen, and the diagram."""
+    later = SECTIONS[SECTIONS.index(name) + 1:]
+    followers = [
+        section for section in later
+        if any(st.session_state.get(get_key(count)) for count in REFERENCE_COUNTS.get(section, ()))
+    ]
+    st.rerun([name, *followers, "diagram"])
+
+
+def form_section(name):
+    """Decorator: run a form section as the fragment ``name``. The fields it
+    returns are stored for the diagram and the later sections (see
+    ``section_data``), and its build time for the debug panel."""
+    def decorate(build):
+        @functools.wraps(build)
+        def run():
+            start = time.perf_counter()
+            changed = {"on_change": section_changed, "args": (name,)}
+            st.session_state[get_key(f"section_{name}")] = build(loaded_diagram(), changed)
+            if trace_requested():
+                st.session_state.setdefault("form_timings", {})[name] = (time.perf_counter() - start) * 1000
+        return st.fragment(run, key=name)
+    return decorate
+
+
+# -------------------------
+# 1) NUCLEUS
+# -------------------------
+@form_section("nucleus")
+def nucleus_section(loaded, changed):
+    nucleus_data = {"text": "", "pos": ""}
+    copula_data = {"text": "", "pos": ""}
+    attribute_data = {"text": "", "pos": ""}
+    items_between_data = []
+    p_type_key = "verbal"
 
-    # -------------------------
-    # 1) NUCLEUS
-    # -------------------------
     with st.expander("Nucleus", expanded=False):
         # Determine default pred_type from loaded data
-        loaded_pred_type = ld("pred_type", "verbal")
+        loaded_pred_type = loaded.pred_type
         default_pred_index = 0 if loaded_pred_type == "verbal" else 1
-        
+
         pred_type = st.radio(
-            "Type", 
-            ["Predicative", "Attributive"], 
-            horizontal=True, 
+            "Type",
+            ["Predicative", "Attributive"],
+            horizontal=True,
             key=get_key("pred_type"),
             index=default_pred_index,
-            help="Predicative: Verbal predicates. Attributive: Copular constructions (AUX + PRED)."
+            help="Predicative: Verbal predicates. Attributive: Copular constructions (AUX + PRED).",
+            **changed,
         )
 
-        nucleus_data = {"text": "", "pos": ""}
-        copula_data = {"text": "", "pos": ""}
-        attribute_data = {"text": "", "pos": ""}
-        items_between_data = []
-
         if pred_type == "Predicative":
             c1, c2 = st.columns([2, 1])
-            nucleus_data["text"] = c1.text_input("Data", value=ld("nucleus.text"), key=get_key("nuc_txt"))
-            nucleus_data["pos"] = c2.text_input("PoS", value=ld("nucleus.pos"), key=get_key("nuc_pos"), help="Optional Part of Speech or category tag (e.g., N, P, Adv). It will be rendered between the node label and the word.")
+            nucleus_data["text"] = c1.text_input("Data", value=loaded.nucleus.text, key=get_key("nuc_txt"), **changed)
+            nucleus_data["pos"] = c2.text_input("PoS", value=loaded.nucleus.pos, key=get_key("nuc_pos"), help=POS_HELP, **changed)
             p_type_key = "verbal"
         else:
             st.markdown("**AUX**")
             c1, c2 = st.columns([2, 1])
-            copula_data["text"] = c1.text_input("Data", value=ld("copula.text"), key=get_key("aux_txt"))
-            copula_data["pos"] = c2.text_input("PoS", value=ld("copula.pos"), key=get_key("aux_pos"), help="Optional Part of Speech or category tag (e.g., N, P, Adv). It will be rendered between the node label and the word.")
+            copula_data["text"] = c1.text_input("Data", value=loaded.copula.text, key=get_key("aux_txt"), **changed)
+            copula_data["pos"] = c2.text_input("PoS", value=loaded.copula.pos, key=get_key("aux_pos"), help=POS_HELP, **changed)
 
             st.markdown("**PRED**")
             c3, c4 = st.columns([2, 1])
-            attribute_data["text"] = c3.text_input("Data", value=ld("attribute.text"), key=get_key("attr_txt"))
-            attribute_data["pos"] = c4.text_input("PoS", value=ld("attribute.pos"), key=get_key("attr_pos"), help="Optional Part of Speech or category tag (e.g., N, P, Adv). It will be rendered between the node label and the word.")
+            attribute_data["text"] = c3.text_input("Data", value=loaded.attribute.text, key=get_key("attr_txt"), **changed)
+            attribute_data["pos"] = c4.text_input("PoS", value=loaded.attribute.pos, key=get_key("attr_pos"), help=POS_HELP, **changed)
 
             st.markdown("---")
             st.markdown("**Constituents between AUX and PRED**")
             st.caption("(from leftmost to rightmost)")
             num_between = st.number_input(
-                "Number of items", 
-                min_value=0, 
-                value=ld_len("items_between"), 
+                "Number of items",
+                min_value=0,
+                value=len(loaded.items_between),
                 key=get_key("num_between"),
-                help="Use this for arguments or adjuncts located between the copula and the attribute (e.g., 'is **she often** happy?')."
-)
+                help="Use this for arguments or adjuncts located between the copula and the attribute (e.g., 'is **she often** happy?').",
+                **changed,
+            )
 
             if num_between > 0:
                 conn_map = {
@@ -1238,7 +515,7 @@ with main_c1:
 
                 for i in range(num_between):
                     st.markdown(f"**Item {i+1}**")
-                    conn_type_raw = st.selectbox("Type", list(conn_map.keys()), key=get_key(f"betw_c_{i}"))
+                    conn_type_raw = st.selectbox("Type", list(conn_map.keys()), key=get_key(f"betw_c_{i}"), **changed)
                     code, def_lbl = conn_map[conn_type_raw]
 
                     arg_type = None
@@ -1248,25 +525,27 @@ with main_c1:
                             ["Syntactic", "Morphological"],
                             horizontal=True,
                             key=get_key(f"betw_argtype_{i}"),
-                            help="Syntactic: Standard phrasal arguments (RP, PP). Morphological: Affixes or clitics attached to the COREw/NUCw nodes."
+                            help="Syntactic: Standard phrasal arguments (RP, PP). Morphological: Affixes or clitics attached to the COREw/NUCw nodes.",
+                            **changed,
                         )
 
                     c1, c2, c3 = st.columns([2, 1, 1])
 
-                    txt = c1.text_input("Data", key=get_key(f"betw_t_{i}"))
+                    txt = c1.text_input("Data", key=get_key(f"betw_t_{i}"), **changed)
 
                     morph_form = None
                     if conn_type_raw == "Argument" and arg_type == "Morphological":
                         morph_form = c2.selectbox(
                             "Label",
                             ["Affix", "Clitic"],
-                            key=get_key(f"betw_morphform_{i}")
+                            key=get_key(f"betw_morphform_{i}"),
+                            **changed,
                         )
                         lbl = "AFF" if morph_form == "Affix" else "CL"
                     else:
-                        lbl = c2.text_input("Label", value=def_lbl, key=get_key(f"betw_l_{i}"))
+                        lbl = c2.text_input("Label", value=def_lbl, key=get_key(f"betw_l_{i}"), **changed)
 
-                    pos = c3.text_input("PoS", key=get_key(f"betw_p_{i}"), help="Optional Part of Speech or category tag (e.g., N, P, Adv). It will be rendered between the node label and the word.")
+                    pos = c3.text_input("PoS", key=get_key(f"betw_p_{i}"), help=POS_HELP, **changed)
 
                     items_between_data.append({
                         "label": lbl,
@@ -1279,41 +558,53 @@ with main_c1:
 
             p_type_key = "copular"
 
-    # -------------------------
-    # 2) ARGUMENTS / ADJUNCTS
-    # -------------------------
-    with st.expander("Arguments and adjuncts", expanded=False):
-        st.caption("(from leftmost to rightmost)")
+    return {
+        "pred_type": p_type_key,
+        "nucleus": nucleus_data,
+        "copula": copula_data,
+        "attribute": attribute_data,
+        "items_between": items_between_data,
+    }
 
-        conn_map = {
-            "Argument": ("Arg", "XP"),
-            "Periphery (NUC)": ("Peri-Nuc", "XP"),
-            "Periphery (CORE)": ("Peri-Core", "XP"),
-            "Periphery (CLAUSE)": ("Peri-Clause", "XP"),
-        }
 
-        st.caption("**Pre-nuclear**")
-        num_pre = st.number_input("Number of items", min_value=0, value=ld_len("items_pre"), key=get_key("num_pre"))
+# -------------------------
+# 2) ARGUMENTS / ADJUNCTS
+# -------------------------
+@form_section("arguments")
+def arguments_section(loaded, changed):
+    conn_map = {
+        "Argument": ("Arg", "XP"),
+        "Periphery (NUC)": ("Peri-Nuc", "XP"),
+        "Periphery (CORE)": ("Peri-Core", "XP"),
+        "Periphery (CLAUSE)": ("Peri-Clause", "XP"),
+    }
+
+    def input_items(list_name, prefix, title):
+        st.caption(f"**{title}**")
+        num_items = st.number_input(
+            "Number of items", min_value=0, value=len(getattr(loaded, list_name)), key=get_key(f"num_{prefix}"), **changed
+        )
 
-        items_pre_data = []
-        for i in range(num_pre):
+        items_data = []
+        for i in range(num_items):
             st.markdown(f"**Item {i+1}**")
-            
+
             # Get loaded values for this item
-            loaded_conn = ld_item("items_pre", i, "conn_type", "Arg")
+            loaded_item = loaded.item(list_name, i)
             conn_type_options = list(conn_map.keys())
             conn_type_default = 0
             for idx, (k, v) in enumerate(conn_map.items()):
-                if v[0] == loaded_conn:
+                if v[0] == loaded_item.conn_type:
                     conn_type_default = idx
                     break
-            
-            conn_type_raw = st.selectbox("Type", conn_type_options, index=conn_type_default, key=get_key(f"pre_c_{i}"))
+
+            conn_type_raw = st.selectbox(
+                "Type", conn_type_options, index=conn_type_default, key=get_key(f"{prefix}_c_{i}"), **changed
+            )
             code, def_lbl = conn_map[conn_type_raw]
 
             # Get loaded arg_type
-            loaded_arg_type = ld_item("items_pre", i, "arg_type", "Syntactic")
-            arg_type_default = 0 if loaded_arg_type != "Morphological" else 1
+            arg_type_default = 0 if loaded_item.arg_type != "Morphological" else 1
 
             arg_type = None
             if conn_type_raw == "Argument":
@@ -1322,32 +613,32 @@ with main_c1:
                     ["Syntactic", "Morphological"],
                     horizontal=True,
                     index=arg_type_default,
-                    key=get_key(f"pre_argtype_{i}"),
-                    help="Syntactic: Standard phrasal arguments (RP, PP). Morphological: Affixes or clitics attached to the COREw/NUCw nodes."
+                    key=get_key(f"{prefix}_argtype_{i}"),
+                    help="Syntactic: Standard phrasal arguments (RP, PP). Morphological: Affixes or clitics attached to the COREw/NUCw nodes.",
+                    **changed,
                 )
 
             c1, c2, c3 = st.columns([2, 1, 1])
 
-            txt = c1.text_input("Data", value=ld_item("items_pre", i, "text"), key=get_key(f"pre_t_{i}"))
+            txt = c1.text_input("Data", value=loaded_item.text, key=get_key(f"{prefix}_t_{i}"), **changed)
 
             morph_form = None
             if conn_type_raw == "Argument" and arg_type == "Morphological":
-                loaded_morph = ld_item("items_pre", i, "morph_form", "Affix")
-                morph_default = 0 if loaded_morph != "Clitic" else 1
+                morph_default = 0 if loaded_item.morph_form != "Clitic" else 1
                 morph_form = c2.selectbox(
                     "Label",
                     ["Affix", "Clitic"],
                     index=morph_default,
-                    key=get_key(f"pre_morphform_{i}")
+                    key=get_key(f"{prefix}_morphform_{i}"),
+                    **changed,
                 )
                 lbl = "AFF" if morph_form == "Affix" else "CL"
             else:
-                loaded_lbl = ld_item("items_pre", i, "label", def_lbl)
-                lbl = c2.text_input("Label", value=loaded_lbl, key=get_key(f"pre_l_{i}_{code}"))
+                lbl = c2.text_input("Label", value=loaded_item.label, key=get_key(f"{prefix}_l_{i}_{code}"), **changed)
 
-            pos = c3.text_input("PoS", value=ld_item("items_pre", i, "pos"), key=get_key(f"pre_p_{i}"), help="Optional Part of Speech or category tag (e.g., N, P, Adv). It will be rendered between the node label and the word.")
+            pos = c3.text_input("PoS", value=loaded_item.pos, key=get_key(f"{prefix}_p_{i}"), help=POS_HELP, **changed)
 
-            items_pre_data.append({
+            items_data.append({
                 "label": lbl,
                 "text": txt,
                 "pos": pos,
@@ -1355,148 +646,111 @@ with main_c1:
                 "arg_type": arg_type,
                 "morph_form": morph_form
             })
+        return items_data
 
+    with st.expander("Arguments and adjuncts", expanded=False):
+        st.caption("(from leftmost to rightmost)")
+        items_pre_data = input_items("items_pre", "pre", "Pre-nuclear")
         st.markdown("---")
+        items_post_data = input_items("items_post", "post", "Post-nuclear")
 
-        st.caption("**Post-nuclear**")
-        num_post = st.number_input("Number of items", min_value=0, value=ld_len("items_post"), key=get_key("num_post"))
+    return {"items_pre": items_pre_data, "items_post": items_post_data}
 
-        items_post_data = []
-        for i in range(num_post):
-            st.markdown(f"**Item {i+1}**")
-            
-            # Get loaded values for this item
-            loaded_conn = ld_item("items_post", i, "conn_type", "Arg")
-            conn_type_options = list(conn_map.keys())
-            conn_type_default = 0
-            for idx, (k, v) in enumerate(conn_map.items()):
-                if v[0] == loaded_conn:
-                    conn_type_default = idx
-                    break
-            
-            conn_type_raw = st.selectbox("Type", conn_type_options, index=conn_type_default, key=get_key(f"post_c_{i}"))
-            code, def_lbl = conn_map[conn_type_raw]
 
-            # Get loaded arg_type
-            loaded_arg_type = ld_item("items_post", i, "arg_type", "Syntactic")
-            arg_type_default = 0 if loaded_arg_type != "Morphological" else 1
+# -------------------------
+# 3) TOPICS / FOCI
+# -------------------------
+@form_section("topics")
+def topics_section(loaded, changed):
+    def input_peri(label_ui, key_prefix):
+        st.markdown(f"**{label_ui}**")
+        c1, c2, c3 = st.columns([2, 1, 1])
+        txt = c1.text_input("Data", value=getattr(loaded, key_prefix).text, key=get_key(f"{key_prefix}_txt"), **changed)
+        lbl = c2.text_input("Label", value=getattr(loaded, key_prefix).label, key=get_key(f"{key_prefix}_lbl"), **changed)
+        pos = c3.text_input("PoS", value=getattr(loaded, key_prefix).pos, key=get_key(f"{key_prefix}_pos"), help=POS_HELP, **changed)
+        return {"label": lbl, "text": txt, "pos": pos}
 
-            arg_type = None
-            if conn_type_raw == "Argument":
-                arg_type = st.radio(
-                    "Argument type",
-                    ["Syntactic", "Morphological"],
-                    horizontal=True,
-                    index=arg_type_default,
-                    key=get_key(f"post_argtype_{i}"),
-                    help="Syntactic: Standard phrasal arguments (RP, PP). Morphological: Affixes or clitics attached to the COREw/NUCw nodes."
-                )
-
-            c1, c2, c3 = st.columns([2, 1, 1])
+    with st.expander("Topics and foci", expanded=False):
+        prdp = input_peri("PrDP", "prdp")
+        podp = input_peri("PoDP", "podp")
+        st.markdown("---")
+        prcs = input_peri("PrCS", "prcs")
+        pocs = input_peri("PoCS", "pocs")
 
-            txt = c1.text_input("Data", value=ld_item("items_post", i, "text"), key=get_key(f"post_t_{i}"))
+    return {"prdp": prdp, "prcs": prcs, "pocs": pocs, "podp": podp}
 
-            morph_form = None
-            if conn_type_raw == "Argument" and arg_type == "Morphological":
-                loaded_morph = ld_item("items_post", i, "morph_form", "Affix")
-                morph_default = 0 if loaded_morph != "Clitic" else 1
-                morph_form = c2.selectbox(
-                    "Label",
-                    ["Affix", "Clitic"],
-                    index=morph_default,
-                    key=get_key(f"post_morphform_{i}")
-                )
-                lbl = "AFF" if morph_form == "Affix" else "CL"
-            else:
-                loaded_lbl = ld_item("items_post", i, "label", def_lbl)
-                lbl = c2.text_input("Label", value=loaded_lbl, key=get_key(f"post_l_{i}_{code}"))
 
-            pos = c3.text_input("PoS", value=ld_item("items_post", i, "pos"), key=get_key(f"post_p_{i}"), help="Optional Part of Speech or category tag (e.g., N, P, Adv). It will be rendered between the node label and the word.")
+def constituent_references(data):
+    """``(label, code)`` of every filled constituent in ``data``, as offered
+    for anchoring Extra-Core slots and realization forms."""
+    references = []
 
-            items_post_data.append({
-                "label": lbl,
-                "text": txt,
-                "pos": pos,
-                "conn_type": code,
-                "arg_type": arg_type,
-                "morph_form": morph_form
-            })
+    if data["pred_type"] == "verbal" and data["nucleus"].get("text"):
+        references.append(("Nucleus", "nucleus"))
+    elif data["pred_type"] == "copular":
+        if data["copula"].get("text"):
+            references.append(("Copula (AUX)", "copula"))
+        if data["attribute"].get("text"):
+            references.append(("Attribute (PRED)", "attribute"))
 
-    # -------------------------
-    # 3) TOPICS / FOCI
-    # -------------------------
-    with st.expander("Topics and foci", expanded=False):
-        def input_peri(label_ui, key_prefix, default_lbl="XP"):
-            st.markdown(f"**{label_ui}**")
-            c1, c2, c3 = st.columns([2, 1, 1])
-            txt = c1.text_input("Data", value=ld(f"{key_prefix}.text"), key=get_key(f"{key_prefix}_txt"))
-            lbl = c2.text_input("Label", value=ld(f"{key_prefix}.label", default_lbl), key=get_key(f"{key_prefix}_lbl"))
-            pos = c3.text_input("PoS", value=ld(f"{key_prefix}.pos"), key=get_key(f"{key_prefix}_pos"), help="Optional Part of Speech or category tag (e.g., N, P, Adv). It will be rendered between the node label and the word.")
-            return {"label": lbl, "text": txt, "pos": pos}
+    for i, item in enumerate(data["items_pre"]):
+        if item.get("text"):
+            references.append((f"Pre-nuclear {i+1}: {item.get('text','')[:20]}", f"pre_{i}"))
 
-        prdp = input_peri("PrDP", "prdp", "XP")
-        podp = input_peri("PoDP", "podp", "XP")
-        st.markdown("---")
-        prcs = input_peri("PrCS", "prcs", "XP")
-        pocs = input_peri("PoCS", "pocs", "XP")
+    for i, item in enumerate(data["items_between"]):
+        if item.get("text"):
+            references.append((f"Between {i+1}: {item.get('text','')[:20]}", f"between_{i}"))
 
-    # -------------------------
-    # 4) EXTRA-CORE SLOTS
-    # -------------------------
-    with st.expander("Extra-Core Slots", expanded=False):
-        st.caption("(drawn as CORE-level slots attached to CL)")
+    for i, item in enumerate(data["items_post"]):
+        if item.get("text"):
+            references.append((f"Post-nuclear {i+1}: {item.get('text','')[:20]}", f"post_{i}"))
 
-        num_excs = st.number_input("Number of items", min_value=0, value=ld_len("extra_core_slots"), key=get_key("num_excs"))
+    if data["prdp"].get("text"):
+        references.append(("PrDP", "prdp"))
+    if data["prcs"].get("text"):
+        references.append(("PrCS", "prcs"))
+    if data["pocs"].get("text"):
+        references.append(("PoCS", "pocs"))
+    if data["podp"].get("text"):
+        references.append(("PoDP", "podp"))
 
-        extra_core_slots_data = []
-        base_reference_items = []
+    return references
 
-        if pred_type == "Predicative" and nucleus_data.get("text"):
-            base_reference_items.append(("Nucleus", "nucleus"))
-        elif pred_type == "Attributive":
-            if copula_data.get("text"):
-                base_reference_items.append(("Copula (AUX)", "copula"))
-            if attribute_data.get("text"):
-                base_reference_items.append(("Attribute (PRED)", "attribute"))
 
-        for i, item in enumerate(items_pre_data):
-            if item.get("text"):
-                base_reference_items.append((f"Pre-nuclear {i+1}: {item.get('text','')[:20]}", f"pre_{i}"))
+# -------------------------
+# 4) EXTRA-CORE SLOTS
+# -------------------------
+@form_section("extra_core")
+def extra_core_section(loaded, changed):
+    extra_core_slots_data = []
 
-        for i, item in enumerate(items_between_data):
-            if item.get("text"):
-                base_reference_items.append((f"Between {i+1}: {item.get('text','')[:20]}", f"between_{i}"))
+    with st.expander("Extra-Core Slots", expanded=False):
+        st.caption("(drawn as CORE-level slots attached to CL)")
 
-        for i, item in enumerate(items_post_data):
-            if item.get("text"):
-                base_reference_items.append((f"Post-nuclear {i+1}: {item.get('text','')[:20]}", f"post_{i}"))
+        num_excs = st.number_input(
+            "Number of items", min_value=0, value=len(loaded.extra_core_slots), key=get_key("num_excs"), **changed
+        )
 
-        if prdp.get("text"):
-            base_reference_items.append(("PrDP", "prdp"))
-        if prcs.get("text"):
-            base_reference_items.append(("PrCS", "prcs"))
-        if pocs.get("text"):
-            base_reference_items.append(("PoCS", "pocs"))
-        if podp.get("text"):
-            base_reference_items.append(("PoDP", "podp"))
+        base_reference_items = constituent_references(section_data("nucleus", "arguments", "topics"))
 
         for i in range(num_excs):
             st.markdown(f"**Item {i+1}**")
 
             c1, c2, c3 = st.columns([2, 1, 1])
-            txt = c1.text_input("Data", value=ld_item("extra_core_slots", i, "text"), key=get_key(f"excs_t_{i}"))
-            lbl = c2.text_input("Label", value=ld_item("extra_core_slots", i, "label", "XP"), key=get_key(f"excs_l_{i}"))
-            pos = c3.text_input("PoS", value=ld_item("extra_core_slots", i, "pos"), key=get_key(f"excs_p_{i}"), help="Optional Part of Speech or category tag (e.g., N, P, Adv). It will be rendered between the node label and the word.")
+            txt = c1.text_input("Data", value=loaded.item("extra_core_slots", i).text, key=get_key(f"excs_t_{i}"), **changed)
+            lbl = c2.text_input("Label", value=loaded.item("extra_core_slots", i).label, key=get_key(f"excs_l_{i}"), **changed)
+            pos = c3.text_input("PoS", value=loaded.item("extra_core_slots", i).pos, key=get_key(f"excs_p_{i}"), help=POS_HELP, **changed)
 
             c4, c5 = st.columns([1, 1])
-            loaded_pos = ld_item("extra_core_slots", i, "position", "right")
+            loaded_pos = loaded.item("extra_core_slots", i).position
             pos_default = 0 if loaded_pos == "left" else 1
             position = c4.selectbox(
-                "Position", 
-                ["Left of", "Right of"], 
+                "Position",
+                ["Left of", "Right of"],
                 index=pos_default,
                 key=get_key(f"excs_pos_{i}"),
-                help="Determines the linear order of the Extra-Core Slot relative to the reference item selected."
+                help="Determines the linear order of the Extra-Core Slot relative to the reference item selected.",
+                **changed,
             )
 
             current_refs = base_reference_items.copy()
@@ -1508,10 +762,11 @@ with main_c1:
             if current_refs:
                 ref_labels = [x[0] for x in current_refs]
                 ref_choice = c5.selectbox(
-                    "Reference item", 
-                    ref_labels, 
+                    "Reference item",
+                    ref_labels,
                     key=get_key(f"excs_ref_{i}"),
-                    help="Select the existing constituent that will serve as the anchor for positioning this slot."
+                    help="Select the existing constituent that will serve as the anchor for positioning this slot.",
+                    **changed,
                 )
                 ref_code = current_refs[ref_labels.index(ref_choice)][1]
             else:
@@ -1527,52 +782,32 @@ with main_c1:
                 }
             )
 
-    # -------------------------
-    # 5) OPERATORS
-    # -------------------------
-    st.subheader("Operators")
+    return {"extra_core_slots": extra_core_slots_data}
+
+
+# -------------------------
+# 5) OPERATORS
+# -------------------------
+@form_section("realizations")
+def realizations_section(loaded, changed):
+    realization_forms_data = []
 
     # Realization Forms
     with st.expander("Realization forms", expanded=False):
         st.caption("If operators are expressed in items not present in the constituent projection, enter them here.")
 
-        num_realizations = st.number_input("Number of items", min_value=0, value=ld_len("realization_forms"), key=get_key("num_realizations"))
-
-        realization_forms_data = []
+        num_realizations = st.number_input(
+            "Number of items",
+            min_value=0,
+            value=len(loaded.realization_forms),
+            key=get_key("num_realizations"),
+            **changed,
+        )
 
         if num_realizations > 0:
-            reference_items = []
-
-            if pred_type == "Predicative" and nucleus_data.get("text"):
-                reference_items.append(("Nucleus", "nucleus"))
-            elif pred_type == "Attributive":
-                if copula_data.get("text"):
-                    reference_items.append(("Copula (AUX)", "copula"))
-                if attribute_data.get("text"):
-                    reference_items.append(("Attribute (PRED)", "attribute"))
-
-            for i, item in enumerate(items_pre_data):
-                if item.get("text"):
-                    reference_items.append((f"Pre-nuclear {i+1}: {item.get('text','')[:20]}", f"pre_{i}"))
-
-            for i, item in enumerate(items_between_data):
-                if item.get("text"):
-                    reference_items.append((f"Between {i+1}: {item.get('text','')[:20]}", f"between_{i}"))
-
-            for i, item in enumerate(items_post_data):
-                if item.get("text"):
-                    reference_items.append((f"Post-nuclear {i+1}: {item.get('text','')[:20]}", f"post_{i}"))
-
-            if prdp.get("text"):
-                reference_items.append(("PrDP", "prdp"))
-            if prcs.get("text"):
-                reference_items.append(("PrCS", "prcs"))
-            if pocs.get("text"):
-                reference_items.append(("PoCS", "pocs"))
-            if podp.get("text"):
-                reference_items.append(("PoDP", "podp"))
-
-            for i, slot in enumerate(extra_core_slots_data):
+            reference_items = constituent_references(section_data("nucleus", "arguments", "topics"))
+
+            for i, slot in enumerate(section_data("extra_core")["extra_core_slots"]):
                 if slot.get("text"):
                     reference_items.append((f"Extra-Core {i+1}: {slot['text'][:20]}", f"excs_{i}"))
 
@@ -1583,14 +818,17 @@ with main_c1:
 
                 form_text = c1.text_input(
                     "Form",
-                    value=ld_item("realization_forms", i, "text"),
+                    value=loaded.item("realization_forms", i).text,
                     key=get_key(f"real_text_{i}"),
                     help="Any item other than an argument or adjunct that serves as realization of an operator, such as affixes or particles (e.g., -able, will, Ø, -ing)",
+                    **changed,
                 )
 
-                loaded_real_pos = ld_item("realization_forms", i, "position", "right")
+                loaded_real_pos = loaded.item("realization_forms", i).position
                 real_pos_default = 0 if loaded_real_pos == "left" else 1
-                position = c2.selectbox("Position", ["Left of", "Right of"], index=real_pos_default, key=get_key(f"real_pos_{i}"))
+                position = c2.selectbox(
+                    "Position", ["Left of", "Right of"], index=real_pos_default, key=get_key(f"real_pos_{i}"), **changed
+                )
 
                 current_references = reference_items.copy()
                 for j in range(i):
@@ -1601,14 +839,16 @@ with main_c1:
                 if current_references:
                     reference_labels = [item[0] for item in current_references]
                     reference_codes = [item[1] for item in current_references]
-                    
+
                     # Get loaded reference and find its index
-                    loaded_ref = ld_item("realization_forms", i, "reference", "")
+                    loaded_ref = loaded.item("realization_forms", i).reference
                     ref_default_idx = 0
                     if loaded_ref in reference_codes:
                         ref_default_idx = reference_codes.index(loaded_ref)
-                    
-                    reference = st.selectbox("Reference item", reference_labels, index=ref_default_idx, key=get_key(f"real_ref_{i}"))
+
+                    reference = st.selectbox(
+                        "Reference item", reference_labels, index=ref_default_idx, key=get_key(f"real_ref_{i}"), **changed
+                    )
 
                     selected_idx = reference_labels.index(reference)
                     reference_code = current_references[selected_idx][1]
@@ -1620,74 +860,89 @@ with main_c1:
                     st.warning("No reference items available. Please add constituents first.")
                     break
 
+    return {"realization_forms": realization_forms_data}
+
+
+@form_section("operators")
+def operators_section(loaded, changed):
+    data = section_data(*SECTIONS[:-1])
+    nucleus_data, copula_data, attribute_data = data["nucleus"], data["copula"], data["attribute"]
+    prdp, prcs, pocs, podp = data["prdp"], data["prcs"], data["pocs"], data["podp"]
+
     # Operators by layer
-    ops_nuc = ["Aspect", "Negation", "Directionals"]
-    ops_core = ["Directionals", "Event quantification", "Modality", "Negation"]
-    ops_clause = ["Status", "Negation", "Tense", "Evidentiality", "Illocutionary force"]
+    ops_nuc = LAYER_OPERATORS["NUC"]
+    ops_core = LAYER_OPERATORS["CORE"]
+    ops_clause = LAYER_OPERATORS["CLAUSE"]
 
     operators_data = []
 
     def operator_box(title, layer_code, ops_list, key_prefix, realization_forms):
         # Get loaded operators for this layer
-        loaded_ops = ld_operators_by_layer(layer_code)
-        
+        loaded_ops = loaded.operators_by_layer[layer_code]
+
         with st.expander(title, expanded=False):
-            n = st.number_input("Number of operators", min_value=0, value=len(loaded_ops), key=get_key(f"{key_prefix}_n"))
+            n = st.number_input(
+                "Number of operators", min_value=0, value=len(loaded_ops), key=get_key(f"{key_prefix}_n"), **changed
+            )
 
             for i in range(n):
                 st.markdown(f"**Operator {i+1}**")
-                
+
                 # Get loaded values for this operator
-                loaded_op = loaded_ops[i] if i < len(loaded_ops) else {}
-                loaded_op_type = loaded_op.get("operator", "")
-                loaded_op_value = loaded_op.get("value", "")
-                loaded_op_side = loaded_op.get("side", "Right")
-                loaded_op_targets = loaded_op.get("targets", [])
-                
+                loaded_op = loaded.operator(layer_code, i)
+                loaded_op_type = loaded_op.operator
+                loaded_op_value = loaded_op.value
+                loaded_op_side = loaded_op.side
+                loaded_op_targets = loaded_op.targets
+
                 # Find index of loaded operator type in ops_list
                 op_type_index = 0
                 if loaded_op_type in ops_list:
                     op_type_index = ops_list.index(loaded_op_type)
 
-                op_type = st.selectbox("Type", options=ops_list, index=op_type_index, key=get_key(f"{key_prefix}_type_{i}"))
+                op_type = st.selectbox(
+                    "Type", options=ops_list, index=op_type_index, key=get_key(f"{key_prefix}_type_{i}"), **changed
+                )
 
                 c1, c2 = st.columns([1, 1])
 
                 op_value = c1.text_input(
-                    "Value", 
+                    "Value",
                     value=loaded_op_value,
                     key=get_key(f"{key_prefix}_value_{i}"),
-                    help="The grammatical value of the operator (e.g., 'PAST', 'PROGR', 'DECL')."
+                    help="The grammatical value of the operator (e.g., 'PAST', 'PROGR', 'DECL').",
+                    **changed,
                 )
 
                 side_index = 0 if loaded_op_side == "Right" else 1
                 label_side = c2.selectbox(
-                    "Label position", 
-                    options=["Right", "Left"], 
-                    index=side_index, 
+                    "Label position",
+                    options=["Right", "Left"],
+                    index=side_index,
                     key=get_key(f"{key_prefix}_side_{i}"),
-                    help="Determines if the operator label appears on the left or right side of the projection spine."
+                    help="Determines if the operator label appears on the left or right side of the projection spine.",
+                    **changed,
                 )
 
                 target_options = [("None", None)]
 
-                if pred_type == "Predicative" and nucleus_data.get("text"):
+                if data["pred_type"] == "verbal" and nucleus_data.get("text"):
                     target_options.append((f"Nucleus: {nucleus_data['text']}", "nucleus"))
-                elif pred_type == "Attributive":
+                elif data["pred_type"] == "copular":
                     if copula_data.get("text"):
                         target_options.append((f"Copula: {copula_data['text']}", "copula"))
                     if attribute_data.get("text"):
                         target_options.append((f"Attribute: {attribute_data['text']}", "attribute"))
 
-                for idx, item in enumerate(items_pre_data):
+                for idx, item in enumerate(data["items_pre"]):
                     if item.get("text"):
                         target_options.append((f"Pre-nuclear {idx+1}: {item['text'][:20]}", f"pre_{idx}"))
 
-                for idx, item in enumerate(items_between_data):
+                for idx, item in enumerate(data["items_between"]):
                     if item.get("text"):
                         target_options.append((f"Between {idx+1}: {item['text'][:20]}", f"between_{idx}"))
 
-                for idx, item in enumerate(items_post_data):
+                for idx, item in enumerate(data["items_post"]):
                     if item.get("text"):
                         target_options.append((f"Post-nuclear {idx+1}: {item['text'][:20]}", f"post_{idx}"))
 
@@ -1700,7 +955,7 @@ with main_c1:
                 if podp.get("text"):
                     target_options.append((f"PoDP: {podp['text'][:20]}", "podp"))
 
-                for idx, slot in enumerate(extra_core_slots_data):
+                for idx, slot in enumerate(data["extra_core_slots"]):
                     if slot.get("text"):
                         target_options.append((f"Extra-Core {idx+1}: {slot['text'][:20]}", f"excs_{idx}"))
 
@@ -1710,7 +965,7 @@ with main_c1:
 
                 target_labels = [opt[0] for opt in target_options]
                 target_codes_list = [opt[1] for opt in target_options]
-                
+
                 # Find default selected targets based on loaded data
                 default_targets = []
                 for target_code in loaded_op_targets:
@@ -1718,13 +973,14 @@ with main_c1:
                         idx = target_codes_list.index(target_code)
                         if idx > 0:  # Skip "None" option
                             default_targets.append(target_labels[idx])
-                
+
                 targets = st.multiselect(
                     "Links to",
                     options=target_labels[1:],
                     default=default_targets,
                     key=get_key(f"{key_prefix}_target_{i}"),
                     help="Select the constituent(s) or realization form(s) this operator links to. They can be more than one. This will draw the dashed connection lines.",
+                    **changed,
                 )
 
                 target_codes = []
@@ -1734,77 +990,60 @@ with main_c1:
 
                 operators_data.append({"operator": op_type, "value": op_value, "layer": layer_code, "side": label_side, "targets": target_codes})
 
-    operator_box("Nucleus", "NUC", ops_nuc, "op_nuc", realization_forms_data)
-    operator_box("Core", "CORE", ops_core, "op_core", realization_forms_data)
-    operator_box("Clause", "CLAUSE", ops_clause, "op_clause", realization_forms_data)
-
-    st.markdown("---")
+    operator_box("Nucleus", "NUC", ops_nuc, "op_nuc", data["realization_forms"])
+    operator_box("Core", "CORE", ops_core, "op_core", data["realization_forms"])
+    operator_box("Clause", "CLAUSE", ops_clause, "op_clause", data["realization_forms"])
 
-    h1, h2 = st.columns([0.9, 0.1])
-    with h1:
-        st.page_link("pages/01_User_Manual.py", label="User Manual", icon="📘")
+    return {"operators": operators_data}
 
-    st.markdown("---")
 
-    # Footer: logo cgv.tools + badge CC en la misma línea, firma debajo
-    try:
-        cgv_logo_path = Path(__file__).parent / "cgv-tools.png"
-        cc_icon_path = Path(__file__).parent / "cc_icon.png"
-        with open(cgv_logo_path, "rb") as f:
-            cgv_data = base64.b64encode(f.read()).decode()
-        with open(cc_icon_path, "rb") as f:
-            cc_data = base64.b64encode(f.read()).decode()
-        st.markdown(
-            f'''
-            <div style="display: flex; align-items: center; justify-content: center; gap: 18px; margin-top: 8px;">
-                <a href="https://cgv.tools" target="_blank">
-                    <img src="data:image/png;base64,{cgv_data}" alt="cgv.tools" height="22" style="opacity: 0.85;">
-                </a>
-                <a href="https://creativecommons.org/licenses/by-nc-nd/4.0/" target="_blank">
-                    <img src="data:image/png;base64,{cc_data}" alt="CC BY-NC-ND 4.0" height="28">
-                </a>
-            </div>
-            <p style="text-align: center; color: #6c757d; font-size: 0.85rem; margin-top: 10px;">
-                Carlos González Vergara (<strong>cgonzalv@uc.cl</strong>)
-            </p>
-            ''',
-            unsafe_allow_html=True,
+def load_section():
+    """File and bundle loading. Not a fragment: loading starts a new widget
+    generation, so the whole form reruns with the upload's own rerun."""
+    with st.expander("Load a diagram", expanded=False):
+        st.file_uploader(
+            "Load .albura file",
+            type=None,
+            key=get_key("file_uploader"),
+            on_change=on_file_uploaded,
+            help="Load a previously saved .albura file (or an .albundle corpus bundle) to continue editing"
         )
-    except Exception:
-        st.caption("by Carlos González Vergara (__cgonzalv@uc.cl__)")
-        st.markdown("[cgv.tools](https://cgv.tools) · [CC BY-NC-ND 4.0](https://creativecommons.org/licenses/by-nc-nd/4.0/)")
+        if st.session_state.pop("load_success", False):
+            st.success("File loaded successfully!")
+
+        bundle_index = st.session_state.get("bundle_index")
+        if bundle_index:
+            sentences = dict(bundle_index)
+            st.selectbox(
+                f"Diagram in bundle ({len(sentences)})",
+                list(sentences),
+                index=None,
+                placeholder="Choose a diagram to open",
+                format_func=lambda entry_id: f"{entry_id} · {sentences[entry_id]}",
+                key=get_key("bundle_entry"),
+                on_change=on_bundle_entry_selected,
+            )
 
 
 # ==========================================
 # RIGHT PANEL (OUTPUT)
 # ==========================================
-with main_c2:
+@st.fragment(key="diagram")
+def diagram_panel():
+    trace = start_trace()
+    for name, ms in st.session_state.pop("form_timings", {}).items():
+        trace.add(f"form.{name}", ms)
+
+    sections = section_data(*SECTIONS)
+    data = {key: sections[key] for key in DATA_KEYS}
+
     show_graph = False
-    if p_type_key == "verbal" and nucleus_data["text"]:
+    if data["pred_type"] == "verbal" and data["nucleus"]["text"]:
         show_graph = True
-    elif p_type_key == "copular" and attribute_data["text"]:
+    elif data["pred_type"] == "copular" and data["attribute"]["text"]:
         show_graph = True
 
     if show_graph:
-        data = {
-            "prdp": prdp,
-            "prcs": prcs,
-            "pred_type": p_type_key,
-            "nucleus": nucleus_data,
-            "copula": copula_data,
-            "attribute": attribute_data,
-            "items_between": items_between_data,
-            "items_pre": items_pre_data,
-            "items_post": items_post_data,
-            "pocs": pocs,
-            "podp": podp,
-            "operators": operators_data,
-            "realization_forms": realization_forms_data,
-            "extra_core_slots": extra_core_slots_data,
-        }
-
-        graph, pending_connections, node_mapping = draw_lsc_tree(data)
-
         btn_col1, btn_col2, btn_col3 = st.columns([1, 1, 1])
         with btn_col1:
             # Save .albura button
@@ -1817,80 +1056,114 @@ with main_c2:
                 use_container_width=True,
                 help="Save diagram as .albura file for later editing"
             )
-        
-        with btn_col3:
-            st.button(
-                "Create new diagram",
-                use_container_width=True,
-                on_click=reset_state,
-                help="Generate new diagram",
-            )
 
-        try:
-            graph.attr(dpi="72")
-            svg_code = graph.pipe(format="svg").decode("utf-8")
-
-            svg_code, extra_left, extra_right = postprocess_svg_with_connections(svg_code, pending_connections, node_mapping)
-
-            svg_code = expand_svg_viewbox(
-                svg_code,
-                pad_left=max(10, extra_left),
-                pad_right=max(10, extra_right),
-                pad_top=10,
-                pad_bottom=10
-            )
-
-            png_data = None
-            try:
-                import cairosvg
-                png_data = cairosvg.svg2png(bytestring=svg_code.encode("utf-8"), dpi=300)
-            except ImportError:
-                pass
+        with btn_col3:
+            if st.button("Create new diagram", use_container_width=True, help="Generate new diagram"):
+                reset_state()
+                st.rerun()  # the whole form starts afresh
+
+        key = canonical_hash(data)
+        renderer = get_renderer()
+        cache = get_render_cache()
+        if key == renderer.key:
+            trace.note("render", "current")
+        else:
+            cached = cache.get(key)
+            if cached is not None:
+                trace.note("render", "cache hit")
+                renderer.set(key, cached)
+            else:
+                trace.note("render", "background")
+                renderer.request(
+                    key, render_job, cache, data, key, bool(trace), preview=live_preview(data, trace)
+                )
 
-            with btn_col2:
-                if png_data:
-                    st.download_button(
-                        "Export diagram as .png",
-                        png_data,
-                        "albura_tree.png",
-                        "image/png",
-                        use_container_width=True,
+        with btn_col2:
+            # Files are only produced when a button is clicked, once per diagram revision
+            with st.popover("Export diagram", use_container_width=True):
+                formats = ["svg", "png", "pdf", "eps"] if export_available() else ["svg"]
+                dpi = 300
+                if "png" in formats:
+                    dpi = st.select_slider(
+                        "PNG resolution (dpi)", options=[150, 300, 600], value=300, key=get_key("export_dpi")
                     )
-                else:
+                for fmt in formats:
                     st.download_button(
-                        "Export diagram as .svg",
-                        svg_code,
-                        "albura_tree.svg",
-                        "image/svg+xml",
+                        f"Download .{fmt}",
+                        functools.partial(export_file, renderer, fmt, dpi, bool(trace)),
+                        f"albura_tree.{fmt}",
+                        MIME_TYPES[fmt],
+                        on_click="ignore",
                         use_container_width=True,
+                        key=f"export_{fmt}",
                     )
+                if formats == ["svg"]:
+                    st.caption("PNG, PDF and EPS need the cairo library on the server.")
+
+        refine_args = (cache, data, key, bool(trace))
+        state = settle_render(renderer, refine_args, FIRST_PAINT_WAIT)
+        if trace:
+            st.session_state["rerun_trace"] = trace
+        if state.updating or state.refining:
+            polling_diagram_view(renderer, refine_args)
+        else:
+            diagram_view(renderer, refine_args)
+
+    else:
+        st.info("Fill in the data to begin, or load a previous .albura diagram to continue editing")
+        if trace:
+            show_trace(trace)
+
+
+main_c1, main_c2 = st.columns([1, 3])
+
+with main_c1:
+    load_section()
+
+    st.subheader("Constituents")
+    nucleus_section()
+    arguments_section()
+    topics_section()
+    extra_core_section()
+
+    st.subheader("Operators")
+    realizations_section()
+    operators_section()
+
+    st.markdown("---")
+
+    h1, h2 = st.columns([0.9, 0.1])
+    with h1:
+        st.page_link("pages/01_User_Manual.py", label="User Manual", icon="📘")
 
-            svg_view = re.sub(r'(width|height)="[^"]*"', "", svg_code)
-
-            html_content = f"""
-            <div style="border: 1px solid #e0e0e0; border-radius: 8px;
-                        padding: 10px; background-color: white;
-                        box-sizing: border-box;">
-                <div style="width: 100%; height: 700px; overflow: auto;
-                            display: flex; justify-content: center;
-                            align-items: flex-start; padding-top: 20px;">
-                    <style>
-                        svg {{
-                            height: auto;
-                            max-height: 700px;
-                        }}
-                        text {{
-                            font-family: Helvetica, Arial, sans-serif !important;
-                        }}
-                    </style>
-                    {svg_view}
-                </div>
+    st.markdown("---")
+
+    # Footer: logo cgv.tools + badge CC en la misma línea, firma debajo
+    try:
+        cgv_data = load_image_base64("cgv-tools.png")
+        cc_data = load_image_base64("cc_icon.png")
+        st.markdown(
+            f'''
+            <div style="display: flex; align-items: center; justify-content: center; gap: 18px; margin-top: 8px;">
+                <a href="https://cgv.tools" target="_blank">
+                    <img src="data:image/png;base64,{cgv_data}" alt="cgv.tools" height="22" style="opacity: 0.85;">
+                </a>
+                <a href="https://creativecommons.org/licenses/by-nc-nd/4.0/" target="_blank">
+                    <img src="data:image/png;base64,{cc_data}" alt="CC BY-NC-ND 4.0" height="28">
+                </a>
             </div>
-            """
-            components.html(html_content, height=780, scrolling=False)
+            <p style="text-align: center; color: #6c757d; font-size: 0.85rem; margin-top: 10px;">
+                Carlos González Vergara (<strong>cgonzalv@uc.cl</strong>)
+            </p>
+            ''',
+            unsafe_allow_html=True,
+        )
+    except Exception:
+        st.caption("by Carlos González Vergara (__cgonzalv@uc.cl__)")
+        st.markdown("[cgv.tools](https://cgv.tools) · [CC BY-NC-ND 4.0](https://creativecommons.org/licenses/by-nc-nd/4.0/)")
 
-        except Exception as e:
-            st.error(f"Technical error: {e}")
+with main_c2:
+    diagram_panel()
 
-    else:
-        st.info("Fill in the data to begin, or load a previous .albura diagram to continue editing")
\ No newline at end of file
+# Every widget now holds its loaded value, so the loaded diagram can go
+st.session_state["loaded_data"] = None
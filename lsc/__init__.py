@@ -0,0 +1,16 @@
+"""Rendering core for Albura (RRG Layered Structure of the Clause diagrams).
+
+This package has no Streamlit dependency. Heavy imports (graphviz, cairo)
+are deferred until the first render::
+
+    import lsc
+    svg = lsc.render(data)              # str
+    png = lsc.render(data, "png", 300)  # bytes
+"""
+
+
+def render(data, fmt="svg", dpi=300):
+    """Render an .albura ``data`` dict to "svg" (str), "png", "pdf" or "eps" (bytes)."""
+    from lsc.render import render as _render
+
+    return _render(data, fmt, dpi)
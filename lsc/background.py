@@ -0,0 +1,151 @@
+"""Stale-while-revalidate rendering on the shared render scheduler."""
+import threading
+from concurrent.futures import wait
+
+
+class RenderState:
+    """Snapshot of a session's renders: last good value and what is in flight.
+
+    ``updating``: a newer request is rendering. ``refining``: a better
+    version of the current value is rendering (see ``BackgroundRenderer.refine``).
+    """
+
+    __slots__ = ("value", "key", "updating", "error", "refining")
+
+    def __init__(self, value, key, updating, error, refining=False):
+        self.value = value
+        self.key = key
+        self.updating = updating
+        self.error = error
+        self.refining = refining
+
+
+class BackgroundRenderer:
+    """One session's view of its background renders.
+
+    ``request`` submits a render for a content key and returns at once;
+    ``poll`` reports the last good result plus whether a newer one is on its
+    way, so the previous diagram stays on screen while the next is laid out.
+    Only the newest request matters: a new key cancels the previous job if it
+    has not started yet, and results of superseded jobs are dropped.
+
+    Jobs go through a ``lsc.scheduler.RenderScheduler`` shared by every
+    session; ``session`` is this session's fairness token there (the
+    renderer itself by default).
+
+    ``refine`` upgrades the current result in place (e.g. a draft layout to
+    the full one) without taking it off screen; the upgrade is dropped if a
+    new request comes first.
+    """
+
+    def __init__(self, scheduler, session=None):
+        self._scheduler = scheduler
+        self._session = self if session is None else session
+        self._lock = threading.Lock()
+        self._key = None
+        self._future = None
+        self._good_key = None
+        self._good = None
+        self._error = None
+        self._refine = None
+        self._refined_key = None
+
+    @property
+    def scheduler(self):
+        """The (shared) scheduler the renders run on."""
+        return self._scheduler
+
+    @property
+    def key(self):
+        """Key of the newest request (rendered or still in flight)."""
+        return self._key
+
+    def request(self, key, render, *args, preview=None):
+        """Render ``render(*args)`` in the background unless ``key`` is already the newest.
+
+        ``key`` must identify the result: another session's in-flight job
+        with the same key is shared rather than run twice. A ``preview``
+        (e.g. a fast approximate layout) is shown for ``key`` until the
+        render lands; it is kept if the render fails.
+        """
+        with self._lock:
+            if key == self._key:
+                return
+            if self._future is not None:
+                self._future.cancel()
+            self._cancel_refine()
+            self._key = key
+            self._error = None
+            if preview is not None:
+                self._good_key, self._good = key, preview
+            self._future = self._scheduler.submit(self._session, key, render, *args)
+
+    def refine(self, key, render, *args):
+        """Render a better version of the current result, once per ``key``.
+
+        Ignored unless ``key`` is the newest request and its result has
+        landed. The current value stays until ``render(*args)`` succeeds;
+        if it fails, the current value is kept and the error is not reported.
+        """
+        with self._lock:
+            self._collect()
+            if key != self._key or key != self._good_key or self._future is not None or key == self._refined_key:
+                return
+            self._refined_key = key
+            self._refine = self._scheduler.submit(self._session, ("refine", key), render, *args)
+
+    def set(self, key, value):
+        """Record a result obtained without rendering (e.g. a cache hit)."""
+        with self._lock:
+            if self._future is not None:
+                self._future.cancel()
+                self._future = None
+            self._cancel_refine()
+            self._key = self._good_key = key
+            self._good = value
+            self._error = None
+
+    def poll(self, timeout=0):
+        """Return a ``RenderState``, first waiting up to ``timeout`` seconds for the newest job."""
+        future = self._future
+        if timeout and future is not None:
+            wait([future], timeout)
+        with self._lock:
+            self._collect()
+            return RenderState(
+                self._good, self._good_key, self._future is not None, self._error, self._refine is not None
+            )
+
+    def latest(self, timeout=None):
+        """Wait for the newest job (and its refinement), then return the last good value."""
+        future = self._future
+        if future is not None:
+            wait([future], timeout)
+            self.poll()
+        refine = self._refine
+        if refine is not None:
+            wait([refine], timeout)
+        return self.poll().value
+
+    def _cancel_refine(self):
+        if self._refine is not None:
+            self._refine.cancel()
+            self._refine = None
+
+    def _collect(self):
+        refine = self._refine
+        if refine is not None and refine.done():
+            self._refine = None
+            if not refine.cancelled() and refine.exception() is None and self._good_key == self._refined_key:
+                self._good = refine.result()
+        future = self._future
+        if future is None or not future.done():
+            return
+        self._future = None
+        if future.cancelled():
+            return
+        error = future.exception()
+        if error is not None:
+            self._error = error
+        else:
+            self._good_key, self._good = self._key, future.result()
@@ -0,0 +1,153 @@
+"""Headless batch renderer for .albura files.
+
+Usage::
+
+    python -m lsc.batch diagrams/ -o out/ -f svg png pdf eps -j 4
+    python -m lsc.batch "corpus/**/*.albura" --dpi 600
+
+Inputs may be .albura files, directories (searched for ``*.albura``) or glob
+patterns. Outputs that are newer than their source file are skipped unless
+``--force`` is given.
+"""
+import argparse
+import glob
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+from lsc.export import FORMATS, export_drawing
+from lsc.render import render_drawing
+
+
+def collect_inputs(patterns):
+    """Expand files, directories and glob patterns into a sorted list of paths."""
+    found = set()
+    for pattern in patterns:
+        path = Path(pattern)
+        if path.is_dir():
+            found.update(path.rglob("*.albura"))
+        elif path.is_file():
+            found.add(path)
+        else:
+            found.update(Path(p) for p in glob.glob(pattern, recursive=True) if Path(p).is_file())
+    return sorted(found)
+
+
+def output_path(src, fmt, out_dir=None):
+    base = Path(out_dir) if out_dir else src.parent
+    return base / f"{src.stem}.{fmt}"
+
+
+def is_up_to_date(src, dst):
+    try:
+        return dst.stat().st_mtime >= src.stat().st_mtime
+    except FileNotFoundError:
+        return False
+
+
+def render_file(src, targets, dpi=300):
+    """Render one .albura file to each ``(fmt, path)`` in ``targets``.
+
+    Runs in worker processes, so it only takes and returns plain values.
+    Returns the list of paths written.
+    """
+    with open(src, encoding="utf-8") as f:
+        data = json.load(f)
+
+    drawing = render_drawing(data)
+
+    written = []
+    for fmt, dst in targets:
+        dst = Path(dst)
+        dst.parent.mkdir(parents=True, exist_ok=True)
+        payload = export_drawing(drawing, fmt, dpi)
+        if isinstance(payload, str):
+            dst.write_text(payload, encoding="utf-8")
+        else:
+            dst.write_bytes(payload)
+        written.append(str(dst))
+    return written
+
+
+def plan(sources, formats, out_dir=None, force=False):
+    """Return ``[(src, [(fmt, dst), ...]), ...]`` for sources needing work, plus a skip count."""
+    jobs = []
+    skipped = 0
+    for src in sources:
+        targets = []
+        for fmt in formats:
+            dst = output_path(src, fmt, out_dir)
+            if force or not is_up_to_date(src, dst):
+                targets.append((fmt, str(dst)))
+        if targets:
+            jobs.append((str(src), targets))
+        else:
+            skipped += 1
+    return jobs, skipped
+
+
+def run(sources, formats, out_dir=None, jobs=None, dpi=300, force=False, log=print):
+    """Render ``sources`` and return a summary dict (counts, elapsed, throughput)."""
+    work, skipped = plan(sources, formats, out_dir, force)
+    rendered = 0
+    failed = []
+
+    start = time.perf_counter()
+    if jobs == 1 or len(work) <= 1:
+        for src, targets in work:
+            try:
+                render_file(src, targets, dpi)
+                rendered += 1
+            except Exception as e:
+                failed.append(src)
+                log(f"FAILED {src}: {e}")
+    else:
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            futures = {pool.submit(render_file, src, targets, dpi): src for src, targets in work}
+            for future in as_completed(futures):
+                src = futures[future]
+                try:
+                    future.result()
+                    rendered += 1
+                except Exception as e:
+                    failed.append(src)
+                    log(f"FAILED {src}: {e}")
+    elapsed = time.perf_counter() - start
+
+    return {
+        "rendered": rendered,
+        "skipped": skipped,
+        "failed": len(failed),
+        "elapsed": elapsed,
+        "per_second": rendered / elapsed if elapsed > 0 else 0.0,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m lsc.batch", description="Render .albura files to SVG/PNG/PDF.")
+    parser.add_argument("inputs", nargs="+", help=".albura files, directories or glob patterns")
+    parser.add_argument("-o", "--out-dir", help="output directory (default: next to each input)")
+    parser.add_argument("-f", "--format", nargs="+", choices=FORMATS, default=["svg"], dest="formats")
+    parser.add_argument("-j", "--jobs", type=int, default=os.cpu_count(), help="worker processes (default: CPU count)")
+    parser.add_argument("--dpi", type=int, default=300, help="resolution for PNG output")
+    parser.add_argument("--force", action="store_true", help="re-render even if outputs are up to date")
+    args = parser.parse_args(argv)
+
+    sources = collect_inputs(args.inputs)
+    if not sources:
+        parser.error("no .albura files matched")
+
+    summary = run(sources, args.formats, args.out_dir, args.jobs, args.dpi, args.force)
+    print(
+        f"Rendered {summary['rendered']} diagram(s), skipped {summary['skipped']} up to date, "
+        f"{summary['failed']} failed in {summary['elapsed']:.2f}s "
+        f"({summary['per_second']:.1f} diagrams/s)"
+    )
+    return 1 if summary["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
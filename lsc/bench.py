@@ -0,0 +1,188 @@
+"""Per-stage rendering benchmark over synthetic documents.
+
+Usage::
+
+    python -m lsc.bench --sizes 1 2 4 8 16 --repeat 5 -o bench.jsonl
+    python -m lsc.bench --sizes 1 2 4 8 --ops-per-layer 8 --targets-per-op 3
+
+The document shape options of ``lsc.corpus`` (``--pre``, ``--post``,
+``--ops-per-layer``, ``--targets-per-op``, ``--excs``, ...) pin single
+dimensions while ``--sizes`` scales the rest; records then carry them
+under ``shape``.
+
+Each line of output is one JSON record per (size, stage) with timings in
+milliseconds and output sizes, so runs can be diffed to catch regressions.
+Stages: ``build`` (draw_lsc_tree), ``native`` (the graphviz-free preview
+layout of lsc.native_layout), ``layout`` (dot), ``postprocess``
+(operator links), ``viewbox`` (padding), ``finalize`` (the single-pass
+post-processor), ``layout_json`` (JSON-only dot run),
+``layout_split`` (the constituent and operator projections laid out as two
+graphs, as the app does), ``write`` (parsing and stitching those layouts
+and writing the SVG, as the app does), ``raster``
+(cairosvg PNG at 300 dpi, re-parsing the SVG) and ``paint_png``/``paint_pdf`` (the exporter painting
+straight from the layout).
+"""
+import argparse
+import json
+import platform
+import random
+import statistics
+import sys
+import time
+
+from lsc.corpus import add_shape_arguments, generate_document, scaled_params, shape_overrides
+from lsc.export import Drawing, export_drawing
+from lsc.geometry import parse_layout, stitch_layouts
+from lsc.graph import build_lsc_tree, draw_lsc_tree
+from lsc.layout import get_backend, layout
+from lsc.native_layout import native_layout
+from lsc.render import convert_svg
+from lsc.svg import expand_svg_viewbox, finalize_svg, postprocess_svg_with_connections
+
+
+def _time(fn, repeat):
+    timings = []
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        timings.append((time.perf_counter() - start) * 1000)
+    return result, timings
+
+
+def _record(size, stage, timings, **extra):
+    record = {
+        "size": size,
+        "stage": stage,
+        "runs": len(timings),
+        "min_ms": round(min(timings), 3),
+        "median_ms": round(statistics.median(timings), 3),
+        "max_ms": round(max(timings), 3),
+    }
+    record.update(extra)
+    return record
+
+
+def bench_document(data, size, repeat=5):
+    """Time every stage for one document; returns a list of records.
+
+    Stages after a failing one are reported with an ``error`` and skipped.
+    """
+    records = []
+
+    (graph, connections, _), timings = _time(lambda: draw_lsc_tree(data), repeat)
+    source = graph.source
+    records.append(_record(size, "build", timings, dot_chars=len(source), operator_links=len(connections)))
+
+    tree = build_lsc_tree(data)
+    native, timings = _time(lambda: native_layout(tree), repeat)
+    records.append(_record(size, "native", timings, nodes=len(native.nodes)))
+
+    try:
+        svg_bytes, timings = _time(lambda: layout(source, "svg"), repeat)
+    except Exception as e:
+        records.append({"size": size, "stage": "layout", "error": str(e)})
+        return records
+    svg_code = svg_bytes.decode("utf-8")
+    records.append(_record(size, "layout", timings, backend=get_backend().name, svg_bytes=len(svg_bytes)))
+
+    (linked, extra_left, extra_right), timings = _time(
+        lambda: postprocess_svg_with_connections(svg_code, connections, None), repeat
+    )
+    records.append(_record(size, "postprocess", timings, svg_bytes=len(linked.encode("utf-8"))))
+
+    padded, timings = _time(
+        lambda: expand_svg_viewbox(linked, max(10, extra_left), max(10, extra_right), 10, 10), repeat
+    )
+    records.append(_record(size, "viewbox", timings, svg_bytes=len(padded.encode("utf-8"))))
+
+    (final, _), timings = _time(lambda: finalize_svg(svg_code, connections, pad=10), repeat)
+    records.append(_record(size, "finalize", timings, svg_bytes=len(final.encode("utf-8"))))
+
+    try:
+        json_bytes, timings = _time(lambda: layout(source, "json"), repeat)
+    except Exception as e:
+        records.append({"size": size, "stage": "layout_json", "error": str(e)})
+        return records
+    records.append(_record(size, "layout_json", timings, json_bytes=len(json_bytes)))
+
+    split = [graph.source for graph in tree.split() if graph is not None]
+    try:
+        layouts, timings = _time(lambda: [layout(source, "json") for source in split], repeat)
+    except Exception as e:
+        records.append({"size": size, "stage": "layout_split", "error": str(e)})
+        return records
+    records.append(_record(size, "layout_split", timings, graphs=len(layouts)))
+
+    def write():
+        geometry = parse_layout(layouts[0])
+        for json_bytes in layouts[1:]:
+            geometry = stitch_layouts(geometry, parse_layout(json_bytes), tree.anchor)
+        return Drawing.from_layout(geometry, tree.connections, pad=10)
+
+    try:
+        drawing, timings = _time(write, repeat)
+    except Exception as e:
+        records.append({"size": size, "stage": "write", "error": str(e)})
+        return records
+    records.append(_record(size, "write", timings, svg_bytes=len(drawing.svg_code.encode("utf-8"))))
+
+    try:
+        png, timings = _time(lambda: convert_svg(final, "png", 300), repeat)
+    except Exception as e:
+        records.append({"size": size, "stage": "raster", "error": str(e)})
+        return records
+    records.append(_record(size, "raster", timings, png_bytes=len(png)))
+
+    for fmt in ("png", "pdf"):
+        try:
+            payload, timings = _time(lambda: export_drawing(drawing, fmt, 300), repeat)
+        except Exception as e:
+            records.append({"size": size, "stage": f"paint_{fmt}", "error": str(e)})
+            continue
+        records.append(_record(size, f"paint_{fmt}", timings, out_bytes=len(payload)))
+
+    return records
+
+
+def run(sizes, repeat=5, seed=0, pred_type="verbal", overrides=None):
+    """Benchmark one generated document per size; returns all records.
+
+    ``overrides`` replace single ``scaled_params`` entries (see ``lsc.corpus``).
+    """
+    overrides = overrides or {}
+    records = []
+    for size in sizes:
+        data = generate_document(random.Random(seed + size), **{**scaled_params(size, pred_type), **overrides})
+        for record in bench_document(data, size, repeat):
+            record["pred_type"] = pred_type
+            if overrides:
+                record["shape"] = overrides
+            records.append(record)
+    return records
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m lsc.bench", description="Benchmark Albura rendering stages.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1, 2, 4, 8, 16])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--pred-type", choices=["verbal", "copular"], default="verbal")
+    parser.add_argument("-o", "--out", help="write JSON lines here instead of stdout")
+    add_shape_arguments(parser)
+    args = parser.parse_args(argv)
+
+    meta = {"python": platform.python_version(), "platform": platform.platform(), "time": time.time()}
+    records = run(args.sizes, args.repeat, args.seed, args.pred_type, shape_overrides(args))
+
+    out = open(args.out, "a", encoding="utf-8") if args.out else sys.stdout
+    try:
+        for record in records:
+            out.write(json.dumps({**meta, **record}) + "\n")
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+
+if __name__ == "__main__":
+    main()
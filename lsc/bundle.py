@@ -0,0 +1,283 @@
+"""Indexed multi-diagram archive (``.albundle``).
+
+Usage::
+
+    python -m lsc.bundle pack corpus.albundle corpus/ more/*.albura
+    python -m lsc.bundle list corpus.albundle
+    python -m lsc.bundle extract corpus.albundle synthetic_02_00007 -o one.albura
+
+Layout: a fixed 24-byte header (magic, index offset, index length), the
+documents back to back as canonical compact JSON, then the index: one JSON
+array with id, sentence, predicate type, size, content hash and byte offset
+per document. The header points at the index, so a reader maps the file,
+decodes the index and slices out single documents without touching the
+rest. Appending writes the new documents and a fresh index after the old
+index, syncs them and only then patches the header, so the old index stays
+valid until the switch (its bytes are left behind as dead space).
+"""
+import argparse
+import hashlib
+import json
+import mmap
+import os
+import struct
+import sys
+from pathlib import Path
+
+from lsc.model import sentence_text
+
+MAGIC = b"ALBNDL\x00\x01"
+BUNDLE_SUFFIX = ".albundle"
+_HEADER = struct.Struct("<8sQQ")
+
+
+def is_bundle(content):
+    """True if ``content`` (bytes-like) starts like a bundle."""
+    return bytes(content[: len(MAGIC)]) == MAGIC
+
+
+def encode_document(data):
+    """Canonical bytes of a document; their SHA-256 equals ``lsc.cache.canonical_hash(data)``."""
+    return json.dumps(data, sort_keys=True, ensure_ascii=False, separators=(",", ":"), default=str).encode("utf-8")
+
+
+class BundleEntry:
+    """Index record for one document in a bundle."""
+
+    __slots__ = ("id", "sentence", "pred_type", "size", "sha256", "offset")
+
+    def __init__(self, id, sentence, pred_type, size, sha256, offset):
+        self.id = id
+        self.sentence = sentence
+        self.pred_type = pred_type
+        self.size = size
+        self.sha256 = sha256
+        self.offset = offset
+
+    def __repr__(self):
+        return f"BundleEntry({self.id!r}, {self.sentence!r})"
+
+    def to_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    @classmethod
+    def from_dict(cls, d):
+        return cls(d["id"], d.get("sentence", ""), d.get("pred_type", ""), d["size"], d["sha256"], d["offset"])
+
+
+def _read_index(buf):
+    if len(buf) < _HEADER.size:
+        raise ValueError("Not an Albura bundle (file too short)")
+    magic, index_offset, index_size = _HEADER.unpack_from(buf, 0)
+    if magic != MAGIC:
+        raise ValueError("Not an Albura bundle (bad magic)")
+    if index_offset + index_size > len(buf):
+        raise ValueError("Truncated Albura bundle (index out of range)")
+    raw = json.loads(bytes(buf[index_offset:index_offset + index_size]).decode("utf-8"))
+    return [BundleEntry.from_dict(d) for d in raw], index_offset
+
+
+class BundleReader:
+    """Random access to the documents of a bundle.
+
+    ``source`` is a path (memory-mapped) or a bytes-like object (e.g. an
+    upload). Only the index is decoded up front.
+    """
+
+    def __init__(self, source):
+        self._file = None
+        self._map = None
+        if isinstance(source, (str, os.PathLike)):
+            self._file = open(source, "rb")
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            self._buf = self._map
+        else:
+            self._buf = memoryview(source)
+        self.entries, _ = _read_index(self._buf)
+        self._by_id = {entry.id: entry for entry in self.entries}
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __iter__(self):
+        return iter(self.entries)
+
+    def __contains__(self, entry_id):
+        return entry_id in self._by_id
+
+    def __getitem__(self, entry_id):
+        return self._by_id[entry_id]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def ids(self):
+        return [entry.id for entry in self.entries]
+
+    def read_bytes(self, entry_id, verify=False):
+        """Raw canonical JSON of one document."""
+        entry = self._by_id[entry_id]
+        raw = bytes(self._buf[entry.offset:entry.offset + entry.size])
+        if verify and hashlib.sha256(raw).hexdigest() != entry.sha256:
+            raise ValueError(f"Bundle entry {entry_id!r} is corrupted (hash mismatch)")
+        return raw
+
+    def load(self, entry_id, verify=False):
+        """Decode one document into an .albura data dict."""
+        return json.loads(self.read_bytes(entry_id, verify).decode("utf-8"))
+
+    def close(self):
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        self._buf = None
+
+
+class BundleWriter:
+    """Create a bundle or append to an existing one.
+
+    Documents are streamed to disk after the current index as they are
+    added; the new index is written by ``close()`` (or on leaving a
+    ``with`` block) and the header is switched over to it last. Until then
+    the file on disk still holds the previous index and stays readable,
+    also if the writer is interrupted.
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        if self.path.exists() and self.path.stat().st_size > 0:
+            self._file = open(self.path, "r+b")
+            head = self._file.read(_HEADER.size)
+            magic, index_offset, index_size = _HEADER.unpack(head)
+            if magic != MAGIC:
+                self._file.close()
+                raise ValueError(f"{self.path} is not an Albura bundle")
+            self._file.seek(index_offset)
+            raw = json.loads(self._file.read(index_size).decode("utf-8"))
+            self.entries = [BundleEntry.from_dict(d) for d in raw]
+            self._end = index_offset + index_size
+        else:
+            self._file = open(self.path, "w+b")
+            empty = b"[]"
+            self._file.write(_HEADER.pack(MAGIC, _HEADER.size, len(empty)) + empty)
+            self.entries = []
+            self._end = _HEADER.size + len(empty)
+        self._ids = {entry.id for entry in self.entries}
+        self._file.seek(self._end)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def add(self, entry_id, data):
+        """Append one document; raises ValueError if ``entry_id`` is taken."""
+        if entry_id in self._ids:
+            raise ValueError(f"Duplicate bundle entry id {entry_id!r}")
+        raw = encode_document(data)
+        entry = BundleEntry(
+            entry_id,
+            sentence_text(data),
+            data.get("pred_type", "") if isinstance(data, dict) else "",
+            len(raw),
+            hashlib.sha256(raw).hexdigest(),
+            self._end,
+        )
+        self._file.write(raw)
+        self._end += len(raw)
+        self.entries.append(entry)
+        self._ids.add(entry_id)
+        return entry
+
+    def _sync(self):
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def close(self):
+        if self._file is None:
+            return
+        index = json.dumps([entry.to_dict() for entry in self.entries], ensure_ascii=False).encode("utf-8")
+        self._file.seek(self._end)
+        self._file.write(index)
+        self._file.truncate()
+        self._sync()
+        # The header is switched to the new index only once it is on disk
+        self._file.seek(0)
+        self._file.write(_HEADER.pack(MAGIC, self._end, len(index)))
+        self._sync()
+        self._file.close()
+        self._file = None
+
+
+def pack(out, sources, skip_existing=False):
+    """Append .albura files to the bundle ``out``; ids are the file stems.
+
+    Returns ``(added, skipped)`` counts.
+    """
+    added = skipped = 0
+    with BundleWriter(out) as writer:
+        existing = {entry.id for entry in writer.entries}
+        for src in sources:
+            src = Path(src)
+            if src.stem in existing:
+                if skip_existing:
+                    skipped += 1
+                    continue
+                raise ValueError(f"{out} already has an entry {src.stem!r}")
+            with open(src, encoding="utf-8") as f:
+                writer.add(src.stem, json.load(f))
+            existing.add(src.stem)
+            added += 1
+    return added, skipped
+
+
+def main(argv=None):
+    from lsc.batch import collect_inputs
+
+    parser = argparse.ArgumentParser(prog="python -m lsc.bundle", description="Pack and read Albura corpus bundles.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_pack = sub.add_parser("pack", help="append .albura files to a bundle (created if missing)")
+    p_pack.add_argument("bundle")
+    p_pack.add_argument("inputs", nargs="+", help=".albura files, directories or glob patterns")
+    p_pack.add_argument("--skip-existing", action="store_true", help="skip ids already in the bundle")
+
+    p_list = sub.add_parser("list", help="print the index")
+    p_list.add_argument("bundle")
+
+    p_extract = sub.add_parser("extract", help="write one entry as an .albura file")
+    p_extract.add_argument("bundle")
+    p_extract.add_argument("id")
+    p_extract.add_argument("-o", "--out", help="output path (default: <id>.albura)")
+
+    args = parser.parse_args(argv)
+
+    if args.command == "pack":
+        added, skipped = pack(args.bundle, collect_inputs(args.inputs), args.skip_existing)
+        print(f"Added {added} documents to {args.bundle}" + (f" ({skipped} skipped)" if skipped else ""))
+        return 0
+
+    with BundleReader(args.bundle) as reader:
+        if args.command == "list":
+            for entry in reader:
+                print(f"{entry.id}\t{entry.pred_type}\t{entry.size}\t{entry.sentence}")
+            return 0
+        if args.id not in reader:
+            print(f"No entry {args.id!r} in {args.bundle}", file=sys.stderr)
+            return 1
+        data = reader.load(args.id, verify=True)
+    out = Path(args.out or f"{args.id}.albura")
+    out.write_text(json.dumps(data, ensure_ascii=False, indent=2), encoding="utf-8")
+    print(f"Wrote {out}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
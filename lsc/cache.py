@@ -0,0 +1,94 @@
+"""Content-addressed LRU cache for rendered diagrams."""
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+
+_MISSING = object()
+
+
+def canonical_hash(data):
+    """Return a stable SHA-256 hex digest for a JSON-like ``data`` dict.
+
+    Keys are sorted and separators fixed, so two dicts with the same content
+    always hash the same regardless of insertion order.
+    """
+    payload = json.dumps(
+        data,
+        sort_keys=True,
+        ensure_ascii=False,
+        separators=(",", ":"),
+        default=str,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class RenderCache:
+    """Thread-safe, bounded LRU cache with hit/miss counters.
+
+    A single instance is meant to be shared by every session of the app, so
+    all bookkeeping happens under one lock. Rendering itself runs outside the
+    lock; two sessions missing on the same key at once may both render, and
+    the last one wins.
+    """
+
+    def __init__(self, maxsize=256):
+        if maxsize < 1:
+            raise ValueError("maxsize must be at least 1")
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._entries
+
+    def get(self, key, default=None):
+        with self._lock:
+            value = self._entries.get(key, _MISSING)
+            if value is _MISSING:
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def get_or_render(self, key, render):
+        """Return the cached value for ``key``, calling ``render()`` on a miss.
+
+        Exceptions raised by ``render`` propagate and nothing is cached.
+        """
+        value = self.get(key, _MISSING)
+        if value is not _MISSING:
+            return value
+        value = render()
+        self.put(key, value)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self):
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+            }
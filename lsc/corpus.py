@@ -0,0 +1,208 @@
+"""Synthetic .albura document generator for benchmarks and load tests.
+
+Usage::
+
+    python -m lsc.corpus -n 200 --size 4 -o corpus/
+    python -m lsc.corpus -n 50 --size 2 --pre 12 --ops-per-layer 6 -o wide/
+
+Documents follow the same schema the editor saves, including morphological
+(Affix/Clitic) arguments, peripheries, extra-core slots, realization forms
+and operators with targets.
+"""
+import argparse
+import json
+import random
+from pathlib import Path
+
+from lsc.model import LAYER_OPERATORS
+
+_SYLLABLES = ["ka", "lu", "mi", "to", "ra", "ne", "si", "po", "da", "wu", "xe", "qa"]
+_PERIPHERIES = ["Peri-Nuc", "Peri-Core", "Peri-Clause"]
+_SLOTS = ("prdp", "prcs", "pocs", "podp")
+
+
+def _word(rng, syllables=2):
+    return "".join(rng.choice(_SYLLABLES) for _ in range(syllables))
+
+
+def _empty_slot():
+    return {"label": "XP", "text": "", "pos": ""}
+
+
+def _item(rng, morph_ratio):
+    roll = rng.random()
+    item = {
+        "label": rng.choice(["RP", "PP"]),
+        "text": _word(rng, rng.randint(1, 3)),
+        "pos": rng.choice(["", "N", "PRO"]),
+        "conn_type": "Arg",
+        "arg_type": "Syntactic",
+        "morph_form": None,
+    }
+    if roll < morph_ratio:
+        morph_form = rng.choice(["Affix", "Clitic"])
+        item.update(
+            label="AFF" if morph_form == "Affix" else "CL",
+            text="-" + _word(rng, 1),
+            pos="",
+            arg_type="Morphological",
+            morph_form=morph_form,
+        )
+    elif roll > 0.7:
+        item.update(label=rng.choice(["PP", "ADV"]), conn_type=rng.choice(_PERIPHERIES), arg_type=None)
+    return item
+
+
+def generate_document(
+    rng=None,
+    *,
+    pred_type="verbal",
+    n_pre=1,
+    n_post=1,
+    n_between=0,
+    ops_per_layer=1,
+    targets_per_op=1,
+    n_excs=0,
+    n_real=0,
+    morph_ratio=0.3,
+    slots=("prcs",),
+):
+    """Return a random, valid .albura ``data`` dict.
+
+    ``n_between`` only applies to copular (``pred_type="copular"``) documents.
+    ``slots`` lists which of PrDP/PrCS/PoCS/PoDP are filled.
+    """
+    rng = rng or random.Random()
+
+    data = {slot: _empty_slot() for slot in _SLOTS}
+    data.update(
+        pred_type=pred_type,
+        nucleus={"text": "", "pos": ""},
+        copula={"text": "", "pos": ""},
+        attribute={"text": "", "pos": ""},
+        items_between=[],
+        items_pre=[_item(rng, morph_ratio) for _ in range(n_pre)],
+        items_post=[_item(rng, morph_ratio) for _ in range(n_post)],
+        operators=[],
+        realization_forms=[],
+        extra_core_slots=[],
+    )
+
+    if pred_type == "verbal":
+        data["nucleus"] = {"text": _word(rng, 2), "pos": rng.choice(["", "V"])}
+        refs = ["nucleus"]
+    else:
+        data["copula"] = {"text": _word(rng, 1), "pos": rng.choice(["", "V"])}
+        data["attribute"] = {"text": _word(rng, 3), "pos": rng.choice(["", "ADJ"])}
+        data["items_between"] = [_item(rng, morph_ratio) for _ in range(n_between)]
+        refs = ["copula", "attribute"]
+
+    for key, prefix in (("items_pre", "pre"), ("items_between", "between"), ("items_post", "post")):
+        refs.extend(f"{prefix}_{i}" for i in range(len(data[key])))
+
+    for slot in slots:
+        data[slot] = {"label": rng.choice(["RP", "PP"]), "text": _word(rng, 2), "pos": ""}
+        refs.append(slot)
+
+    for i in range(n_excs):
+        data["extra_core_slots"].append(
+            {
+                "label": "RP",
+                "text": _word(rng, 2),
+                "pos": rng.choice(["", "N"]),
+                "position": rng.choice(["left", "right"]),
+                "reference": rng.choice(refs),
+            }
+        )
+        refs.append(f"excs_{i}")
+
+    targets = list(refs)
+    for i in range(n_real):
+        data["realization_forms"].append(
+            {"text": "-" + _word(rng, 1), "position": rng.choice(["left", "right"]), "reference": rng.choice(targets)}
+        )
+        targets.append(f"real_{i}")
+
+    for layer, names in LAYER_OPERATORS.items():
+        for _ in range(ops_per_layer):
+            data["operators"].append(
+                {
+                    "operator": rng.choice(names),
+                    "value": _word(rng, 1).upper(),
+                    "layer": layer,
+                    "side": rng.choice(["Right", "Left"]),
+                    "targets": rng.sample(targets, min(targets_per_op, len(targets))),
+                }
+            )
+
+    return data
+
+
+def scaled_params(size, pred_type="verbal"):
+    """Generator parameters that grow every dimension linearly with ``size``."""
+    return {
+        "pred_type": pred_type,
+        "n_pre": size,
+        "n_post": size,
+        "n_between": size if pred_type == "copular" else 0,
+        "ops_per_layer": size,
+        "targets_per_op": min(size, 3),
+        "n_excs": size // 2,
+        "n_real": size,
+        "slots": _SLOTS[: min(size, len(_SLOTS))],
+    }
+
+
+def add_shape_arguments(parser):
+    """Add one CLI option per ``generate_document`` dimension (overriding ``--size``)."""
+    group = parser.add_argument_group("document shape", "override single dimensions of the --size scaling")
+    group.add_argument("--pre", dest="n_pre", type=int, help="items before the nucleus")
+    group.add_argument("--post", dest="n_post", type=int, help="items after the nucleus")
+    group.add_argument("--between", dest="n_between", type=int, help="items between copula and attribute")
+    group.add_argument("--ops-per-layer", type=int, help="operators on each of NUC/CORE/CLAUSE")
+    group.add_argument("--targets-per-op", type=int, help="connections from each operator")
+    group.add_argument("--excs", dest="n_excs", type=int, help="extra-core slots")
+    group.add_argument("--real", dest="n_real", type=int, help="realization forms")
+    group.add_argument("--morph-ratio", type=float, help="share of Affix/Clitic arguments")
+    group.add_argument("--slots", nargs="*", choices=_SLOTS, help="detached and clause-level slots to fill")
+
+
+def shape_overrides(args):
+    """The ``generate_document`` keyword arguments given on the command line."""
+    names = ("n_pre", "n_post", "n_between", "ops_per_layer", "targets_per_op", "n_excs", "n_real", "morph_ratio", "slots")
+    overrides = {name: getattr(args, name) for name in names if getattr(args, name, None) is not None}
+    if "slots" in overrides:
+        overrides["slots"] = tuple(overrides["slots"])
+    return overrides
+
+
+def generate_corpus(count, size=2, seed=0, **overrides):
+    """Yield ``count`` documents of the given ``size``, alternating predicate types.
+
+    ``overrides`` replace single ``scaled_params`` entries (e.g. ``n_pre=10``).
+    """
+    rng = random.Random(seed)
+    for i in range(count):
+        pred_type = "verbal" if i % 2 == 0 else "copular"
+        yield generate_document(rng, **{**scaled_params(size, pred_type), **overrides})
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m lsc.corpus", description="Write synthetic .albura documents.")
+    parser.add_argument("-n", "--count", type=int, default=100)
+    parser.add_argument("--size", type=int, default=2, help="scales items, operators, slots and forms")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("-o", "--out-dir", default="corpus")
+    add_shape_arguments(parser)
+    args = parser.parse_args(argv)
+
+    out_dir = Path(args.out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    for i, data in enumerate(generate_corpus(args.count, args.size, args.seed, **shape_overrides(args))):
+        path = out_dir / f"synthetic_{args.size:02d}_{i:05d}.albura"
+        path.write_text(json.dumps(data, ensure_ascii=False, indent=2), encoding="utf-8")
+    print(f"Wrote {args.count} documents to {out_dir}")
+
+
+if __name__ == "__main__":
+    main()
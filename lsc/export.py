@@ -0,0 +1,370 @@
+"""Multi-format export (SVG, PDF, EPS, PNG) from one layout.
+
+A render produces a ``Drawing``: the final SVG plus the layout geometry and
+operator-link paths it was written from. PDF, EPS and PNG are painted
+straight from that geometry with cairo (``cairocffi``, which cairosvg
+already depends on), so exporting never re-parses the SVG. Drawings that
+only have SVG (graphviz's own SVG writer was used) go through cairosvg.
+
+``Exporter`` runs exports on worker threads (or on the app's render
+scheduler) and caches one result per (diagram revision, format, dpi): each
+format is produced at most once per revision, and nothing is produced
+until it is asked for.
+"""
+import functools
+import io
+import math
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from lsc.svg import LINK_STYLE
+from lsc.svgwriter import BOLD, FONT_FAMILIES, ITALIC, SUBSCRIPT, SUPERSCRIPT, route_links, view_box, write_svg
+
+FORMATS = ("svg", "png", "pdf", "eps")
+MIME_TYPES = {
+    "svg": "image/svg+xml",
+    "png": "image/png",
+    "pdf": "application/pdf",
+    "eps": "application/postscript",
+}
+# Formats whose output does not depend on the dpi
+VECTOR_FORMATS = ("svg", "pdf", "eps")
+
+_NAMED_COLORS = {
+    "black": (0.0, 0.0, 0.0, 1.0),
+    "white": (1.0, 1.0, 1.0, 1.0),
+    "gray": (0.5, 0.5, 0.5, 1.0),
+    "grey": (0.5, 0.5, 0.5, 1.0),
+    "transparent": (0.0, 0.0, 0.0, 0.0),
+    "none": (0.0, 0.0, 0.0, 0.0),
+}
+
+
+def check_format(fmt):
+    if fmt not in FORMATS:
+        raise ValueError(f"Unsupported format {fmt!r}; expected one of {', '.join(FORMATS)}")
+
+
+class Drawing:
+    """One render result: the final SVG and, when available, the layout it was written from.
+
+    ``draft`` marks a draft-preset layout (see ``lsc.render.render_within_budget``);
+    ``engine`` is "dot" or "native" (see ``lsc.render.render_preview``).
+    ``stages`` holds the trace records of the render that produced it, if
+    it was traced on a worker thread (see ``with_stages``).
+    """
+
+    __slots__ = ("svg_code", "svg_view", "layout", "link_paths", "view_box", "draft", "engine", "stages")
+
+    def __init__(
+        self, svg_code, svg_view, layout=None, link_paths=(), view_box=None, draft=False, engine="dot", stages=()
+    ):
+        self.svg_code = svg_code
+        self.svg_view = svg_view
+        self.layout = layout
+        self.link_paths = tuple(link_paths)
+        self.view_box = view_box
+        self.draft = draft
+        self.engine = engine
+        self.stages = tuple(stages)
+
+    def with_stages(self, stages):
+        """Copy of this drawing carrying ``stages`` (shared cached drawings stay untouched)."""
+        return Drawing(
+            self.svg_code, self.svg_view, self.layout, self.link_paths, self.view_box, self.draft, self.engine, stages
+        )
+
+    @classmethod
+    def from_layout(cls, layout, connections, pad=10, draft=False, engine="dot"):
+        """Route the operator ``connections`` over ``layout`` and write the SVG once."""
+        paths, extra_left, extra_right = route_links(layout, connections)
+        svg_code, svg_view = write_svg(layout, paths, pad, extra_left, extra_right)
+        box = view_box(layout, pad, extra_left, extra_right)
+        return cls(svg_code, svg_view, layout, paths, box, draft, engine)
+
+
+@functools.lru_cache(maxsize=1)
+def _cairo():
+    """The cairocffi module, or ``None`` if it (or the cairo library) cannot be loaded."""
+    try:
+        import cairocffi
+    except (ImportError, OSError):
+        return None
+    return cairocffi
+
+
+def export_available():
+    """True if PNG/PDF/EPS can be produced (the cairo library is installed)."""
+    return _cairo() is not None
+
+
+def _rgba(color):
+    if not color:
+        return _NAMED_COLORS["none"]
+    if color.startswith("#") and len(color) in (7, 9):
+        r, g, b = (int(color[i:i + 2], 16) / 255 for i in (1, 3, 5))
+        a = int(color[7:9], 16) / 255 if len(color) == 9 else 1.0
+        return r, g, b, a
+    return _NAMED_COLORS.get(color.lower(), _NAMED_COLORS["black"])
+
+
+def _path_points(d):
+    """Points of an ``M x,y L x,y ...`` link path."""
+    return [tuple(float(v) for v in token.split(",")) for token in d.split() if "," in token]
+
+
+class _CairoPainter:
+    """Interprets graphviz (x)draw operations onto a cairo context (see ``svgwriter._Painter``)."""
+
+    def __init__(self, ctx, cairo):
+        self.ctx = ctx
+        self.cairo = cairo
+        self.pen = "#000000"
+        self.fill = "#000000"
+        self.width = 1.0
+        self.dash = None
+        self.invisible = False
+        self.size = 14.0
+        self.face = "Times-Roman"
+        self.flags = 0
+
+    def _style(self, style):
+        if style.startswith("setlinewidth("):
+            self.width = float(style[len("setlinewidth("):-1])
+        elif style == "dashed":
+            self.dash = [5.0, 2.0]
+        elif style == "dotted":
+            self.dash = [1.0, 5.0]
+        elif style == "solid":
+            self.dash = None
+        elif style == "invis":
+            self.invisible = True
+
+    def _finish(self, filled):
+        ctx = self.ctx
+        if filled:
+            r, g, b, a = _rgba(self.fill)
+            if a:
+                ctx.set_source_rgba(r, g, b, a)
+                ctx.fill_preserve()
+        r, g, b, a = _rgba(self.pen)
+        if a:
+            ctx.set_source_rgba(r, g, b, a)
+            ctx.set_line_width(self.width)
+            ctx.set_dash(self.dash or [])
+            ctx.stroke()
+        ctx.new_path()
+
+    def paint(self, ops):
+        ctx = self.ctx
+        for op in ops:
+            kind = op.get("op")
+            if kind == "c":
+                self.pen = op.get("color", self.pen)
+            elif kind == "C":
+                self.fill = op.get("color", self.fill)
+            elif kind == "S":
+                self._style(op.get("style", ""))
+            elif kind == "F":
+                self.size = float(op.get("size", self.size))
+                self.face = op.get("face", self.face)
+            elif kind == "t":
+                self.flags = int(op.get("fontchar", 0))
+            elif self.invisible:
+                continue
+            elif kind in ("B", "b"):
+                pts = op["points"]
+                ctx.move_to(*pts[0])
+                for i in range(1, len(pts) - 2, 3):
+                    ctx.curve_to(*pts[i], *pts[i + 1], *pts[i + 2])
+                if kind == "b":
+                    ctx.close_path()
+                self._finish(kind == "b")
+            elif kind in ("P", "p", "L"):
+                pts = op["points"]
+                ctx.move_to(*pts[0])
+                for x, y in pts[1:]:
+                    ctx.line_to(x, y)
+                if kind != "L":
+                    ctx.close_path()
+                self._finish(kind == "P")
+            elif kind in ("E", "e"):
+                x, y, rx, ry = op["rect"]
+                ctx.save()
+                ctx.translate(x, y)
+                ctx.scale(rx or 1e-6, ry or 1e-6)
+                ctx.arc(0, 0, 1, 0, 2 * math.pi)
+                ctx.restore()
+                self._finish(kind == "E")
+            elif kind == "T":
+                self._text(op)
+
+    def _text(self, op):
+        cairo, ctx = self.cairo, self.ctx
+        text = op.get("text", "")
+        if not text:
+            return
+        family = FONT_FAMILIES.get(self.face, self.face).split(",")[0]
+        slant = cairo.FONT_SLANT_ITALIC if self.flags & ITALIC else cairo.FONT_SLANT_NORMAL
+        weight = cairo.FONT_WEIGHT_BOLD if self.flags & BOLD else cairo.FONT_WEIGHT_NORMAL
+        ctx.select_font_face(family, slant, weight)
+        ctx.set_font_size(self.size)
+
+        x, y = op["pt"]
+        advance = ctx.text_extents(text)[4]
+        align = op.get("align", "c")
+        if align == "c":
+            x -= advance / 2
+        elif align == "r":
+            x -= advance
+        if self.flags & SUBSCRIPT:
+            y += self.size * 0.3
+        elif self.flags & SUPERSCRIPT:
+            y -= self.size * 0.4
+
+        r, g, b, a = _rgba(self.pen)
+        ctx.set_source_rgba(r, g, b, a or 1.0)
+        ctx.move_to(x, y)
+        ctx.show_text(text)
+        ctx.new_path()
+
+
+def _paint_drawing(ctx, cairo, drawing):
+    vb_x, vb_y, vb_w, vb_h = drawing.view_box
+    ctx.translate(-vb_x, -vb_y)
+
+    ctx.rectangle(vb_x, vb_y, vb_w, vb_h)
+    ctx.set_source_rgb(1, 1, 1)
+    ctx.fill()
+
+    layout = drawing.layout
+    for edge in layout.edges:
+        if edge.invisible or not (edge.draw or edge.head_draw or edge.tail_draw):
+            continue
+        painter = _CairoPainter(ctx, cairo)
+        painter.paint(edge.draw)
+        painter.paint(edge.tail_draw)
+        painter.paint(edge.head_draw)
+
+    for node in layout.nodes.values():
+        _CairoPainter(ctx, cairo).paint(node.draw)
+
+    if drawing.link_paths:
+        ctx.set_source_rgba(*_rgba(LINK_STYLE["stroke"]))
+        ctx.set_line_width(float(LINK_STYLE["stroke-width"]))
+        ctx.set_dash([float(v) for v in LINK_STYLE["stroke-dasharray"].split(",")])
+        for d in drawing.link_paths:
+            points = _path_points(d)
+            ctx.move_to(*points[0])
+            for x, y in points[1:]:
+                ctx.line_to(x, y)
+            ctx.stroke()
+
+
+def _paint(drawing, fmt, dpi):
+    cairo = _cairo()
+    _, _, vb_w, vb_h = drawing.view_box
+    out = io.BytesIO()
+    if fmt == "png":
+        scale = dpi / 72
+        surface = cairo.ImageSurface(cairo.FORMAT_ARGB32, max(1, math.ceil(vb_w * scale)), max(1, math.ceil(vb_h * scale)))
+        ctx = cairo.Context(surface)
+        ctx.scale(scale, scale)
+        _paint_drawing(ctx, cairo, drawing)
+        surface.flush()
+        surface.write_to_png(out)
+        surface.finish()
+        return out.getvalue()
+
+    if fmt == "pdf":
+        surface = cairo.PDFSurface(out, vb_w, vb_h)
+    else:
+        surface = cairo.PSSurface(out, vb_w, vb_h)
+        surface.set_eps(True)
+    _paint_drawing(cairo.Context(surface), cairo, drawing)
+    surface.finish()
+    return out.getvalue()
+
+
+def _convert_svg(svg_code, fmt, dpi):
+    import cairosvg
+
+    convert = {"png": cairosvg.svg2png, "pdf": cairosvg.svg2pdf, "eps": cairosvg.svg2eps}[fmt]
+    return convert(bytestring=svg_code.encode("utf-8"), dpi=dpi)
+
+
+def export_drawing(drawing, fmt, dpi=300):
+    """Produce ``fmt`` from ``drawing``: str for "svg", bytes for "png"/"pdf"/"eps".
+
+    ``dpi`` only affects PNG. Raises ``OSError`` if the cairo library is missing.
+    """
+    check_format(fmt)
+    if fmt == "svg":
+        return drawing.svg_code
+    if drawing.layout is None or _cairo() is None:
+        return _convert_svg(drawing.svg_code, fmt, dpi)
+    return _paint(drawing, fmt, int(dpi))
+
+
+class Exporter:
+    """Export drawings on worker threads, caching one result per revision, format and dpi.
+
+    ``revision`` is any hashable key that changes when the diagram does (the
+    app uses the content hash). Failed jobs are evicted so the next request
+    retries them. With a ``scheduler`` (``lsc.scheduler.RenderScheduler``)
+    exports share its workers and fair queue with the renders instead of
+    using threads of their own.
+    """
+
+    def __init__(self, max_workers=2, maxsize=64, scheduler=None):
+        self.maxsize = maxsize
+        self.scheduler = scheduler
+        if scheduler is None:
+            self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="albura-export")
+        self._futures = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(revision, fmt, dpi):
+        return revision, fmt, None if fmt in VECTOR_FORMATS else int(dpi)
+
+    def submit(self, revision, drawing, fmt, dpi=300, session=None):
+        """Start (or reuse) the export of ``drawing`` to ``fmt`` and return its future.
+
+        ``session`` is the caller's fairness token on the scheduler.
+        """
+        check_format(fmt)
+        key = self.key(revision, fmt, dpi)
+        with self._lock:
+            future = self._futures.get(key)
+            if future is not None:
+                self._futures.move_to_end(key)
+                self.hits += 1
+                return future
+            self.misses += 1
+            if self.scheduler is None:
+                future = self._executor.submit(export_drawing, drawing, fmt, int(dpi))
+            else:
+                future = self.scheduler.submit(session, ("export",) + key, export_drawing, drawing, fmt, int(dpi))
+            self._futures[key] = future
+            while len(self._futures) > self.maxsize:
+                self._futures.popitem(last=False)
+        future.add_done_callback(functools.partial(self._evict_failed, key))
+        return future
+
+    def export(self, revision, drawing, fmt, dpi=300, timeout=None, session=None):
+        """Return ``fmt`` output for ``drawing``, waiting for the worker if needed."""
+        return self.submit(revision, drawing, fmt, dpi, session).result(timeout=timeout)
+
+    def _evict_failed(self, key, future):
+        if future.cancelled() or future.exception() is not None:
+            with self._lock:
+                if self._futures.get(key) is future:
+                    del self._futures[key]
+
+    def stats(self):
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "size": len(self._futures), "maxsize": self.maxsize}
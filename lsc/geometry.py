@@ -0,0 +1,267 @@
+"""Node and edge geometry from graphviz ``-Tjson`` output.
+
+Coordinates are converted to the frame of the SVG graph group that graphviz
+writes (x right, y down, i.e. ``(x, -y)`` of the layout), so they can be
+used directly for paths appended to that group.
+"""
+import json
+
+POINTS_PER_INCH = 72.0
+
+
+class TextRun:
+    """One ``T`` draw operation: a piece of label text at a baseline point."""
+
+    __slots__ = ("x", "y", "align", "width", "text", "size", "face", "flags")
+
+    def __init__(self, x, y, align, width, text, size, face, flags):
+        self.x = x
+        self.y = y
+        self.align = align
+        self.width = width
+        self.text = text
+        self.size = size
+        self.face = face
+        self.flags = flags
+
+    @property
+    def left(self):
+        if self.align == "l":
+            return self.x
+        if self.align == "r":
+            return self.x - self.width
+        return self.x - self.width / 2
+
+    def translated(self, dx, dy):
+        return TextRun(self.x + dx, self.y + dy, self.align, self.width, self.text, self.size, self.face, self.flags)
+
+
+class NodeGeometry:
+    """Laid-out node: center, size (points) and label text runs."""
+
+    __slots__ = ("name", "x", "y", "width", "height", "label", "runs", "draw")
+
+    def __init__(self, name, x, y, width, height, label="", runs=(), draw=()):
+        self.name = name
+        self.x = x
+        self.y = y
+        self.width = width
+        self.height = height
+        self.label = label
+        self.runs = list(runs)
+        self.draw = list(draw)
+
+    def translated(self, dx, dy):
+        return NodeGeometry(
+            self.name,
+            self.x + dx,
+            self.y + dy,
+            self.width,
+            self.height,
+            self.label,
+            [run.translated(dx, dy) for run in self.runs],
+            _shift_ops(self.draw, dx, dy),
+        )
+
+    def text_bbox(self):
+        """Bbox of the label text in the format used for operator-link routing.
+
+        Uses the exact text extents reported by graphviz; falls back to the
+        node box for nodes without text.
+        """
+        if not self.runs:
+            return {
+                "x": self.x,
+                "y": self.y,
+                "width": self.width,
+                "height": self.height,
+                "cx": self.x,
+                "cy": self.y,
+            }
+        left = min(run.left for run in self.runs)
+        right = max(run.left + run.width for run in self.runs)
+        baseline = self.runs[0].y
+        height = max(run.size for run in self.runs) + 3
+        return {
+            "x": left,
+            "y": baseline,
+            "width": right - left,
+            "height": height,
+            "cx": (left + right) / 2,
+            "cy": baseline - height * 0.35,
+        }
+
+
+class EdgeGeometry:
+    """Laid-out edge: endpoints by node name plus its draw operations."""
+
+    __slots__ = ("tail", "head", "draw", "head_draw", "tail_draw", "invisible")
+
+    def __init__(self, tail, head, draw=(), head_draw=(), tail_draw=(), invisible=False):
+        self.tail = tail
+        self.head = head
+        self.draw = list(draw)
+        self.head_draw = list(head_draw)
+        self.tail_draw = list(tail_draw)
+        self.invisible = invisible
+
+    def translated(self, dx, dy):
+        return EdgeGeometry(
+            self.tail,
+            self.head,
+            _shift_ops(self.draw, dx, dy),
+            _shift_ops(self.head_draw, dx, dy),
+            _shift_ops(self.tail_draw, dx, dy),
+            self.invisible,
+        )
+
+
+class Layout:
+    """Geometry of one laid-out graph."""
+
+    __slots__ = ("bb", "nodes", "edges", "draw")
+
+    def __init__(self, bb, nodes, edges, draw=()):
+        self.bb = bb
+        self.nodes = nodes
+        self.edges = edges
+        self.draw = list(draw)
+
+    @property
+    def width(self):
+        return self.bb[2] - self.bb[0]
+
+    @property
+    def height(self):
+        return self.bb[3] - self.bb[1]
+
+    def bbox_index(self, names=None):
+        """Map node name -> text bbox (see ``NodeGeometry.text_bbox``).
+
+        Restricted to ``names`` when given.
+        """
+        if names is None:
+            names = self.nodes
+        return {name: self.nodes[name].text_bbox() for name in names if name in self.nodes}
+
+
+def _point(text):
+    x, y = text.split(",")[:2]
+    return float(x), -float(y)
+
+
+def _flip_ops(ops):
+    """Copy draw operations with every y flipped into SVG orientation."""
+    flipped = []
+    for op in ops or ():
+        op = dict(op)
+        if "pt" in op:
+            op["pt"] = [op["pt"][0], -op["pt"][1]]
+        if "rect" in op:
+            x, y, w, h = op["rect"]
+            op["rect"] = [x, -y, w, h]
+        if "points" in op:
+            op["points"] = [[x, -y] for x, y in op["points"]]
+        flipped.append(op)
+    return flipped
+
+
+def _shift_ops(ops, dx, dy):
+    """Copy draw operations moved by ``(dx, dy)``."""
+    shifted = []
+    for op in ops:
+        op = dict(op)
+        if "pt" in op:
+            op["pt"] = [op["pt"][0] + dx, op["pt"][1] + dy]
+        if "rect" in op:
+            x, y, w, h = op["rect"]
+            op["rect"] = [x + dx, y + dy, w, h]
+        if "points" in op:
+            op["points"] = [[x + dx, y + dy] for x, y in op["points"]]
+        shifted.append(op)
+    return shifted
+
+
+def _text_runs(ops):
+    runs = []
+    size, face, flags = 14.0, "Times-Roman", 0
+    for op in ops:
+        kind = op.get("op")
+        if kind == "F":
+            size = float(op.get("size", size))
+            face = op.get("face", face)
+        elif kind == "t":
+            flags = int(op.get("fontchar", 0))
+        elif kind == "T":
+            x, y = op["pt"]
+            runs.append(TextRun(x, y, op.get("align", "c"), float(op.get("width", 0)), op.get("text", ""), size, face, flags))
+    return runs
+
+
+def parse_layout(json_text):
+    """Parse graphviz ``-Tjson`` output into a ``Layout``."""
+    doc = json.loads(json_text)
+
+    llx, lly, urx, ury = (float(v) for v in doc["bb"].split(","))
+    bb = (llx, -ury, urx, -lly)
+
+    nodes = {}
+    names_by_gvid = {}
+    for obj in doc.get("objects", []):
+        # subgraphs come first in "objects" and have no position
+        if "pos" not in obj or "width" not in obj:
+            continue
+        x, y = _point(obj["pos"])
+        ldraw = _flip_ops(obj.get("_ldraw_"))
+        nodes[obj["name"]] = NodeGeometry(
+            obj["name"],
+            x,
+            y,
+            float(obj["width"]) * POINTS_PER_INCH,
+            float(obj["height"]) * POINTS_PER_INCH,
+            obj.get("label", ""),
+            _text_runs(ldraw),
+            _flip_ops(obj.get("_draw_")) + ldraw,
+        )
+        names_by_gvid[obj["_gvid"]] = obj["name"]
+
+    edges = []
+    for obj in doc.get("edges", []):
+        edges.append(
+            EdgeGeometry(
+                names_by_gvid.get(obj["tail"]),
+                names_by_gvid.get(obj["head"]),
+                _flip_ops(obj.get("_draw_")),
+                _flip_ops(obj.get("_hdraw_")),
+                _flip_ops(obj.get("_tdraw_")),
+                obj.get("style") == "invis",
+            )
+        )
+
+    return Layout(bb, nodes, edges, _flip_ops(doc.get("_draw_")))
+
+
+def stitch_layouts(base, part, anchor):
+    """Merge ``part`` into ``base``, moved so both copies of node ``anchor`` coincide.
+
+    ``anchor`` is laid out in both (``base`` keeps its copy); every other
+    node of ``part`` must be new to ``base``. Returns a new ``Layout``
+    whose bounding box covers both.
+    """
+    here, there = base.nodes[anchor], part.nodes[anchor]
+    dx, dy = here.x - there.x, here.y - there.y
+
+    nodes = dict(base.nodes)
+    for name, node in part.nodes.items():
+        if name != anchor:
+            nodes[name] = node.translated(dx, dy)
+    edges = base.edges + [edge.translated(dx, dy) for edge in part.edges]
+
+    llx, lly, urx, ury = part.bb
+    bb = (
+        min(base.bb[0], llx + dx),
+        min(base.bb[1], lly + dy),
+        max(base.bb[2], urx + dx),
+        max(base.bb[3], ury + dy),
+    )
+    return Layout(bb, nodes, edges, base.draw)
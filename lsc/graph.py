@@ -0,0 +1,975 @@
+"""Graphviz graph builder for the Layered Structure of the Clause.
+
+The DOT document is assembled from fragments: the spine, each slot, each
+pre/post/between item, the predicate, each operator layer stack and the
+alignment subgraphs. A fragment is a pure function of a few plain values
+(labels, ids, flags) that returns its DOT lines; it is memoized on those
+values, so after an edit only the fragments whose inputs changed are
+quoted and formatted again. ``draw_lsc_tree`` keeps the bookkeeping
+(alignment rows, word order, reference ids) and splices the fragments
+into one ``graphviz.Digraph`` body. The operator projection is one
+contiguous run of that body, so ``LscGraph.split`` can hand it to dot as
+a graph of its own.
+"""
+import functools
+
+from lsc.model import Diagram
+from lsc.order import OrderedSequence
+
+OP_ABBR = {
+    "Aspect": "ASP",
+    "Negation": "NEG",
+    "Directionals": "DIR",
+    "Event quantification": "EVQ",
+    "Modality": "MOD",
+    "Status": "STA",
+    "Tense": "TNS",
+    "Evidentiality": "EVID",
+    "Illocutionary force": "IF",
+}
+
+# Memoized fragments kept per fragment kind
+FRAGMENT_CACHE_SIZE = 4096
+
+# Draft preset: cheaper network-simplex and crossing-minimization passes.
+# Together with dropping the row chains and the morph alignment (see
+# draw_lsc_tree), this keeps dot fast on inputs where the full layout is not.
+DRAFT_ATTRS = {"nslimit": "2", "nslimit1": "2", "mclimit": "0.2", "searchsize": "10"}
+
+_FRAGMENTS = []
+
+
+def _fragment(draw):
+    """Memoize ``draw(g, *args)``, which adds nodes/edges to a scratch graph ``g``.
+
+    The wrapped function takes ``*args`` (hashable) and returns the DOT
+    lines that ``draw`` produced, ready to extend another graph's body.
+    """
+    @functools.lru_cache(maxsize=FRAGMENT_CACHE_SIZE)
+    def build(*args):
+        import graphviz
+
+        g = graphviz.Digraph()
+        draw(g, *args)
+        return tuple(g.body)
+
+    build = functools.update_wrapper(build, draw)
+    _FRAGMENTS.append(build)
+    return build
+
+
+def fragment_cache_info():
+    """``{fragment name: functools CacheInfo}`` for every memoized fragment."""
+    return {fragment.__name__.lstrip("_"): fragment.cache_info() for fragment in _FRAGMENTS}
+
+
+def clear_fragment_cache():
+    for fragment in _FRAGMENTS:
+        fragment.cache_clear()
+
+
+#=====================
+# FRAGMENTS
+#=====================
+@_fragment
+def _settings(g, draft=False):
+    # GRAPH SETTINGS (shared by the constituent and operator graphs)
+    g.attr(dpi="72")
+    g.attr(splines="line", nodesep="0.4", ranksep="0.25", margin="0")
+    if draft:
+        g.attr(**DRAFT_ATTRS)
+    g.attr("node", fontname="Helvetica", fontsize="11", height="0.2", width="0.2")
+    g.attr("edge", fontname="Helvetica", arrowhead="none", penwidth="0.8")
+
+
+@_fragment
+def _spine(g):
+    # 1) SPINE
+    g.node("S", "SENTENCE", shape="plaintext", fontname="Helvetica", group="main")
+    g.node("CL", "CLAUSE", shape="plaintext", fontname="Helvetica", group="main")
+    g.node("CORE", "CORE", shape="plaintext", fontname="Helvetica", group="main")
+
+    g.edge("S:s", "CL:n", weight="100")
+    g.edge("CL:s", "CORE:n", weight="100")
+
+
+# 2) WORD DRAWER (shared by the fragments below, not memoized on its own)
+def _draw_word(g, parent_id, uid, text, pos):
+    word_id = f"{uid}_W"
+    g.node(word_id, text, shape="none", group=uid)
+
+    if pos:
+        pos_id = f"{uid}_P"
+        g.node(pos_id, pos, shape="plaintext", fontsize="10", group=uid)
+        g.edge(f"{parent_id}:s", f"{pos_id}:n", weight="100")
+        g.edge(f"{pos_id}:s", f"{word_id}:n", weight="100")
+    else:
+        g.edge(f"{parent_id}:s", f"{word_id}:n", weight="100")
+
+    return word_id
+
+
+# 3) SLOT (PrDP/PrCS/PoCS/PoDP/ExCS)
+@_fragment
+def _slot(g, uid, label, text, pos, parent, show_uid_label, parent_edge_constraint):
+    lbl_id = f"{uid}_L"
+    w_id = f"{uid}_W"
+
+    if show_uid_label:
+        g.node(uid, uid, shape="plaintext", group=uid)
+        g.edge(f"{parent}:s", f"{uid}:n", weight="1")
+        g.node(lbl_id, label, shape="plaintext", group=uid)
+        g.edge(f"{uid}:s", f"{lbl_id}:n", weight="100")
+    else:
+        g.node(lbl_id, label, shape="plaintext", group=uid)
+        g.edge(
+            f"{parent}:s",
+            f"{lbl_id}:n",
+            weight="1",
+            constraint="true" if parent_edge_constraint else "false",
+        )
+
+    g.node(w_id, text, shape="none", group=uid)
+
+    if pos:
+        pos_id = f"{uid}_P"
+        g.node(pos_id, pos, shape="plaintext", fontsize="10", group=uid)
+        g.edge(f"{lbl_id}:s", f"{pos_id}:n", weight="100")
+        g.edge(f"{pos_id}:s", f"{w_id}:n", weight="100")
+    else:
+        g.edge(f"{lbl_id}:s", f"{w_id}:n", weight="100")
+
+
+# 4) ITEMS (pre/post/between arguments and peripheries)
+@_fragment
+def _argument(g, uid, top_label, text, pos, parent_anchor, is_morph):
+    top_id = f"{uid}_Top"
+    g.node(top_id, top_label, shape="plaintext", group=uid)
+
+    # IMPORTANT: do NOT let morphological (AFF/CL) anchors constrain horizontal layout
+    g.edge(
+        f"{parent_anchor}:s",
+        f"{top_id}:n",
+        weight="1",
+        constraint="false" if is_morph else "true",
+    )
+
+    _draw_word(g, top_id, uid, text, pos)
+
+
+@_fragment
+def _periphery_item(g, uid, uid_for_group, label, text, pos, parent_id, new_group):
+    """One peripheral item; ``new_group`` is ``(target_layer_id, src_port, tgt_port)``
+    when the item opens a new PERIPHERY node, else ``None``."""
+    if new_group:
+        target_layer_id, src, tgt = new_group
+        g.node(parent_id, "PERIPHERY", shape="plaintext", group=uid)
+        g.edge(
+            f"{parent_id}{src}",
+            f"{target_layer_id}{tgt}",
+            arrowhead="vee",
+            constraint="false",
+            minlen="1",
+        )
+
+    item_top_id = f"{uid}_Top"
+    g.node(item_top_id, label, shape="plaintext", group=uid_for_group)
+    g.edge(f"{parent_id}:s", f"{item_top_id}:n", weight="100")
+
+    _draw_word(g, item_top_id, uid_for_group, text, pos)
+
+
+# 5) NUCLEUS
+@_fragment
+def _nucleus(g, has_morphological):
+    g.node("NUC", "NUC", shape="plaintext", group="main")
+    g.edge("CORE:s", "NUC:n", weight="100")
+
+    # COREw / NUCw should exist if there is ANY morphological argument
+    if has_morphological:
+        g.node(
+            "COREw",
+            label="<<font face='Helvetica'>CORE<sub>W</sub></font>>",
+            shape="plaintext",
+            fontsize="10",
+            group="main",
+        )
+        g.node(
+            "NUCw",
+            label="<<font face='Helvetica'>NUC<sub>W</sub></font>>",
+            shape="plaintext",
+            fontsize="10",
+            group="main",
+        )
+
+
+def _draw_predicate_column(g, pred_id, pos_id, word_id, pos, has_morphological):
+    if has_morphological:
+        if pos:
+            g.node(pos_id, pos, shape="plaintext", fontsize="10", group="main")
+            g.edge(f"{pred_id}:s", f"{pos_id}:n", weight="100")
+            g.edge(f"{pos_id}:s", "COREw:n", weight="100")
+            g.edge("COREw:s", "NUCw:n", weight="100")
+            g.edge("NUCw:s", f"{word_id}:n", weight="100")
+        else:
+            g.edge(f"{pred_id}:s", "COREw:n", weight="100")
+            g.edge("COREw:s", "NUCw:n", weight="100")
+            g.edge("NUCw:s", f"{word_id}:n", weight="100")
+    else:
+        if pos:
+            g.node(pos_id, pos, shape="plaintext", fontsize="10", group="main")
+            g.edge(f"{pred_id}:s", f"{pos_id}:n", weight="100")
+            g.edge(f"{pos_id}:s", f"{word_id}:n", weight="100")
+        else:
+            g.edge(f"{pred_id}:s", f"{word_id}:n", weight="100")
+
+
+@_fragment
+def _verbal_predicate(g, word, pos, has_morphological):
+    g.node("PRED", "PRED", shape="plaintext", fontsize="10", group="main")
+    g.node("NucW", word, shape="none", group="main")
+    g.edge("NUC:s", "PRED:n", weight="100")
+    _draw_predicate_column(g, "PRED", "NucP", "NucW", pos, has_morphological)
+
+
+@_fragment
+def _copula(g, word, pos, last_pre_nuc):
+    g.node("AUX", "AUX", shape="plaintext", fontsize="10", group="aux_group")
+    g.node("AuxW", word, shape="none", group="aux_group")
+
+    # IMPORTANT: keep AUX connected but do NOT let it pull the horizontal spine
+    g.edge("NUC:s", "AUX:n", weight="1", constraint="false")
+
+    if last_pre_nuc:
+        g.edge(last_pre_nuc, "AUX", style="invis", weight="5")
+
+    if pos:
+        g.node("AuxP", pos, shape="plaintext", fontsize="10", group="aux_group")
+        g.edge("AUX:s", "AuxP:n", weight="100")
+        g.edge("AuxP:s", "AuxW:n", weight="100")
+    else:
+        g.edge("AUX:s", "AuxW:n", weight="100")
+
+
+@_fragment
+def _attribute_predicate(g, word, pos, has_morphological):
+    g.node("PRED_A", "PRED", shape="plaintext", fontsize="10", group="main")
+    g.node("AttrW", word, shape="none", group="main")
+    g.edge("NUC:s", "PRED_A:n", weight="100")
+    _draw_predicate_column(g, "PRED_A", "AttrP", "AttrW", pos, has_morphological)
+
+
+@_fragment
+def _realization_form(g, node_id, text):
+    g.node(node_id, text, shape="none", fontsize="11", group="real")
+
+
+# 6) OPERATOR PROJECTION
+@_fragment
+def _operator_stack(g, layer_name, ops, first_index):
+    """Layer nodes for ``ops`` (``(text, side)`` pairs) of one layer;
+    ``first_index`` is the number of operators drawn in the layers below."""
+    stack = []
+    n = max(1, len(ops))
+
+    for i in range(n):
+        layer_id = f"OP_{layer_name}_{i}"
+        g.node(layer_id, layer_name, shape="plaintext", fontsize="11", group="op_layer")
+
+        if i < len(ops):
+            text, side = ops[i]
+            lbl_id = f"{layer_id}_LBL"
+            g.node(lbl_id, text, shape="plaintext", fontsize="11", group="op_lbl")
+
+            base_minlen = 1
+            increment = 1
+            current_minlen = str(base_minlen + (first_index + i) * increment)
+
+            with g.subgraph() as s:
+                s.attr(rank="same")
+                s.node(layer_id)
+                s.node(lbl_id)
+                if side == "Left":
+                    s.edge(lbl_id, layer_id, style="invis", weight="50", minlen=current_minlen)
+                else:
+                    s.edge(layer_id, lbl_id, style="invis", weight="50", minlen=current_minlen)
+
+            if side == "Left":
+                g.edge(f"{lbl_id}:e", f"{layer_id}:w", arrowhead="vee", penwidth="0.8", constraint="false")
+            else:
+                g.edge(f"{lbl_id}:w", f"{layer_id}:e", arrowhead="vee", penwidth="0.8", constraint="false")
+
+        stack.append(layer_id)
+
+    for j in range(len(stack) - 1):
+        g.edge(stack[j] + ":s", stack[j + 1] + ":n", weight="100")
+
+
+@_fragment
+def _operator_spine(g, anchor_word_id, n_nuc, n_core, n_clause):
+    sent_id = "OP_SENTENCE"
+    g.node(sent_id, "SENTENCE", shape="plaintext", fontsize="11", group="op_layer")
+
+    g.edge(anchor_word_id + ":s", "OP_NUC_0:n", weight="100")
+    g.edge(f"OP_NUC_{n_nuc - 1}:s", "OP_CORE_0:n", weight="100")
+    g.edge(f"OP_CORE_{n_core - 1}:s", "OP_CLAUSE_0:n", weight="100")
+    g.edge(f"OP_CLAUSE_{n_clause - 1}:s", sent_id + ":n", weight="100")
+
+
+@_fragment
+def _operator_anchor(g, anchor_word_id, text):
+    """Stand-in for the anchor word in the standalone operator graph: same
+    label and shape, so it has the same size as the word it is stitched onto."""
+    g.node(anchor_word_id, text, shape="none")
+
+
+def _op_text(op):
+    abbr = OP_ABBR.get(op.operator, op.operator)
+    return f"{abbr}: {op.value}" if op.value else f"{abbr}"
+
+
+# 7) ALIGNMENT SUBGRAPHS
+@_fragment
+def _rank(g, nodes, weight):
+    """``rank=same`` row over ``nodes``, chained in order by invisible edges of
+    ``weight`` (no chain if ``weight`` is None)."""
+    with g.subgraph() as s:
+        s.attr(rank="same")
+        for n in nodes:
+            s.node(n)
+        if weight is not None:
+            for i in range(1, len(nodes)):
+                s.edge(nodes[i - 1], nodes[i], style="invis", weight=weight)
+
+
+@_fragment
+def _morph_alignment(g, left_sorted, right_sorted):
+    with g.subgraph() as s:
+        s.attr(rank="same")
+
+        for n in left_sorted:
+            s.node(n)
+
+        s.node("NUCw")
+
+        for n in right_sorted:
+            s.node(n)
+
+        # keep order among left morphs
+        for i in range(1, len(left_sorted)):
+            s.edge(left_sorted[i - 1], left_sorted[i], style="invis", weight="100")
+
+        # left morphs must end before NUCw
+        if left_sorted:
+            s.edge(left_sorted[-1], "NUCw", style="invis", weight="80", minlen="2")
+
+        # NUCw must come before right morphs
+        if right_sorted:
+            s.edge("NUCw", right_sorted[0], style="invis", weight="80", minlen="2")
+
+        # keep order among right morphs
+        for i in range(1, len(right_sorted)):
+            s.edge(right_sorted[i - 1], right_sorted[i], style="invis", weight="100")
+
+
+@_fragment
+def _bottom_order(g, pairs):
+    for left_word, right_word in pairs:
+        g.edge(left_word, right_word, style="invis", weight="10")
+
+
+#=====================
+# DRAWING FUNCTION
+#=====================
+class LscGraph:
+    """The built DOT graph plus the alignment structures it was built from.
+
+    ``rows`` maps "CL", "CORE" and "NUC" to that row's nodes left to right;
+    ``bottom`` is the terminal word order; ``row_node_to_word`` maps a row
+    node to the word it stands over; ``anchor`` is the word the operator
+    projection hangs from (or None). ``operator_span`` is the ``(start, end)``
+    slice of ``dot.body`` holding the operator projection (None without
+    operators) and ``operator_header`` the lines that make it a graph of its
+    own (see ``split``).
+    """
+
+    __slots__ = (
+        "dot", "connections", "reference_to_node",
+        "rows", "bottom", "terminals", "row_node_to_word", "anchor",
+        "operator_span", "operator_header",
+    )
+
+    def __init__(
+        self, dot, connections, reference_to_node, rows, bottom, terminals, row_node_to_word, anchor,
+        operator_span=None, operator_header=None,
+    ):
+        self.dot = dot
+        self.connections = connections
+        self.reference_to_node = reference_to_node
+        self.rows = rows
+        self.bottom = bottom
+        self.terminals = terminals
+        self.row_node_to_word = row_node_to_word
+        self.anchor = anchor
+        self.operator_span = operator_span
+        self.operator_header = operator_header
+
+    def split(self):
+        """``(constituents, operators)`` as two ``graphviz.Digraph``s.
+
+        Nothing in the operator projection constrains the constituent
+        projection except the anchor word, so the two can be laid out
+        separately (and concurrently) and stitched on ``anchor``: the
+        operator graph repeats the anchor word for that (see
+        ``lsc.geometry.stitch_layouts``). ``operators`` is None when there
+        is no operator projection; ``constituents`` is then ``dot`` itself.
+        """
+        if self.operator_span is None:
+            return self.dot, None
+        import graphviz
+
+        start, end = self.operator_span
+        body = self.dot.body
+        constituents = graphviz.Digraph(comment="LSC", body=body[:start] + body[end:])
+        operators = graphviz.Digraph(comment="LSC operators", body=list(self.operator_header) + body[start:end])
+        return constituents, operators
+
+
+def draw_lsc_tree(diagram, draft=False):
+    """Build the LSC graph for a ``Diagram`` (or a raw .albura dict, validated first).
+
+    Returns ``(graphviz.Digraph, pending operator connections, reference -> node id)``.
+    ``draft`` builds a cheaper layout: ``DRAFT_ATTRS``, rows without their
+    ordering chains and no morph alignment. The bottom word order is kept.
+    """
+    graph = build_lsc_tree(diagram, draft)
+    return graph.dot, graph.connections, graph.reference_to_node
+
+
+def build_lsc_tree(diagram, draft=False):
+    """Like ``draw_lsc_tree`` but returns an ``LscGraph`` (see lsc.native_layout)."""
+    import graphviz
+
+    diagram = Diagram.from_dict(diagram)
+
+    # Retrieve data
+    prdp = diagram.prdp
+    prcs = diagram.prcs
+    items_pre = diagram.items_pre
+    items_post = diagram.items_post
+    pocs = diagram.pocs
+    podp = diagram.podp
+
+    pred_type = diagram.pred_type
+    nuc_word = diagram.nucleus.text
+    nuc_pos = diagram.nucleus.pos
+
+    cop_word = diagram.copula.text
+    cop_pos = diagram.copula.pos
+
+    attr_word = diagram.attribute.text
+    attr_pos = diagram.attribute.pos
+
+    items_between = diagram.items_between
+
+    # Realization forms
+    realization_forms = diagram.realization_forms
+
+    # Extra-Core Slots
+    extra_core_slots = diagram.extra_core_slots
+
+    # Detect if we need COREw/NUCw:
+    # -> should exist whenever there is ANY morphological argument (Affix or Clitic)
+    has_morphological = any(
+        item.is_morph for item in (items_pre + items_post + items_between)
+    )
+
+    # Map reference codes -> node IDs
+    reference_to_node = {}
+
+    dot = graphviz.Digraph(comment="LSC")
+    emit = dot.body.extend
+
+    # GRAPH SETTINGS + 1) SPINE
+    emit(_settings(draft))
+    emit(_spine())
+
+    # ALIGNMENT LISTS (filled during build; final order computed at the end)
+    layer_cl = {"pre": [], "center": ["CL"], "post": []}
+    layer_core = {"pre": [], "center": ["CORE"], "post": []}
+    layer_nuc = {"pre": [], "center": [], "post": []}
+
+    terminal_words = []
+    ordered_bottom = OrderedSequence()
+
+    # Store tops of morph args for alignment with NUCw (includes AFF and CL)
+    morph_arg_top_nodes = []
+
+    # Row-node -> word-node mapping (for vertical alignment ordering)
+    row_node_to_word = {}
+
+    # For postprocessing SVG dashed operator-links
+    pending_op_connections = []
+
+    # OPERATORS PROJECTION
+    def draw_operator_projection(anchor_word_id, ops_by_layer, ref_to_node):
+        drawn = 0
+        sizes = []
+        for layer_name in ("NUC", "CORE", "CLAUSE"):
+            ops = ops_by_layer[layer_name]
+            emit(_operator_stack(layer_name, tuple((_op_text(op), op.side) for op in ops), drawn))
+            drawn += len(ops)
+            sizes.append(max(1, len(ops)))
+
+            for i, op in enumerate(ops):
+                target_node_ids = [ref_to_node[tc] for tc in op.targets if ref_to_node.get(tc)]
+                if target_node_ids:
+                    pending_op_connections.append(
+                        {
+                            "lbl_id": f"OP_{layer_name}_{i}_LBL",
+                            "target_node_ids": target_node_ids,
+                            "side": op.side,
+                            "layer": layer_name,
+                        }
+                    )
+
+        emit(_operator_spine(anchor_word_id, *sizes))
+
+    # 3) SLOT DRAWER (PrDP/PrCS/PoCS/PoDP/ExCS)
+    def draw_slot(uid, slot, parent, target_list, ref_code=None, show_uid_label=True, parent_edge_constraint=True):
+        if not slot.text:
+            return None
+
+        emit(_slot(uid, slot.label, slot.text, slot.pos, parent, show_uid_label, parent_edge_constraint))
+        w_id = f"{uid}_W"
+        row_node_id = uid if show_uid_label else f"{uid}_L"
+
+        terminal_words.append(w_id)
+
+        if target_list is not None:
+            target_list.append(row_node_id)
+
+        # Row -> word alignment mapping
+        row_node_to_word[row_node_id] = w_id
+
+        if ref_code:
+            reference_to_node[ref_code] = w_id
+
+        return w_id
+
+    # ------------- NUCLEUS presence flags -------------
+    has_nuc = (pred_type == "verbal" and nuc_word) or (pred_type == "copular" and attr_word)
+
+    # Anchor for clitics: PoS under PRED if available, else PRED
+    def get_clitic_anchor_id():
+        if not has_nuc:
+            return "CORE"
+        if pred_type == "verbal":
+            return "NucP" if nuc_pos else "PRED"
+        return "AttrP" if attr_pos else "PRED_A"
+
+    def draw_argument(item, uid):
+        """Emit an argument item; returns ``(top_id, word_id)``."""
+        if item.is_morph:
+            top_label = "AFF" if item.is_affix else "CL"
+        else:
+            top_label = item.label
+
+        # Decide anchor
+        if item.is_clitic:
+            parent_anchor = get_clitic_anchor_id()
+        elif item.is_morph:
+            parent_anchor = "COREw" if (has_nuc and has_morphological) else "CORE"
+        else:
+            parent_anchor = "CORE"
+
+        emit(_argument(uid, top_label, item.text, item.pos, parent_anchor, item.is_morph))
+        return f"{uid}_Top", f"{uid}_W"
+
+    # 4) ITEMS PROCESSOR (pre/post arguments/peripheries)
+    def process_item_group(items, side_prefix):
+        last_conn_type = None
+        current_peri_parent = None
+
+        for i, item in enumerate(items):
+            if not item.text:
+                continue
+
+            uid = f"{side_prefix}_{i}"
+            conn_type = item.conn_type
+
+            if conn_type == "Arg":
+                last_conn_type = None
+                current_peri_parent = None
+
+                top_id, wid = draw_argument(item, uid)
+
+                # Horizontal ordering:
+                # - Only syntactic args participate in NUC-row ordering
+                if not item.is_morph:
+                    if side_prefix == "Pre":
+                        layer_nuc["pre"].append(top_id)
+                    else:
+                        layer_nuc["post"].append(top_id)
+
+                # Morph args (AFF and CL) should align with NUCw
+                if item.is_morph:
+                    morph_arg_top_nodes.append(top_id)
+
+                terminal_words.append(wid)
+                ordered_bottom.append(wid)
+
+                row_node_to_word[top_id] = wid
+                reference_to_node[f"{side_prefix.lower()}_{i}"] = wid
+
+            else:
+                # Periphery
+                new_group = None
+                if conn_type == last_conn_type and current_peri_parent:
+                    parent_id = current_peri_parent
+                    uid_for_group = f"{side_prefix}_{i}"
+                else:
+                    parent_id = f"PERI_Group_{uid}"
+                    uid_for_group = uid
+
+                    target_layer_id = ""
+                    if conn_type == "Peri-Clause":
+                        target_layer_id = "CL"
+                        (layer_cl["pre"] if side_prefix == "Pre" else layer_cl["post"]).append(parent_id)
+                    elif conn_type == "Peri-Core":
+                        target_layer_id = "CORE"
+                        (layer_core["pre"] if side_prefix == "Pre" else layer_core["post"]).append(parent_id)
+                    elif conn_type == "Peri-Nuc":
+                        target_layer_id = "NUC"
+                        (layer_nuc["pre"] if side_prefix == "Pre" else layer_nuc["post"]).append(parent_id)
+
+                    src, tgt = (":e", ":w") if side_prefix == "Pre" else (":w", ":e")
+                    new_group = (target_layer_id, src, tgt)
+
+                    last_conn_type = conn_type
+                    current_peri_parent = parent_id
+
+                emit(_periphery_item(uid, uid_for_group, item.label, item.text, item.pos, parent_id, new_group))
+                wid = f"{uid_for_group}_W"
+                terminal_words.append(wid)
+                ordered_bottom.append(wid)
+
+                if parent_id and parent_id not in row_node_to_word:
+                    row_node_to_word[parent_id] = wid
+
+                reference_to_node[f"{side_prefix.lower()}_{i}"] = wid
+
+    # DRAW SLOTS (topics/foci)
+    w_prdp = draw_slot("PrDP", prdp, "S", layer_cl["pre"], "prdp")
+    if w_prdp:
+        ordered_bottom.append(w_prdp)
+
+    w_prcs = draw_slot("PrCS", prcs, "CL", layer_core["pre"], "prcs")
+    if w_prcs:
+        ordered_bottom.append(w_prcs)
+
+    nucleus_anchor = None
+
+    # NUCLEUS
+    if has_nuc:
+        layer_nuc["center"].append("NUC")
+        emit(_nucleus(has_morphological))
+
+        # Pre items
+        process_item_group(items_pre, "Pre")
+
+        if pred_type == "verbal":
+            emit(_verbal_predicate(nuc_word, nuc_pos, has_morphological))
+
+            terminal_words.append("NucW")
+            ordered_bottom.append("NucW")
+
+            reference_to_node["nucleus"] = "NucW"
+            nucleus_anchor = "NucW"
+
+        elif pred_type == "copular":
+            nuc_level_order = []
+
+            if cop_word:
+                emit(_copula(cop_word, cop_pos, layer_nuc["pre"][-1] if layer_nuc["pre"] else None))
+                nuc_level_order.append("AUX")
+
+                terminal_words.append("AuxW")
+                ordered_bottom.append("AuxW")
+
+                reference_to_node["copula"] = "AuxW"
+                nucleus_anchor = "AuxW"  # temporary; later fixed to AttrW
+
+            # Items between AUX and PRED (attribute)
+            if items_between:
+                last_conn_type_between = None
+                current_peri_parent_between = None
+
+                for i, item in enumerate(items_between):
+                    if not item.text:
+                        continue
+
+                    uid = f"Between_{i}"
+                    conn_type = item.conn_type
+
+                    if conn_type == "Arg":
+                        last_conn_type_between = None
+                        current_peri_parent_between = None
+
+                        top_id, wid = draw_argument(item, uid)
+
+                        # ordering only for syntactic args
+                        if not item.is_morph:
+                            nuc_level_order.append(top_id)
+
+                        if item.is_morph:
+                            morph_arg_top_nodes.append(top_id)
+
+                        terminal_words.append(wid)
+                        ordered_bottom.append(wid)
+
+                        row_node_to_word[top_id] = wid
+                        reference_to_node[f"between_{i}"] = wid
+
+                    else:
+                        # periphery between
+                        new_group = None
+                        if conn_type == last_conn_type_between and current_peri_parent_between:
+                            parent_id = current_peri_parent_between
+                            uid_for_group = f"Between_{i}"
+                        else:
+                            parent_id = f"PERI_Between_{uid}"
+                            uid_for_group = uid
+
+                            if conn_type == "Peri-Clause":
+                                target_layer_id = "CL"
+                                layer_cl["pre"].append(parent_id)
+                            elif conn_type == "Peri-Core":
+                                target_layer_id = "CORE"
+                                layer_core["pre"].append(parent_id)
+                            else:
+                                target_layer_id = "NUC"
+                                layer_nuc["pre"].append(parent_id)
+
+                            new_group = (target_layer_id, ":e", ":w")
+
+                            last_conn_type_between = conn_type
+                            current_peri_parent_between = parent_id
+
+                        emit(_periphery_item(uid, uid_for_group, item.label, item.text, item.pos, parent_id, new_group))
+                        wid = f"{uid_for_group}_W"
+                        terminal_words.append(wid)
+                        ordered_bottom.append(wid)
+
+                        if parent_id and parent_id not in row_node_to_word:
+                            row_node_to_word[parent_id] = wid
+
+                        reference_to_node[f"between_{i}"] = wid
+
+            emit(_attribute_predicate(attr_word, attr_pos, has_morphological))
+            nuc_level_order.append("PRED_A")
+
+            terminal_words.append("AttrW")
+            ordered_bottom.append("AttrW")
+
+            reference_to_node["attribute"] = "AttrW"
+            nucleus_anchor = "AttrW"
+
+            # align AUX / between-args / PRED
+            if len(nuc_level_order) > 1:
+                emit(_rank(tuple(nuc_level_order), "10"))
+            elif cop_word:
+                emit(_rank(("AUX", "PRED_A"), None))
+
+        # Post items
+        process_item_group(items_post, "Post")
+
+    else:
+        process_item_group(items_pre, "Pre")
+        process_item_group(items_post, "Post")
+
+    # Post slots
+    w_pocs = draw_slot("PoCS", pocs, "CL", layer_core["post"], "pocs")
+    if w_pocs:
+        ordered_bottom.append(w_pocs)
+
+    w_podp = draw_slot("PoDP", podp, "S", layer_cl["post"], "podp")
+    if w_podp:
+        ordered_bottom.append(w_podp)
+
+    # =========================
+    # EXTRA-CORE SLOTS
+    # =========================
+    def _side_relative_to_nuc(ref_code: str) -> str:
+        if not nucleus_anchor or nucleus_anchor not in ordered_bottom:
+            return "right"
+
+        nuc_idx = ordered_bottom.position(nucleus_anchor)
+
+        if not ref_code:
+            return "right"
+
+        ref_node = reference_to_node.get(ref_code)
+        if not ref_node or ref_node not in ordered_bottom:
+            return "right"
+
+        ref_idx = ordered_bottom.position(ref_node)
+
+        if ref_idx < nuc_idx:
+            return "left"
+        if ref_idx > nuc_idx:
+            return "right"
+        return "center"
+
+    for i, slot in enumerate(extra_core_slots):
+        if not slot.text:
+            continue
+
+        uid = f"ExCS{i}"
+
+        ref_code = slot.reference
+        pos = slot.position
+
+        ref_side = _side_relative_to_nuc(ref_code)
+
+        if ref_side == "left":
+            target_list = layer_core["pre"]
+        elif ref_side == "right":
+            target_list = layer_core["post"]
+        else:
+            target_list = layer_core["pre"] if pos == "left" else layer_core["post"]
+
+        # IMPORTANT: do not allow the CL→ExCS edge to pull CL/CORE horizontally
+        w_excs = draw_slot(
+            uid,
+            slot,
+            parent="CL",
+            target_list=target_list,
+            ref_code=f"excs_{i}",
+            show_uid_label=False,
+            parent_edge_constraint=False,
+        )
+        if not w_excs:
+            continue
+
+        ref_node_id = reference_to_node.get(ref_code) if ref_code else None
+
+        if ref_node_id and ref_node_id in ordered_bottom:
+            if pos == "left":
+                ordered_bottom.insert_before(ref_node_id, w_excs)
+            else:
+                ordered_bottom.insert_after(ref_node_id, w_excs)
+        else:
+            ordered_bottom.append(w_excs)
+
+    # =========================
+    # INSERT REALIZATION FORMS (after Extra-Core Slots)
+    # =========================
+    for idx, form in enumerate(realization_forms):
+        form_text = form.text
+        if not form_text:
+            continue
+
+        position = form.position
+        reference_code = form.reference
+
+        ref_node_id = reference_to_node.get(reference_code)
+        if not ref_node_id:
+            continue
+
+        form_node_id = f"REAL_{idx}"
+        emit(_realization_form(form_node_id, form_text))
+        terminal_words.append(form_node_id)
+        reference_to_node[f"real_{idx}"] = form_node_id
+
+        if ref_node_id in ordered_bottom:
+            if position == "left":
+                ordered_bottom.insert_before(ref_node_id, form_node_id)
+            else:
+                ordered_bottom.insert_after(ref_node_id, form_node_id)
+        else:
+            ordered_bottom.append(form_node_id)
+
+    # OPERATORS (a contiguous run of the body, so it can also be laid out on its own)
+    operator_span = operator_header = None
+    if diagram.operators and nucleus_anchor:
+        start = len(dot.body)
+        draw_operator_projection(nucleus_anchor, diagram.operators_by_layer, reference_to_node)
+        operator_span = (start, len(dot.body))
+        anchor_text = nuc_word if nucleus_anchor == "NucW" else attr_word
+        operator_header = _settings(draft) + _operator_anchor(nucleus_anchor, anchor_text)
+
+    # ==========================================================
+    # ALIGNMENT FIX FINAL:
+    # ==========================================================
+    # Positions are order keys from OrderedSequence, not list indices;
+    # words missing from the bottom row sort last.
+    def _word_index(word_id: str) -> float:
+        return ordered_bottom.position(word_id, float("inf"))
+
+    def _row_index(row_node_id: str) -> float:
+        w = row_node_to_word.get(row_node_id)
+        if w:
+            return _word_index(w)
+        return _word_index(row_node_id)
+
+    if nucleus_anchor and nucleus_anchor in ordered_bottom:
+        anchor_idx = ordered_bottom.position(nucleus_anchor)
+    elif ordered_bottom:
+        # no nucleus: split at the middle word
+        anchor_idx = ordered_bottom.position(list(ordered_bottom)[len(ordered_bottom) // 2])
+    else:
+        anchor_idx = 0
+
+    def _unique(seq):
+        return list(dict.fromkeys(seq))
+
+    def _build_row(layer_dict, spine_node: str):
+        items = _unique(layer_dict.get("pre", []) + layer_dict.get("post", []))
+        items = [n for n in items if n != spine_node]
+        items_sorted = sorted(items, key=_row_index)
+        left = [n for n in items_sorted if _row_index(n) < anchor_idx]
+        right = [n for n in items_sorted if _row_index(n) >= anchor_idx]
+        return left + ([spine_node] if spine_node else []) + right
+
+    def enforce_rank(row_nodes):
+        row_nodes = tuple(n for n in row_nodes if n)
+        if row_nodes:
+            emit(_rank(row_nodes, None if draft else "100"))
+
+    rows = {"CL": _build_row(layer_cl, "CL"), "CORE": _build_row(layer_core, "CORE")}
+    if has_nuc:
+        rows["NUC"] = _build_row(layer_nuc, "NUC")
+    for row in rows.values():
+        enforce_rank(row)
+
+    # Align morph arg tops (AFF/CL) with NUCw,
+    # placing pre-nuclear morphs to the LEFT of NUCw and post-nuclear morphs to the RIGHT.
+    if has_nuc and has_morphological and morph_arg_top_nodes and not draft:
+        morph_unique = _unique(morph_arg_top_nodes)
+
+        # anchor_idx already computed above (nucleus position in ordered_bottom)
+        left_morph = [n for n in morph_unique if _row_index(n) < anchor_idx]
+        right_morph = [n for n in morph_unique if _row_index(n) >= anchor_idx]
+
+        emit(_morph_alignment(tuple(sorted(left_morph, key=_row_index)), tuple(sorted(right_morph, key=_row_index))))
+
+    # All words same horizontal baseline
+    if terminal_words:
+        emit(_rank(tuple(terminal_words), None))
+
+    # Keep linear order at bottom (this is the main order constraint)
+    emit(_bottom_order(tuple(ordered_bottom.pairs())))
+
+    return LscGraph(
+        dot,
+        pending_op_connections,
+        reference_to_node,
+        {name: tuple(n for n in row if n) for name, row in rows.items()},
+        tuple(ordered_bottom),
+        tuple(terminal_words),
+        row_node_to_word,
+        nucleus_anchor,
+        operator_span,
+        operator_header,
+    )
@@ -0,0 +1,237 @@
+"""Graphviz layout backends.
+
+``layout(source, fmt)`` turns DOT source into rendered output. Two backends
+sit behind it:
+
+- ``gvc``: in-process layout and rendering through libgvc, via the optional
+  ``pygraphviz`` bindings. No fork/exec, no per-call fontconfig start-up.
+- ``pipe``: the ``dot`` executable through graphviz's runner (one process per
+  call). Always available when Graphviz is installed.
+
+The backend is picked once per process from ``ALBURA_LAYOUT_BACKEND``
+("auto", "gvc" or "pipe"; default "auto", which prefers gvc). If the gvc
+backend fails on a graph, that call falls back to ``pipe``.
+
+A call may carry a ``LayoutBudget`` (wall time and address-space limit)
+and raises ``LayoutBudgetExceeded`` on overrun. A time limit works with
+either backend: a ``dot`` process is killed, while a gvc layout cannot be
+interrupted, so the caller stops waiting for it and it finishes in the
+background (other calls use ``pipe`` while it holds libgvc). A memory cap
+needs a child process, so a budget with one always runs ``dot``.
+``budget_from_env`` reads the app's limits from ``ALBURA_LAYOUT_TIMEOUT``
+(seconds, default 3) and ``ALBURA_LAYOUT_MEMORY_MB`` (no cap by default,
+so the app keeps the in-process backend).
+"""
+import logging
+import os
+import shutil
+import subprocess
+import sys
+import threading
+from concurrent.futures import Future
+from concurrent.futures import TimeoutError as FutureTimeoutError
+
+BACKEND_ENV = "ALBURA_LAYOUT_BACKEND"
+TIMEOUT_ENV = "ALBURA_LAYOUT_TIMEOUT"
+MEMORY_ENV = "ALBURA_LAYOUT_MEMORY_MB"
+DEFAULT_TIMEOUT = 3.0
+DEFAULT_MEMORY_MB = None
+
+logger = logging.getLogger(__name__)
+
+_RLIMIT_SHIM = (
+    "import os, resource, sys; "
+    "limit = int(sys.argv[1]); "
+    "resource.setrlimit(resource.RLIMIT_AS, (limit, limit)); "
+    "os.execvp(sys.argv[2], sys.argv[2:])"
+)
+
+
+class LayoutBudgetExceeded(RuntimeError):
+    """dot ran out of its time or memory budget (``reason`` is "time" or "memory")."""
+
+    def __init__(self, reason, budget):
+        limit = f"{budget.timeout:g}s" if reason == "time" else f"{budget.memory_mb} MB"
+        super().__init__(f"Layout exceeded its {reason} budget ({limit})")
+        self.reason = reason
+        self.budget = budget
+
+
+class LayoutBudget:
+    """Limits for one layout: ``timeout`` in seconds, ``memory_mb`` of address space (None = unlimited)."""
+
+    __slots__ = ("timeout", "memory_mb")
+
+    def __init__(self, timeout=None, memory_mb=None):
+        self.timeout = timeout
+        self.memory_mb = memory_mb
+
+    def __repr__(self):
+        return f"LayoutBudget(timeout={self.timeout!r}, memory_mb={self.memory_mb!r})"
+
+    def scaled(self, factor):
+        """The same memory cap with ``factor`` times the time (e.g. for a background retry)."""
+        return LayoutBudget(self.timeout and self.timeout * factor, self.memory_mb)
+
+    def wrap(self, cmd):
+        """``cmd`` prefixed so that it runs under this memory cap.
+
+        The limit is set by ``prlimit`` (util-linux) or, where that is
+        missing, by a tiny Python shim that sets RLIMIT_AS and execs
+        ``cmd``; ``preexec_fn`` is not safe in a process with threads.
+        """
+        if not self.memory_mb or sys.platform == "win32" or shutil.which(cmd[0]) is None:
+            return cmd  # a missing executable is reported as usual by the runner
+        limit = self.memory_mb * 2**20
+        if shutil.which("prlimit"):
+            return ["prlimit", f"--as={limit}", "--", *cmd]
+        return [sys.executable, "-c", _RLIMIT_SHIM, str(limit), *cmd]
+
+
+def _env_number(name, default):
+    value = os.environ.get(name, "").strip()
+    if not value:
+        return default
+    try:
+        number = float(value)
+    except ValueError:
+        logger.warning("Ignoring %s=%r (not a number)", name, value)
+        return default
+    return number if number > 0 else None  # 0 disables the limit
+
+
+def budget_from_env():
+    """The ``LayoutBudget`` configured by ALBURA_LAYOUT_TIMEOUT/ALBURA_LAYOUT_MEMORY_MB."""
+    memory_mb = _env_number(MEMORY_ENV, DEFAULT_MEMORY_MB)
+    return LayoutBudget(_env_number(TIMEOUT_ENV, DEFAULT_TIMEOUT), memory_mb and int(memory_mb))
+
+
+def _run_dot(fmt, source, budget=None):
+    """Run ``dot -T<fmt>`` on ``source`` within ``budget``; returns stdout bytes."""
+    from graphviz.backend.dot_command import command
+    from graphviz.backend.execute import run_check
+
+    cmd = command("dot", fmt)
+    kwargs = {}
+    if budget is not None:
+        kwargs["timeout"] = budget.timeout
+        cmd = budget.wrap(cmd)
+    try:
+        return run_check(cmd, input=source.encode("utf-8"), capture_output=True, **kwargs).stdout
+    except subprocess.TimeoutExpired:
+        raise LayoutBudgetExceeded("time", budget) from None
+    except subprocess.CalledProcessError as e:
+        # Allocation failures under RLIMIT_AS end in an abort or an "out of memory" error
+        if budget is not None and budget.memory_mb and (e.returncode < 0 or b"memory" in (e.stderr or b"").lower()):
+            raise LayoutBudgetExceeded("memory", budget) from None
+        raise
+
+
+class PipeBackend:
+    """Run ``dot`` as a subprocess for every call."""
+
+    name = "pipe"
+
+    def render(self, source, fmt="svg", budget=None):
+        return _run_dot(fmt, source, budget)
+
+
+class GvcBackend:
+    """Lay out and render in-process with libgvc (through pygraphviz).
+
+    libgvc keeps global state and is not thread-safe, so calls are
+    serialized with a lock. That is still much cheaper than a fork/exec.
+    With a time budget the layout runs on a helper thread that the caller
+    stops waiting for on overrun; while it still holds the lock, budgeted
+    calls go to a ``dot`` subprocess instead of queueing behind it.
+    """
+
+    name = "gvc"
+
+    def __init__(self):
+        import pygraphviz
+
+        self._pygraphviz = pygraphviz
+        self._lock = threading.Lock()
+
+    def _render(self, source, fmt):
+        graph = self._pygraphviz.AGraph(string=source)
+        try:
+            graph.layout(prog="dot")
+            return graph.draw(format=fmt)
+        finally:
+            graph.close()
+
+    def render(self, source, fmt="svg", budget=None):
+        if budget is None or not budget.timeout:
+            with self._lock:
+                return self._render(source, fmt)
+        if not self._lock.acquire(blocking=False):
+            # libgvc is busy (possibly with a layout that ran out of time): use a killable dot
+            return PipeBackend().render(source, fmt, budget)
+        future = Future()
+
+        def run():
+            try:
+                future.set_result(self._render(source, fmt))
+            except BaseException as e:
+                future.set_exception(e)
+            finally:
+                self._lock.release()
+
+        threading.Thread(target=run, name="albura-gvc", daemon=True).start()
+        try:
+            return future.result(budget.timeout)
+        except FutureTimeoutError:
+            raise LayoutBudgetExceeded("time", budget) from None
+
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def _create_backend(choice):
+    if choice in ("auto", "gvc"):
+        try:
+            return GvcBackend()
+        except ImportError:
+            if choice == "gvc":
+                logger.warning("pygraphviz is not installed; falling back to the dot subprocess backend")
+    elif choice != "pipe":
+        logger.warning("Unknown %s=%r; using the dot subprocess backend", BACKEND_ENV, choice)
+    return PipeBackend()
+
+
+def get_backend():
+    """Return the process-wide layout backend, creating it on first use."""
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                _backend = _create_backend(os.environ.get(BACKEND_ENV, "auto").strip().lower())
+    return _backend
+
+
+def _call(method, *args, budget=None):
+    backend = get_backend()
+    if budget is not None and budget.memory_mb:
+        backend = PipeBackend()  # only a child process can be memory-capped
+    kwargs = {} if budget is None else {"budget": budget}
+    try:
+        return getattr(backend, method)(*args, **kwargs)
+    except LayoutBudgetExceeded:
+        raise
+    except Exception:
+        if backend.name == "pipe":
+            raise
+        logger.exception("In-process layout failed; retrying with the dot subprocess backend")
+        return getattr(PipeBackend(), method)(*args, **kwargs)
+
+
+def layout(source, fmt="svg", budget=None):
+    """Lay out DOT ``source`` and return the rendered ``fmt`` output as bytes.
+
+    Raises ``LayoutBudgetExceeded`` if a ``budget`` is given and dot overruns it.
+    """
+    return _call("render", source, fmt, budget=budget)
+
@@ -0,0 +1,139 @@
+"""Compare the native layout engine's node order with graphviz's.
+
+Usage::
+
+    python -m lsc.layoutcheck --count 50 --size 2
+    python -m lsc.layoutcheck corpus/ -o check.jsonl
+
+For every document (the given .albura files, or generated ones) both
+engines lay out the same ``build_lsc_tree`` graph. Coordinates differ by
+design, so only order is compared:
+
+* ``words``: the bottom row reads left to right in the same order;
+* ``ranks``: nodes dot puts on one rank are on one rank natively too,
+  and each pair of them is in the same left-to-right order.
+
+One JSON line per document, then a summary line. Exits with status 1 if
+any word order differs or the pairwise agreement is below
+``--min-agreement``.
+"""
+import argparse
+import itertools
+import json
+import random
+import sys
+from pathlib import Path
+
+from lsc.corpus import generate_document, scaled_params
+from lsc.geometry import parse_layout
+from lsc.graph import build_lsc_tree
+from lsc.layout import layout
+from lsc.native_layout import native_layout
+
+_RANK_TOLERANCE = 1.0  # points
+
+
+def _ranks(geometry):
+    """Node names grouped by y (top to bottom), each rank sorted left to right."""
+    ranks = []
+    for node in sorted(geometry.nodes.values(), key=lambda n: n.y):
+        if ranks and abs(ranks[-1][0] - node.y) <= _RANK_TOLERANCE:
+            ranks[-1][1].append(node)
+        else:
+            ranks.append((node.y, [node]))
+    return [[node.name for node in sorted(nodes, key=lambda n: n.x)] for _, nodes in ranks]
+
+
+def compare_layouts(graph, native, reference):
+    """Order agreement between two layouts of ``graph`` (an ``LscGraph``).
+
+    Returns a dict with ``words_match``, the number of same-rank ``pairs``
+    in ``reference``, how many of them ``agree`` natively and up to five
+    ``mismatches`` (node-name pairs).
+    """
+    def word_order(geometry):
+        words = [name for name in graph.bottom if name in geometry.nodes]
+        return sorted(words, key=lambda name: geometry.nodes[name].x)
+
+    pairs = agree = 0
+    mismatches = []
+    for rank in _ranks(reference):
+        for left, right in itertools.combinations(rank, 2):
+            if left not in native.nodes or right not in native.nodes:
+                continue
+            pairs += 1
+            a, b = native.nodes[left], native.nodes[right]
+            if abs(a.y - b.y) <= _RANK_TOLERANCE and a.x < b.x:
+                agree += 1
+            elif len(mismatches) < 5:
+                mismatches.append([left, right])
+    return {
+        "words_match": word_order(native) == word_order(reference),
+        "pairs": pairs,
+        "agree": agree,
+        "mismatches": mismatches,
+    }
+
+
+def check_document(data):
+    """Lay ``data`` out with both engines and compare (see ``compare_layouts``)."""
+    graph = build_lsc_tree(data)
+    native = native_layout(graph)
+    graph.dot.attr(dpi="72")
+    reference = parse_layout(layout(graph.dot.source, "json"))
+    return compare_layouts(graph, native, reference)
+
+
+def _documents(files, count, size, seed):
+    if files:
+        from lsc.batch import collect_inputs
+
+        for path in collect_inputs(files):
+            yield str(path), json.loads(Path(path).read_text(encoding="utf-8"))
+        return
+    rng = random.Random(seed)
+    for i in range(count):
+        pred_type = "verbal" if i % 2 == 0 else "copular"
+        yield f"generated_{i:03d}", generate_document(rng, **scaled_params(size, pred_type))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m lsc.layoutcheck", description="Check the native layout's node order against graphviz."
+    )
+    parser.add_argument("files", nargs="*", help=".albura files or directories (default: generated documents)")
+    parser.add_argument("--count", type=int, default=50, help="generated documents")
+    parser.add_argument("--size", type=int, default=2, help="size of generated documents (see lsc.bench)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--min-agreement", type=float, default=0.95, help="pairwise order agreement required")
+    parser.add_argument("-o", "--out", help="write JSON lines here instead of stdout")
+    args = parser.parse_args(argv)
+
+    totals = {"documents": 0, "words_mismatched": 0, "pairs": 0, "agree": 0, "errors": 0}
+    out = open(args.out, "a", encoding="utf-8") if args.out else sys.stdout
+    try:
+        for name, data in _documents(args.files, args.count, args.size, args.seed):
+            totals["documents"] += 1
+            try:
+                record = check_document(data)
+            except Exception as e:
+                totals["errors"] += 1
+                record = {"error": str(e)}
+            else:
+                totals["words_mismatched"] += not record["words_match"]
+                totals["pairs"] += record["pairs"]
+                totals["agree"] += record["agree"]
+            out.write(json.dumps({"document": name, **record}) + "\n")
+        agreement = totals["agree"] / totals["pairs"] if totals["pairs"] else 1.0
+        totals["agreement"] = round(agreement, 4)
+        out.write(json.dumps({"summary": totals}) + "\n")
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+    failed = totals["errors"] or totals["words_mismatched"] or agreement < args.min_agreement
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,361 @@
+"""Concurrent-session load test for the Streamlit app.
+
+Usage::
+
+    python -m lsc.loadtest --sessions 1 10 20 40 --actions 20 -o load.jsonl
+    python -m lsc.loadtest --sessions 40 --files corpus/ --think 0.5
+
+Every simulated session is a ``streamlit.testing`` AppTest of albura.py
+driven from its own thread, so the sessions share this process's
+``cache_resource`` objects (render cache, render scheduler) just like browser
+sessions share one server. Each session runs a random mix of actions:
+edit a constituent, add an operator, load an .albura file through the
+uploader and export a PNG (wait for the newest render, then export it as
+the download button does). Exports go through an ``Exporter`` on the
+app's own render scheduler, as ``get_exporter`` does in the app, so they
+queue with the renders under the same per-session fairness and dedup.
+
+One JSON record per concurrency level reports rerun latency percentiles
+(the script run an action triggers), render latency (until that action's
+background render landed), reruns per second, peak and mean ``dot`` child
+processes, CPU use, RSS per session and the render scheduler's queue depth
+and wait times. Raise the level until p95 latency or CPU stops scaling to
+find where one server saturates.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import threading
+import time
+from pathlib import Path
+
+from lsc.corpus import generate_document, scaled_params
+from lsc.export import Exporter, export_available
+from lsc.session import session_memory
+from lsc.trace import percentiles
+
+APP = Path(__file__).resolve().parent.parent / "albura.py"
+ACTIONS = {"edit": 0.5, "operator": 0.2, "load": 0.2, "export": 0.1}
+_LAYERS = ("op_nuc", "op_core", "op_clause")
+_WORDS = ["kalu", "mito", "rane", "sipo", "dawu", "xeqa", "lumi", "tora"]
+
+# AppTest resets process-wide Streamlit state (pages registry, config) on
+# every run, so script runs are serialized. Background renders and PNG
+# exports still run concurrently; time spent waiting here counts as rerun
+# latency, much like script threads queueing for the GIL on a real server.
+_script_lock = threading.Lock()
+
+_exporters = {}
+_exporters_lock = threading.Lock()
+
+
+def _rss_bytes():
+    """Resident set size of this process (Linux ``/proc``; peak RSS elsewhere)."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        import resource
+
+        scale = 1 if sys.platform == "darwin" else 1024
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale
+
+
+def _dot_processes():
+    """Number of running ``dot`` children of this process (``None`` without ``/proc``)."""
+    pid = os.getpid()
+    count = 0
+    try:
+        entries = os.listdir("/proc")
+    except OSError:
+        return None
+    for entry in entries:
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat") as f:
+                stat = f.read()
+        except OSError:
+            continue
+        # "pid (comm) state ppid ..."; comm may contain spaces
+        comm = stat[stat.index("(") + 1:stat.rindex(")")]
+        ppid = int(stat[stat.rindex(")") + 2:].split()[1])
+        if comm == "dot" and ppid == pid:
+            count += 1
+    return count
+
+
+def _exporter_for(scheduler):
+    """One shared ``Exporter`` on ``scheduler`` (the app's ``get_render_scheduler()``)."""
+    with _exporters_lock:
+        if scheduler not in _exporters:
+            _exporters[scheduler] = Exporter(scheduler=scheduler)
+        return _exporters[scheduler]
+
+
+class ResourceSampler(threading.Thread):
+    """Samples RSS and ``dot`` children every ``interval`` seconds until stopped."""
+
+    def __init__(self, interval=0.05):
+        super().__init__(name="loadtest-sampler", daemon=True)
+        self.interval = interval
+        self.rss = []
+        self.dot = []
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.is_set():
+            self.rss.append(_rss_bytes())
+            dot = _dot_processes()
+            if dot is not None:
+                self.dot.append(dot)
+            self._stop_event.wait(self.interval)
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+
+
+class SimulatedSession:
+    """One browser session: an AppTest of the app plus a random action script."""
+
+    def __init__(self, documents, seed=0, think=0.0, timeout=60):
+        self.documents = documents
+        self.rng = random.Random(seed)
+        self.think = think
+        self.timeout = timeout
+        self.reruns = []
+        self.renders = []
+        self.errors = []
+        self.memory = 0
+        self.at = None
+
+    def _key(self, base):
+        return f"{base}_{self.at.session_state['form_id']}"
+
+    def _keep_hidden_widgets(self):
+        """Carry over the values of form widgets missing from the last rerun.
+
+        Editing a form section reruns only that section's fragment and the
+        diagram, and AppTest then holds only those elements, so the next run
+        would reset every other widget. A browser still shows (and sends)
+        them; pass their values back through session state instead.
+        """
+        shown = set()
+        blocks = [self.at.main, self.at.sidebar]
+        while blocks:
+            for node in blocks.pop().children.values():
+                shown.add(getattr(node, "key", None))
+                if getattr(node, "children", None):
+                    blocks.append(node)
+        state = self.at.session_state
+        for key in state["form_keys"]:
+            if key not in shown and key in state and not key.startswith("file_uploader_"):
+                state[key] = state[key]
+
+    def _widget(self, kind, base):
+        """The ``kind`` widget (e.g. ``"text_input"``) keyed ``base`` in the current form.
+
+        If the last rerun did not show it, the whole page is rerun first, as
+        it is on screen in a browser (not counted as rerun latency).
+        """
+        try:
+            return getattr(self.at, kind)(key=self._key(base))
+        except KeyError:
+            pass
+        self._keep_hidden_widgets()
+        with _script_lock:
+            self.at.run(timeout=self.timeout)
+        return getattr(self.at, kind)(key=self._key(base))
+
+    def _run(self, action, widget):
+        self._keep_hidden_widgets()
+        start = time.perf_counter()
+        with _script_lock:
+            widget.run(timeout=self.timeout)
+        self.reruns.append((action, (time.perf_counter() - start) * 1000))
+        if self.at.exception:
+            raise RuntimeError(self.at.exception[0].message)
+
+    def _await_render(self, start):
+        renderer = self.at.session_state.get("renderer")
+        if renderer is None:
+            return None
+        renderer.latest(self.timeout)
+        state = renderer.poll()
+        if state.error is not None:
+            raise RuntimeError(f"render failed: {state.error}")
+        self.renders.append((time.perf_counter() - start) * 1000)
+        return state.value
+
+    def edit(self):
+        verbal = self._widget("radio", "pred_type").value == "Predicative"
+        widget = self._widget("text_input", "nuc_txt" if verbal else "attr_txt")
+        self._run("edit", widget.input(self.rng.choice(_WORDS)))
+
+    def operator(self):
+        prefix = self.rng.choice(_LAYERS)
+        self._run("operator", self._widget("number_input", f"{prefix}_n").increment())
+        count = self._widget("number_input", f"{prefix}_n").value
+        kind = self._widget("selectbox", f"{prefix}_type_{count - 1}")
+        self._run("operator", kind.select(self.rng.choice(kind.options)))
+
+    def load(self):
+        name, content = self.rng.choice(self.documents)
+        uploader = self._widget("file_uploader", "file_uploader")
+        self._run("load", uploader.set_value((name, content, "application/octet-stream")))
+
+    def export(self):
+        if not export_available():
+            raise RuntimeError("the cairo library is not available")
+        drawing = self._await_render(time.perf_counter())
+        if drawing is None:
+            raise RuntimeError("nothing rendered to export")
+        renderer = self.at.session_state["renderer"]
+        exporter = _exporter_for(renderer.scheduler)
+        exporter.export(renderer.poll().key, drawing, "png", 300, timeout=self.timeout, session=renderer)
+
+    def run(self, actions):
+        from streamlit.testing.v1 import AppTest
+
+        self.at = AppTest.from_file(str(APP), default_timeout=self.timeout)
+        start = time.perf_counter()
+        with _script_lock:
+            self.at.run()
+        self.reruns.append(("start", (time.perf_counter() - start) * 1000))
+        self.load()  # start from a real diagram, as a class would
+
+        names, weights = zip(*ACTIONS.items())
+        for _ in range(actions):
+            action = self.rng.choices(names, weights)[0]
+            start = time.perf_counter()
+            try:
+                getattr(self, action)()
+                if action != "export":
+                    self._await_render(start)
+            except Exception as e:
+                self.errors.append(f"{action}: {e}")
+            if self.think:
+                time.sleep(self.rng.uniform(0, 2 * self.think))
+
+        state = self.at.session_state.to_dict()
+        renderer = state.get("renderer")
+        shared = (renderer.scheduler,) if renderer is not None else ()
+        self.memory = sum(size for _, size in session_memory(state, shared))
+
+
+def _documents(files, count=20, size=2, seed=0):
+    """``[(name, bytes), ...]`` to upload: the given .albura files or generated ones."""
+    if files:
+        from lsc.batch import collect_inputs
+
+        return [(Path(p).name, Path(p).read_bytes()) for p in collect_inputs(files)]
+    rng = random.Random(seed)
+    documents = []
+    for i in range(count):
+        data = generate_document(rng, **scaled_params(size, "verbal" if i % 2 == 0 else "copular"))
+        documents.append((f"load_{i:03d}.albura", json.dumps(data, ensure_ascii=False).encode("utf-8")))
+    return documents
+
+
+def run_level(sessions, actions, documents, think=0.0, seed=0, timeout=60):
+    """Drive ``sessions`` concurrent sessions; returns one summary record."""
+    workers = [SimulatedSession(documents, seed + i, think, timeout) for i in range(sessions)]
+    failures = []
+
+    def guarded(worker):
+        try:
+            worker.run(actions)
+        except Exception as e:
+            failures.append(f"session: {e}")
+
+    threads = [threading.Thread(target=guarded, args=(w,), name=f"session-{i}") for i, w in enumerate(workers)]
+
+    rss_before = _rss_bytes()
+    sampler = ResourceSampler()
+    cpu_before = os.times()
+    start = time.perf_counter()
+    sampler.start()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    wall = time.perf_counter() - start
+    sampler.stop()
+    cpu_after = os.times()
+
+    reruns = [ms for w in workers for action, ms in w.reruns if action != "start"]
+    renders = [ms for w in workers for ms in w.renders]
+    errors = [e for w in workers for e in w.errors] + failures
+    cpu_self = (cpu_after.user - cpu_before.user) + (cpu_after.system - cpu_before.system)
+    cpu_children = (cpu_after.children_user - cpu_before.children_user) + (
+        cpu_after.children_system - cpu_before.children_system
+    )
+    rss_peak = max(sampler.rss, default=rss_before)
+    renderers = [w.at.session_state["renderer"] for w in workers if w.at is not None and "renderer" in w.at.session_state]
+
+    record = {
+        "sessions": sessions,
+        "actions_per_session": actions,
+        "wall_s": round(wall, 2),
+        "reruns_per_s": round(len(reruns) / wall, 1) if wall else None,
+        "rerun": {"count": len(reruns), **percentiles(reruns)},
+        "first_run": percentiles([ms for w in workers for action, ms in w.reruns if action == "start"]),
+        "render": {"count": len(renders), **percentiles(renders)},
+        "dot_processes": {
+            "max": max(sampler.dot, default=None),
+            "mean": round(statistics.fmean(sampler.dot), 2) if sampler.dot else None,
+        },
+        "cpu": {
+            "app_cores": round(cpu_self / wall, 2) if wall else None,
+            "dot_cores": round(cpu_children / wall, 2) if wall else None,
+            "cpu_count": os.cpu_count(),
+        },
+        "rss": {
+            "before_mb": round(rss_before / 2**20, 1),
+            "peak_mb": round(rss_peak / 2**20, 1),
+            "per_session_mb": round((rss_peak - rss_before) / 2**20 / sessions, 2),
+            "session_state_kb": round(statistics.fmean(w.memory for w in workers) / 1024, 1),
+        },
+        "errors": len(errors),
+    }
+    if renderers:
+        # Shared by every level run in this process: counters are cumulative
+        record["scheduler"] = renderers[0].scheduler.stats()
+    if errors:
+        record["sample_errors"] = sorted(set(errors))[:5]
+    return record
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m lsc.loadtest", description="Load-test the Albura app with simulated sessions.")
+    parser.add_argument("--sessions", type=int, nargs="+", default=[1, 10, 20, 40], help="concurrency levels to run")
+    parser.add_argument("--actions", type=int, default=20, help="actions per session")
+    parser.add_argument("--think", type=float, default=0.0, help="mean pause between actions (seconds)")
+    parser.add_argument("--files", nargs="+", help=".albura files to load (default: generated documents)")
+    parser.add_argument("--size", type=int, default=2, help="size of generated documents (see lsc.bench)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--timeout", type=float, default=60, help="per-rerun and per-render timeout (seconds)")
+    parser.add_argument("-o", "--out", help="write JSON lines here instead of stdout")
+    args = parser.parse_args(argv)
+
+    documents = _documents(args.files, size=args.size, seed=args.seed)
+    meta = {"python": platform.python_version(), "platform": platform.platform(), "time": time.time()}
+
+    out = open(args.out, "a", encoding="utf-8") if args.out else sys.stdout
+    try:
+        for sessions in args.sessions:
+            record = run_level(sessions, args.actions, documents, args.think, args.seed, args.timeout)
+            out.write(json.dumps({**meta, **record}) + "\n")
+            out.flush()
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,378 @@
+"""Typed diagram model for .albura data, plus accessors for the raw JSON dicts.
+
+``Diagram.from_dict`` validates and normalizes a loaded document once;
+everything downstream (the editor's defaults, ``draw_lsc_tree``) reads plain
+attributes instead of walking the JSON again.
+"""
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Operators available at each layer of the operator projection
+LAYER_OPERATORS = {
+    "NUC": ["Aspect", "Negation", "Directionals"],
+    "CORE": ["Directionals", "Event quantification", "Modality", "Negation"],
+    "CLAUSE": ["Status", "Negation", "Tense", "Evidentiality", "Illocutionary force"],
+}
+
+
+def get_path(data, keys, default=""):
+    """Get a value from diagram data using dot notation keys.
+
+    Examples:
+        get_path(data, "nucleus.text") -> data["nucleus"]["text"]
+        get_path(data, "items_pre") -> data["items_pre"]
+    """
+    if data is None:
+        return default
+
+    result = data
+    for part in keys.split("."):
+        if isinstance(result, dict):
+            result = result.get(part, default)
+        else:
+            return default
+    return result if result is not None else default
+
+
+def sentence_text(data):
+    """Surface words of a diagram in clause order, e.g. for listings and search.
+
+    Affixes and clitics are listed as separate words.
+    """
+    if not isinstance(data, dict):
+        return ""
+
+    def texts(key):
+        items = data.get(key, [])
+        if not isinstance(items, list):
+            return []
+        return [get_path(item, "text") for item in items if isinstance(item, dict)]
+
+    words = [get_path(data, "prdp.text"), get_path(data, "prcs.text")]
+    words += texts("items_pre")
+    if data.get("pred_type") == "copular":
+        words.append(get_path(data, "copula.text"))
+        words += texts("items_between")
+        words.append(get_path(data, "attribute.text"))
+    else:
+        words.append(get_path(data, "nucleus.text"))
+    words += texts("items_post")
+    words += [get_path(data, "pocs.text"), get_path(data, "podp.text")]
+    return " ".join(str(w).strip() for w in words if w and str(w).strip())
+
+
+class DiagramError(ValueError):
+    """Raised when .albura data does not have the expected structure."""
+
+
+def _text(value, where, default=""):
+    if value is None:
+        return default
+    if isinstance(value, str):
+        return value
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return str(value)
+    raise DiagramError(f"{where}: expected text, got {type(value).__name__}")
+
+
+def _object(value, where):
+    if value is None:
+        return {}
+    if not isinstance(value, dict):
+        raise DiagramError(f"{where}: expected an object, got {type(value).__name__}")
+    return value
+
+
+def _list(value, where):
+    if value is None:
+        return []
+    if not isinstance(value, list):
+        raise DiagramError(f"{where}: expected a list, got {type(value).__name__}")
+    return value
+
+
+def _choice(value, where, choices, default):
+    value = _text(value, where, default).strip() or default
+    if value not in choices:
+        # Older files may hold values the editor no longer offers; load them with the default
+        logger.warning("%s: expected one of %s, got %r; using %r", where, ", ".join(choices), value, default)
+        return default
+    return value
+
+
+class Word:
+    """Nucleus, copula or attribute: a word with an optional PoS tag."""
+
+    __slots__ = ("text", "pos")
+
+    def __init__(self, text="", pos=""):
+        self.text = text
+        self.pos = pos
+
+    @classmethod
+    def from_dict(cls, d, where):
+        d = _object(d, where)
+        return cls(_text(d.get("text"), f"{where}.text"), _text(d.get("pos"), f"{where}.pos"))
+
+    def to_dict(self):
+        return {"text": self.text, "pos": self.pos}
+
+
+class Slot:
+    """PrDP/PrCS/PoCS/PoDP: a labelled constituent."""
+
+    __slots__ = ("label", "text", "pos")
+
+    def __init__(self, label="XP", text="", pos=""):
+        self.label = label
+        self.text = text
+        self.pos = pos
+
+    @classmethod
+    def from_dict(cls, d, where):
+        d = _object(d, where)
+        return cls(
+            _text(d.get("label"), f"{where}.label", "XP"),
+            _text(d.get("text"), f"{where}.text"),
+            _text(d.get("pos"), f"{where}.pos"),
+        )
+
+    def to_dict(self):
+        return {"label": self.label, "text": self.text, "pos": self.pos}
+
+
+class Item:
+    """Pre-/post-nuclear (or between AUX and PRED) argument or periphery."""
+
+    __slots__ = ("label", "text", "pos", "conn_type", "arg_type", "morph_form")
+
+    def __init__(self, label="XP", text="", pos="", conn_type="Arg", arg_type="Syntactic", morph_form=""):
+        self.label = label
+        self.text = text
+        self.pos = pos
+        self.conn_type = conn_type
+        self.arg_type = arg_type
+        self.morph_form = morph_form
+
+    @property
+    def is_morph(self):
+        return self.arg_type == "Morphological"
+
+    @property
+    def is_affix(self):
+        # legacy empty morph_form -> treat as Affix
+        return self.is_morph and self.morph_form in ("", "Affix")
+
+    @property
+    def is_clitic(self):
+        return self.is_morph and self.morph_form == "Clitic"
+
+    @classmethod
+    def from_dict(cls, d, where):
+        d = _object(d, where)
+        return cls(
+            _text(d.get("label"), f"{where}.label", "XP"),
+            _text(d.get("text"), f"{where}.text"),
+            _text(d.get("pos"), f"{where}.pos"),
+            _choice(d.get("conn_type"), f"{where}.conn_type", CONN_TYPES, "Arg"),
+            _text(d.get("arg_type"), f"{where}.arg_type").strip(),
+            _text(d.get("morph_form"), f"{where}.morph_form").strip(),
+        )
+
+    def to_dict(self):
+        return {
+            "label": self.label,
+            "text": self.text,
+            "pos": self.pos,
+            "conn_type": self.conn_type,
+            "arg_type": self.arg_type or None,
+            "morph_form": self.morph_form or None,
+        }
+
+
+class ExtraCoreSlot:
+    """Extra-core slot placed left or right of a reference constituent."""
+
+    __slots__ = ("label", "text", "pos", "position", "reference")
+
+    def __init__(self, label="XP", text="", pos="", position="right", reference=""):
+        self.label = label
+        self.text = text
+        self.pos = pos
+        self.position = position
+        self.reference = reference
+
+    @classmethod
+    def from_dict(cls, d, where):
+        d = _object(d, where)
+        return cls(
+            _text(d.get("label"), f"{where}.label", "XP"),
+            _text(d.get("text"), f"{where}.text"),
+            _text(d.get("pos"), f"{where}.pos"),
+            _text(d.get("position"), f"{where}.position").strip().lower() or "right",
+            _text(d.get("reference"), f"{where}.reference").strip(),
+        )
+
+    def to_dict(self):
+        return {
+            "label": self.label,
+            "text": self.text,
+            "pos": self.pos,
+            "position": self.position,
+            "reference": self.reference or None,
+        }
+
+
+class RealizationForm:
+    """Operator realization (affix, particle...) placed next to a reference constituent."""
+
+    __slots__ = ("text", "position", "reference")
+
+    def __init__(self, text="", position="right", reference=""):
+        self.text = text
+        self.position = position
+        self.reference = reference
+
+    @classmethod
+    def from_dict(cls, d, where):
+        d = _object(d, where)
+        return cls(
+            _text(d.get("text"), f"{where}.text").strip(),
+            _text(d.get("position"), f"{where}.position").strip().lower() or "right",
+            _text(d.get("reference"), f"{where}.reference").strip(),
+        )
+
+    def to_dict(self):
+        return {"text": self.text, "position": self.position, "reference": self.reference}
+
+
+class Operator:
+    """Operator at one layer of the operator projection, linked to target constituents."""
+
+    __slots__ = ("operator", "value", "layer", "side", "targets")
+
+    def __init__(self, operator="", value="", layer="NUC", side="Right", targets=()):
+        self.operator = operator
+        self.value = value
+        self.layer = layer
+        self.side = side
+        self.targets = tuple(targets)
+
+    @classmethod
+    def from_dict(cls, d, where):
+        d = _object(d, where)
+        targets = [_text(t, f"{where}.targets[{i}]") for i, t in enumerate(_list(d.get("targets"), f"{where}.targets"))]
+        return cls(
+            _text(d.get("operator"), f"{where}.operator").strip(),
+            _text(d.get("value"), f"{where}.value").strip(),
+            _text(d.get("layer"), f"{where}.layer").strip(),
+            _text(d.get("side"), f"{where}.side").strip() or "Right",
+            [t for t in targets if t],
+        )
+
+    def to_dict(self):
+        return {
+            "operator": self.operator,
+            "value": self.value,
+            "layer": self.layer,
+            "side": self.side,
+            "targets": list(self.targets),
+        }
+
+
+CONN_TYPES = ("Arg", "Peri-Nuc", "Peri-Core", "Peri-Clause")
+PRED_TYPES = ("verbal", "copular")
+SLOTS = ("prdp", "prcs", "pocs", "podp")
+_ITEM_LISTS = {
+    "items_pre": Item,
+    "items_post": Item,
+    "items_between": Item,
+    "extra_core_slots": ExtraCoreSlot,
+    "realization_forms": RealizationForm,
+    "operators": Operator,
+}
+
+
+class Diagram:
+    """Validated, normalized .albura document.
+
+    Missing keys get the editor's defaults; wrong types raise DiagramError
+    with the offending path (e.g. ``items_pre[2].text``). Operators with a
+    missing or unknown layer are dropped, as the editor always did; an
+    unknown ``pred_type`` or ``conn_type`` falls back to the default with a
+    logged warning.
+    ``operators_by_layer`` maps NUC/CORE/CLAUSE to that layer's operators.
+    """
+
+    __slots__ = (
+        "pred_type", "nucleus", "copula", "attribute",
+        "prdp", "prcs", "pocs", "podp",
+        "items_pre", "items_post", "items_between",
+        "extra_core_slots", "realization_forms", "operators", "operators_by_layer",
+    )
+
+    def __init__(self, pred_type="verbal", nucleus=None, copula=None, attribute=None,
+                 prdp=None, prcs=None, pocs=None, podp=None,
+                 items_pre=(), items_post=(), items_between=(),
+                 extra_core_slots=(), realization_forms=(), operators=()):
+        self.pred_type = pred_type
+        self.nucleus = nucleus or Word()
+        self.copula = copula or Word()
+        self.attribute = attribute or Word()
+        self.prdp = prdp or Slot()
+        self.prcs = prcs or Slot()
+        self.pocs = pocs or Slot()
+        self.podp = podp or Slot()
+        self.items_pre = tuple(items_pre)
+        self.items_post = tuple(items_post)
+        self.items_between = tuple(items_between)
+        self.extra_core_slots = tuple(extra_core_slots)
+        self.realization_forms = tuple(realization_forms)
+        self.operators = tuple(operators)
+        self.operators_by_layer = {layer: tuple(op for op in self.operators if op.layer == layer) for layer in LAYER_OPERATORS}
+
+    @classmethod
+    def from_dict(cls, data):
+        if isinstance(data, cls):
+            return data
+        data = _object(data, "diagram")
+        lists = {
+            key: [item_cls.from_dict(d, f"{key}[{i}]") for i, d in enumerate(_list(data.get(key), key))]
+            for key, item_cls in _ITEM_LISTS.items()
+        }
+        # Operators without a known layer were never drawn; drop them rather than reject the file
+        lists["operators"] = [op for op in lists["operators"] if op.layer in LAYER_OPERATORS]
+        return cls(
+            _choice(data.get("pred_type"), "pred_type", PRED_TYPES, "verbal"),
+            *(Word.from_dict(data.get(key), key) for key in ("nucleus", "copula", "attribute")),
+            *(Slot.from_dict(data.get(key), key) for key in SLOTS),
+            **lists,
+        )
+
+    def to_dict(self):
+        """The .albura JSON form, as saved by the editor."""
+        data = {
+            "pred_type": self.pred_type,
+            "nucleus": self.nucleus.to_dict(),
+            "copula": self.copula.to_dict(),
+            "attribute": self.attribute.to_dict(),
+        }
+        for key in SLOTS:
+            data[key] = getattr(self, key).to_dict()
+        for key in _ITEM_LISTS:
+            data[key] = [item.to_dict() for item in getattr(self, key)]
+        return data
+
+    def item(self, key, index):
+        """Element ``index`` of list field ``key``, or a default one past the end."""
+        items = getattr(self, key)
+        return items[index] if index < len(items) else _ITEM_LISTS[key]()
+
+    def operator(self, layer, index):
+        """Operator ``index`` of ``layer``, or a default one past the end."""
+        ops = self.operators_by_layer[layer]
+        return ops[index] if index < len(ops) else Operator(layer=layer)
+
+
+EMPTY_DIAGRAM = Diagram()
@@ -0,0 +1,446 @@
+"""Native LSC layout: coordinates without graphviz, for live preview.
+
+The LSC tree does not need a general layered-graph solver: ``build_lsc_tree``
+already fixes the word order (``LscGraph.bottom``), the left-to-right order
+of the CLAUSE/CORE/NUC rows and the rank=same groups. This engine reads
+those structures plus the node and edge statements of the DOT body and
+places everything directly:
+
+1. ranks: longest path down the constraining edges, rank=same groups
+   sharing one rank (so all words share the bottom row);
+2. words left to right in ``bottom`` order, each node above them centered
+   over its most strongly tied children, nodes below the words (the operator projection)
+   under their parent, and operator labels beside their layer node;
+3. one left-to-right sweep per rank so no two boxes overlap.
+
+Edges are straight lines (the app draws with ``splines=line``) and text
+widths come from Helvetica metrics. The result is a ``lsc.geometry.Layout``,
+so the SVG writer, operator links and exports work on it unchanged. It is
+deterministic and takes milliseconds where dot takes tens of
+milliseconds to seconds; graphviz stays the publication-quality backend.
+The app shows it while dot runs unless ``ALBURA_LIVE_PREVIEW=0``.
+"""
+import math
+import os
+import re
+import unicodedata
+
+from lsc.geometry import POINTS_PER_INCH, EdgeGeometry, Layout, NodeGeometry, _text_runs
+
+# Helvetica advance widths (1/1000 em) for ASCII 32..126
+_HELVETICA = (
+    278, 278, 355, 556, 556, 889, 667, 191, 333, 333, 389, 584, 278, 333, 278, 278,
+    556, 556, 556, 556, 556, 556, 556, 556, 556, 556, 278, 278, 584, 584, 584, 556,
+    1015, 667, 667, 722, 722, 667, 611, 778, 722, 278, 500, 667, 556, 833, 722, 778,
+    667, 778, 722, 667, 611, 722, 667, 944, 667, 667, 611, 278, 278, 278, 469, 556,
+    333, 556, 556, 500, 556, 556, 278, 556, 556, 222, 222, 500, 222, 833, 556, 556,
+    556, 556, 333, 500, 278, 556, 500, 722, 500, 500, 500, 334, 260, 334, 584,
+)
+# graphviz's default node margin (inches) around plaintext labels
+_MARGIN_X = 0.11 * POINTS_PER_INCH
+_MARGIN_Y = 0.055 * POINTS_PER_INCH
+_SUBSCRIPT_SCALE = 0.7
+_ARROW_LENGTH = 10.0
+_ARROW_HALF_WIDTH = 4.0
+_BOLD, _ITALIC, _SUPERSCRIPT, _SUBSCRIPT = 1, 2, 8, 16
+
+PREVIEW_ENV = "ALBURA_LIVE_PREVIEW"
+
+_TOKEN = re.compile(r'"(?:[^"\\]|\\.)*"|->|[\[\]=,;{}]|[^\s\[\]=,;{}"<]+|<')
+
+
+def preview_enabled():
+    """True unless live preview is switched off in the environment."""
+    return os.environ.get(PREVIEW_ENV, "").strip().lower() not in ("0", "false", "no", "off")
+
+
+def text_width(text, size):
+    """Advance width of ``text`` in Helvetica at ``size`` points."""
+    total = 0
+    for ch in text:
+        code = ord(ch)
+        if 32 <= code <= 126:
+            total += _HELVETICA[code - 32]
+        elif unicodedata.combining(ch):
+            continue
+        elif unicodedata.east_asian_width(ch) in ("W", "F"):
+            total += 1000
+        else:
+            # Accented Latin letters take their base letter's width
+            base = unicodedata.normalize("NFD", ch)[0]
+            total += _HELVETICA[ord(base) - 32] if 32 <= ord(base) <= 126 else 556
+    return total * size / 1000
+
+
+# ---------------------------------------------------------------------------
+# DOT body (as written by the graphviz package: one statement per line)
+# ---------------------------------------------------------------------------
+def _tokens(line):
+    tokens = []
+    pos = 0
+    while pos < len(line):
+        match = _TOKEN.search(line, pos)
+        if match is None:
+            break
+        if match.group() == "<":
+            # HTML label: balanced angle brackets
+            depth, end = 0, match.start()
+            while end < len(line):
+                depth += {"<": 1, ">": -1}.get(line[end], 0)
+                end += 1
+                if depth == 0:
+                    break
+            tokens.append(line[match.start():end])
+            pos = end
+        else:
+            tokens.append(match.group())
+            pos = match.end()
+    return tokens
+
+
+def _unquote(token):
+    if token.startswith('"') and token.endswith('"'):
+        return re.sub(r"\\(.)", lambda m: " " if m.group(1) in "nlr" else m.group(1), token[1:-1])
+    return token
+
+
+def _attrs(tokens):
+    """``key=value`` pairs from the tokens inside ``[...]`` (or a bare statement).
+
+    HTML-like values (``<...>``) are stored without their outer brackets and
+    flagged with a ``"<key>:html"`` entry.
+    """
+    attrs = {}
+    for i in range(len(tokens) - 2):
+        if tokens[i + 1] != "=" or tokens[i] == "=":
+            continue
+        key, value = _unquote(tokens[i]), tokens[i + 2]
+        if value.startswith("<"):
+            attrs[key] = value[1:-1]
+            attrs[f"{key}:html"] = True
+        else:
+            attrs[key] = _unquote(value)
+    return attrs
+
+
+def _endpoint(token):
+    name, _, port = _unquote(token).partition(":")
+    return name, port
+
+
+def parse_body(body):
+    """Nodes, edges, rank=same groups and defaults of a ``graphviz.Digraph`` body.
+
+    Returns ``(graph_attrs, defaults, nodes, edges, groups)`` where
+    ``defaults`` maps "node"/"edge" to default attrs, ``nodes`` maps id ->
+    attrs, ``edges`` is a list of ``(tail, tail_port, head, head_port,
+    attrs)`` and ``groups`` is a list of rank=same node-id lists.
+    """
+    graph_attrs, defaults = {}, {"node": {}, "edge": {}}
+    nodes, edges, groups = {}, [], []
+    stack = []  # open subgraphs: [is_rank_same, members]
+    for line in body:
+        tokens = _tokens(line)
+        if not tokens:
+            continue
+        if tokens[0] == "{":
+            stack.append([False, []])
+            continue
+        if tokens[0] == "}":
+            rank_same, members = stack.pop()
+            if rank_same and members:
+                groups.append(members)
+            continue
+        attrs = _attrs(tokens[tokens.index("[") + 1:-1]) if "[" in tokens else {}
+        if "->" in tokens:
+            tail, tail_port = _endpoint(tokens[0])
+            head, head_port = _endpoint(tokens[2])
+            edges.append((tail, tail_port, head, head_port, attrs))
+            for name in (tail, head):
+                nodes.setdefault(name, {})
+                if stack:
+                    stack[-1][1].append(name)
+        elif tokens[0] in ("graph", "node", "edge") and "[" in tokens:
+            defaults.setdefault(tokens[0], {}).update(attrs)
+            if tokens[0] == "graph":
+                graph_attrs.update(attrs)
+        elif "=" in tokens and "[" not in tokens:
+            values = _attrs(tokens)
+            if stack and values.get("rank") == "same":
+                stack[-1][0] = True
+            elif not stack:
+                graph_attrs.update(values)
+        else:
+            name = _unquote(tokens[0])
+            nodes.setdefault(name, {}).update(attrs)
+            if stack:
+                stack[-1][1].append(name)
+    return graph_attrs, defaults, nodes, edges, groups
+
+
+# ---------------------------------------------------------------------------
+# Labels
+# ---------------------------------------------------------------------------
+def _label_runs(label, size, html=False):
+    """``[(text, size, flags), ...]`` for a plain or HTML-like label."""
+    if not html:
+        return [(label, size, 0)]
+    runs = []
+    flags = 0
+    for tag, text in re.findall(r"(<[^>]*>)|([^<]+)", label):
+        if text:
+            scaled = size * _SUBSCRIPT_SCALE if flags & (_SUBSCRIPT | _SUPERSCRIPT) else size
+            runs.append((text, scaled, flags))
+            continue
+        name = tag.strip("</>").split()[0].lower() if tag.strip("</>") else ""
+        bit = {"sub": _SUBSCRIPT, "sup": _SUPERSCRIPT, "b": _BOLD, "i": _ITALIC}.get(name, 0)
+        flags = flags & ~bit if tag.startswith("</") else flags | bit
+    return runs
+
+
+def _label_ops(runs, face, cx, cy, size):
+    """Draw operations for label ``runs`` centered on ``(cx, cy)`` (y down)."""
+    widths = [text_width(text, run_size) for text, run_size, _ in runs]
+    baseline = cy + size * 0.3
+    ops = [{"op": "c", "grad": "none", "color": "#000000"}]
+    if len(runs) == 1:
+        text, run_size, flags = runs[0]
+        ops.append({"op": "F", "size": run_size, "face": face})
+        ops.append({"op": "T", "pt": [cx, baseline], "align": "c", "width": widths[0], "text": text})
+        return ops
+    x = cx - sum(widths) / 2
+    for (text, run_size, flags), width in zip(runs, widths):
+        ops.append({"op": "F", "size": run_size, "face": face})
+        ops.append({"op": "t", "fontchar": flags})
+        ops.append({"op": "T", "pt": [x, baseline], "align": "l", "width": width, "text": text})
+        x += width
+    return ops
+
+
+# ---------------------------------------------------------------------------
+# Layout
+# ---------------------------------------------------------------------------
+def _inches(value, default):
+    try:
+        return float(value) * POINTS_PER_INCH
+    except (TypeError, ValueError):
+        return default
+
+
+class _Groups:
+    """Union-find over rank=same groups."""
+
+    def __init__(self, groups):
+        self.parent = {}
+        for members in groups:
+            for name in members:
+                self.union(members[0], name)
+
+    def find(self, name):
+        root = self.parent.setdefault(name, name)
+        while root != self.parent[root]:
+            root = self.parent[root]
+        while name != root:
+            self.parent[name], name = root, self.parent[name]
+        return root
+
+    def union(self, a, b):
+        ra, rb = self.find(a), self.find(b)
+        if ra != rb:
+            self.parent[rb] = ra
+
+
+def _port_point(box, port):
+    x, y, w, h = box
+    return {
+        "s": (x, y + h / 2),
+        "n": (x, y - h / 2),
+        "e": (x + w / 2, y),
+        "w": (x - w / 2, y),
+    }.get(port, (x, y))
+
+
+def _arrow(tip, tail):
+    """Shortened line end and ``vee`` arrowhead polygon pointing at ``tip``."""
+    dx, dy = tip[0] - tail[0], tip[1] - tail[1]
+    length = math.hypot(dx, dy) or 1.0
+    ux, uy = dx / length, dy / length
+    vx, vy = -uy, ux
+    back = (tip[0] - ux * _ARROW_LENGTH, tip[1] - uy * _ARROW_LENGTH)
+    notch = (tip[0] - ux * _ARROW_LENGTH * 0.65, tip[1] - uy * _ARROW_LENGTH * 0.65)
+    polygon = [
+        [back[0] + vx * _ARROW_HALF_WIDTH, back[1] + vy * _ARROW_HALF_WIDTH],
+        list(tip),
+        [back[0] - vx * _ARROW_HALF_WIDTH, back[1] - vy * _ARROW_HALF_WIDTH],
+        list(notch),
+    ]
+    return notch, polygon
+
+
+def native_layout(graph):
+    """Lay out an ``lsc.graph.LscGraph`` and return a ``lsc.geometry.Layout``."""
+    graph_attrs, defaults, node_attrs, edges, groups = parse_body(graph.dot.body)
+    node_defaults = defaults["node"]
+    nodesep = _inches(graph_attrs.get("nodesep"), 0.25 * POINTS_PER_INCH)
+    ranksep = _inches(graph_attrs.get("ranksep"), 0.5 * POINTS_PER_INCH)
+    min_width = _inches(node_defaults.get("width"), 0.75 * POINTS_PER_INCH)
+    min_height = _inches(node_defaults.get("height"), 0.5 * POINTS_PER_INCH)
+
+    # Node boxes
+    labels = {}
+    size = {}
+    for name, attrs in node_attrs.items():
+        attrs = {**node_defaults, **attrs}
+        font_size = float(attrs.get("fontsize", 14))
+        runs = _label_runs(attrs.get("label", name), font_size, attrs.get("label:html", False))
+        text = sum(text_width(t, s) for t, s, _ in runs)
+        labels[name] = (runs, attrs.get("fontname", "Times-Roman"), font_size)
+        size[name] = (max(min_width, text + 2 * _MARGIN_X), max(min_height, font_size * 1.2 + 2 * _MARGIN_Y))
+
+    groups_uf = _Groups(groups)
+    for name in node_attrs:
+        groups_uf.find(name)
+    members = {}
+    for name in node_attrs:
+        members.setdefault(groups_uf.find(name), []).append(name)
+
+    # Ranks: longest path over constraining edges; flat (same-group) edges excluded
+    parents = {name: [] for name in node_attrs}
+    children = {name: [] for name in node_attrs}
+    flat = []
+    for tail, _, head, _, attrs in edges:
+        same = groups_uf.find(tail) == groups_uf.find(head)
+        if same and attrs.get("style") == "invis":
+            flat.append((tail, head, int(attrs.get("minlen", 1))))
+            continue
+        if attrs.get("constraint") == "false" or same:
+            continue
+        parents[head].append((tail, int(attrs.get("minlen", 1))))
+        if attrs.get("style") != "invis":
+            children[tail].append((float(attrs.get("weight", 1)), head))
+
+    group_rank = {}
+
+    def rank_of(name):
+        root = groups_uf.find(name)
+        if root in group_rank:
+            return group_rank[root] if group_rank[root] is not None else 0
+        group_rank[root] = None  # cycle guard
+        best = 0
+        for member in members[root]:
+            for parent, minlen in parents[member]:
+                best = max(best, rank_of(parent) + minlen)
+        group_rank[root] = best
+        return best
+
+    rank = {name: rank_of(name) for name in node_attrs}
+    by_rank = {}
+    for name in node_attrs:
+        by_rank.setdefault(rank[name], []).append(name)
+
+    # y: each rank as tall as its tallest node, ranksep apart
+    center_y = {}
+    y = 0.0
+    for r in sorted(by_rank):
+        height = max(size[n][1] for n in by_rank[r])
+        for n in by_rank[r]:
+            center_y[n] = y + height / 2
+        y += height + ranksep
+    total_height = y - ranksep
+
+    # x: words in order, then ancestors over their children, the rest under their parents
+    x = {}
+    words = list(dict.fromkeys(n for n in graph.bottom + graph.terminals if n in node_attrs))
+    right = 0.0
+    for n in words:
+        x[n] = right + size[n][0] / 2
+        right += size[n][0] + nodesep
+
+    placing = set()
+
+    def place_over(name):
+        if name in x:
+            return x[name]
+        if name in placing:
+            return None
+        placing.add(name)
+        # Centered over the children it is most strongly tied to (the spine
+        # and label-over-word chains have weight 100, side branches 1)
+        placed = [(w, v) for w, v in ((w, place_over(c)) for w, c in children[name]) if v is not None]
+        if placed:
+            heaviest = max(w for w, _ in placed)
+            xs = [v for w, v in placed if w == heaviest]
+            x[name] = (min(xs) + max(xs)) / 2
+        return x.get(name)
+
+    for name in node_attrs:
+        place_over(name)
+    # Nodes held only by flat edges (operator labels) go beside their partner
+    beside = {}
+    for tail, head, minlen in flat:
+        for node, partner, sign in ((head, tail, 1), (tail, head, -1)):
+            beside.setdefault(rank[node], []).append((node, partner, sign, minlen))
+    for r in sorted(by_rank):
+        for name in by_rank[r]:
+            if name not in x:
+                placed = [x[p] for p, _ in parents[name] if p in x]
+                if placed:
+                    x[name] = sum(placed) / len(placed)
+        for node, partner, sign, minlen in beside.get(r, ()):
+            if node not in x and partner in x:
+                gap = (size[node][0] + size[partner][0]) / 2 + minlen * nodesep
+                x[node] = x[partner] + sign * gap
+
+    # Any leftover (disconnected) nodes: after everything else on their rank
+    for name in node_attrs:
+        if name not in x:
+            same_rank = [x[n] + size[n][0] / 2 for n in by_rank[rank[name]] if n in x]
+            x[name] = (max(same_rank) if same_rank else 0.0) + nodesep + size[name][0] / 2
+
+    # Remove overlaps rank by rank, keeping each rank's order (rows from the graph win ties)
+    row_order = {}
+    for row in graph.rows.values():
+        for i, n in enumerate(row):
+            row_order[n] = i
+    for r, names in by_rank.items():
+        names.sort(key=lambda n: (x[n], row_order.get(n, 0)))
+        for left, name in zip(names, names[1:]):
+            x[name] = max(x[name], x[left] + (size[left][0] + size[name][0]) / 2 + nodesep)
+
+    min_x = min(x[n] - size[n][0] / 2 for n in node_attrs) if node_attrs else 0.0
+    nodes = {}
+    boxes = {}
+    for name in node_attrs:
+        w, h = size[name]
+        cx, cy = x[name] - min_x, center_y[name]
+        boxes[name] = (cx, cy, w, h)
+        runs, face, font_size = labels[name]
+        ops = _label_ops(runs, face, cx, cy, font_size)
+        nodes[name] = NodeGeometry(name, cx, cy, w, h, "".join(t for t, _, _ in runs), _text_runs(ops), ops)
+
+    layout_edges = []
+    for tail, tail_port, head, head_port, attrs in edges:
+        attrs = {**defaults["edge"], **attrs}
+        if attrs.get("style") == "invis":
+            continue
+        start = _port_point(boxes[tail], tail_port)
+        end = _port_point(boxes[head], head_port)
+        draw = [{"op": "c", "grad": "none", "color": "#000000"}]
+        width = attrs.get("penwidth", "1")
+        draw.append({"op": "S", "style": f"setlinewidth({width})"})
+        head_draw = []
+        if attrs.get("arrowhead") == "vee":
+            line_end, polygon = _arrow(end, start)
+            head_draw = [
+                {"op": "S", "style": "solid"},
+                {"op": "c", "grad": "none", "color": "#000000"},
+                {"op": "C", "grad": "none", "color": "#000000"},
+                {"op": "P", "points": polygon},
+            ]
+            end = line_end
+        draw.append({"op": "B", "points": [list(start), list(start), list(end), list(end)]})
+        layout_edges.append(EdgeGeometry(tail, head, draw, head_draw))
+
+    max_x = max((b[0] + b[2] / 2 for b in boxes.values()), default=0.0)
+    return Layout((0.0, 0.0, max_x, max(total_height, 0.0)), nodes, layout_edges)
+
@@ -0,0 +1,105 @@
+"""Order-maintenance sequence for the bottom (terminal) row of the LSC."""
+
+
+class OrderedSequence:
+    """Doubly linked sequence of unique hashable items with order labels.
+
+    Every item carries an integer label that increases along the sequence,
+    so membership, ``position()`` comparisons and inserting next to a known
+    item are all O(1). Inserting into a gap that has run out of room
+    relabels the whole sequence, which happens at most once every ~32
+    inserts at the same spot.
+
+    Positions are only meaningful relative to each other: use them as sort
+    keys or compare them, never as list indices.
+    """
+
+    _GAP = 1 << 32
+
+    def __init__(self, items=()):
+        self._label = {}
+        self._prev = {}
+        self._next = {}
+        self._head = None
+        self._tail = None
+        for item in items:
+            self.append(item)
+
+    def __len__(self):
+        return len(self._label)
+
+    def __contains__(self, item):
+        return item in self._label
+
+    def __iter__(self):
+        item = self._head
+        while item is not None:
+            yield item
+            item = self._next[item]
+
+    def __repr__(self):
+        return f"{type(self).__name__}({list(self)!r})"
+
+    def position(self, item, default=None):
+        """Order key of ``item`` (or ``default`` if absent)."""
+        return self._label.get(item, default)
+
+    def append(self, item):
+        self._check_new(item)
+        if self._tail is None:
+            self._link(item, None, None, 0)
+        else:
+            self._link(item, self._tail, None, self._label[self._tail] + self._GAP)
+
+    def insert_before(self, ref, item):
+        """Insert ``item`` immediately before ``ref``."""
+        self._check_new(item)
+        prev = self._prev[ref]
+        if prev is None:
+            self._link(item, None, ref, self._label[ref] - self._GAP)
+        else:
+            self._insert_between(prev, ref, item)
+
+    def insert_after(self, ref, item):
+        """Insert ``item`` immediately after ``ref``."""
+        self._check_new(item)
+        nxt = self._next[ref]
+        if nxt is None:
+            self._link(item, ref, None, self._label[ref] + self._GAP)
+        else:
+            self._insert_between(ref, nxt, item)
+
+    def pairs(self):
+        """Yield consecutive ``(item, next_item)`` pairs in order."""
+        item = self._head
+        while item is not None and self._next[item] is not None:
+            yield item, self._next[item]
+            item = self._next[item]
+
+    def _check_new(self, item):
+        if item in self._label:
+            raise ValueError(f"{item!r} is already in the sequence")
+
+    def _insert_between(self, prev, nxt, item):
+        low, high = self._label[prev], self._label[nxt]
+        if high - low < 2:
+            self._relabel()
+            low, high = self._label[prev], self._label[nxt]
+        self._link(item, prev, nxt, (low + high) // 2)
+
+    def _link(self, item, prev, nxt, label):
+        self._label[item] = label
+        self._prev[item] = prev
+        self._next[item] = nxt
+        if prev is None:
+            self._head = item
+        else:
+            self._next[prev] = item
+        if nxt is None:
+            self._tail = item
+        else:
+            self._prev[nxt] = item
+
+    def _relabel(self):
+        for i, item in enumerate(self):
+            self._label[item] = i * self._GAP
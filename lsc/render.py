@@ -0,0 +1,110 @@
+"""End-to-end rendering pipeline: data dict -> graphviz -> final SVG/PNG/PDF/EPS.
+
+Everything here is a pure function of its arguments, so it can be called
+concurrently from threads or worker processes.
+"""
+from lsc.export import Drawing, check_format, export_drawing
+from lsc.graph import build_lsc_tree
+from lsc.geometry import parse_layout, stitch_layouts
+from lsc.layout import LayoutBudgetExceeded, layout
+from lsc.svg import finalize_svg
+from lsc.trace import NULL_TRACE
+
+
+def render_drawing(data, trace=NULL_TRACE, budget=None, draft=False):
+    """Run the full pipeline (graph build, dot layout, SVG writing).
+
+    ``data`` is a ``lsc.model.Diagram`` or a raw .albura dict (validated on
+    the way in; raises ``DiagramError`` if malformed). Returns a
+    ``lsc.export.Drawing`` that every export format is produced from. Stage
+    timings go to ``trace`` (see lsc.trace). ``budget`` (a
+    ``lsc.layout.LayoutBudget``) bounds dot; ``draft`` uses the draft preset
+    of ``draw_lsc_tree``.
+
+    The constituent and operator projections are laid out as separate
+    graphs, one after the other, and stitched on the nucleus word: dot's cost
+    grows faster than linearly with the graph, and the operator links are
+    routed over the stitched layout anyway. They run on the calling thread so
+    a render scheduler worker never has more than one dot process.
+    """
+    with trace.stage("build") as record:
+        tree = build_lsc_tree(data, draft)
+        graphs = [graph for graph in tree.split() if graph is not None]
+        sources = []
+        for graph in graphs:
+            graph.attr(dpi="72")
+            sources.append(graph.source)
+        record["dot_chars"] = sum(len(source) for source in sources)
+
+    with trace.stage("layout") as record:
+        layouts = [layout(source, "json", budget) for source in sources]
+        record["json_bytes"] = sum(len(json_bytes) for json_bytes in layouts)
+        record["graphs"] = len(layouts)
+
+    with trace.stage("postprocess") as record:
+        try:
+            geometry = parse_layout(layouts[0])
+            for json_bytes in layouts[1:]:
+                geometry = stitch_layouts(geometry, parse_layout(json_bytes), tree.anchor)
+        except (ValueError, KeyError):
+            # unexpected JSON: fall back to graphviz's own SVG writer on the whole graph
+            tree.dot.attr(dpi="72")
+            svg = layout(tree.dot.source, "svg", budget).decode("utf-8")
+            drawing = Drawing(*finalize_svg(svg, tree.connections, pad=10), draft=draft)
+        else:
+            drawing = Drawing.from_layout(geometry, tree.connections, pad=10, draft=draft)
+        if trace:
+            record["svg_bytes"] = len(drawing.svg_code.encode("utf-8"))
+
+    return drawing
+
+
+def render_within_budget(data, budget, trace=NULL_TRACE):
+    """Render within ``budget``, falling back to a draft layout if dot overruns it.
+
+    Returns a ``Drawing`` whose ``draft`` flag says which layout it holds.
+    Raises ``LayoutBudgetExceeded`` if even the draft does not fit.
+    """
+    try:
+        return render_drawing(data, trace, budget)
+    except LayoutBudgetExceeded as e:
+        trace.note("budget", f"{e.reason} exceeded, draft layout")
+        return render_drawing(data, trace, budget, draft=True)
+
+
+def render_preview(data, trace=NULL_TRACE):
+    """Lay out with ``lsc.native_layout`` instead of dot: fast, approximate, no graphviz binary."""
+    from lsc.native_layout import native_layout
+
+    with trace.stage("build") as record:
+        graph = build_lsc_tree(data)
+        record["dot_lines"] = len(graph.dot.body)
+
+    with trace.stage("native_layout") as record:
+        geometry = native_layout(graph)
+        record["nodes"] = len(geometry.nodes)
+
+    with trace.stage("postprocess"):
+        return Drawing.from_layout(geometry, graph.connections, pad=10, engine="native")
+
+
+def render_svg(data, trace=NULL_TRACE):
+    """Like ``render_drawing`` but returns ``(svg_code, svg_view)``: the
+    exportable SVG and its size-less on-screen variant."""
+    drawing = render_drawing(data, trace)
+    return drawing.svg_code, drawing.svg_view
+
+
+def convert_svg(svg_code, fmt, dpi=300):
+    """Convert final SVG to ``fmt`` with cairosvg: str for "svg", bytes otherwise.
+
+    Prefer ``lsc.export.export_drawing``, which paints from the layout instead.
+    """
+    check_format(fmt)
+    return export_drawing(Drawing(svg_code, None), fmt, dpi)
+
+
+def render(data, fmt="svg", dpi=300):
+    """Render an .albura ``data`` dict to ``fmt`` ("svg", "png", "pdf" or "eps")."""
+    check_format(fmt)
+    return export_drawing(render_drawing(data), fmt, dpi)
@@ -0,0 +1,191 @@
+"""Process-wide render scheduler: bounded concurrency, fair queueing, dedup.
+
+Streamlit runs every session's script on its own thread, so without a
+limit each edit anywhere on the server may start its own ``dot`` (and
+cairo) job. ``RenderScheduler`` runs jobs on a fixed number of worker
+threads (``per_core`` per CPU by default) and queues the rest:
+
+* one queue per session, served round-robin, so a session that submits a
+  burst of jobs cannot starve the others;
+* jobs are keyed (the app uses the content hash): a job whose key is
+  already queued or running is not started again, its caller just gets
+  another future for the same result;
+* ``stats()`` reports queue depth, running jobs and wait/run times.
+
+``submit`` returns a ``concurrent.futures.Future`` per caller. Cancelling
+it detaches that caller; the job itself is dropped from the queue once
+nobody waits for it any more (a job that already started runs to the end).
+"""
+import itertools
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import Future
+
+from lsc.trace import percentiles
+
+
+class _Job:
+    __slots__ = ("key", "session", "fn", "args", "waiters", "queued_at", "started_at")
+
+    def __init__(self, key, session, fn, args):
+        self.key = key
+        self.session = session
+        self.fn = fn
+        self.args = args
+        self.waiters = []
+        self.queued_at = time.perf_counter()
+        self.started_at = None
+
+
+def default_workers(per_core=1):
+    """Worker count for ``per_core`` concurrent jobs per CPU (at least one)."""
+    return max(1, int((os.cpu_count() or 1) * per_core))
+
+
+class RenderScheduler:
+    """Runs keyed jobs on ``max_workers`` threads, fairly across sessions."""
+
+    def __init__(self, max_workers=None, per_core=1, window=1024, thread_name_prefix="albura-render"):
+        self.max_workers = max_workers or default_workers(per_core)
+        self._lock = threading.Condition()
+        self._queues = OrderedDict()  # session -> deque of queued jobs, in round-robin order
+        self._jobs = {}  # key -> queued or running job
+        self._running = 0
+        self._shutdown = False
+        self._waits = deque(maxlen=window)
+        self._runs = deque(maxlen=window)
+        self.submitted = 0
+        self.deduplicated = 0
+        self.completed = 0
+        self.failed = 0
+        self.dropped = 0
+        self.peak_depth = 0
+        self._threads = []
+        self._names = itertools.count()
+        self._prefix = thread_name_prefix
+
+    def submit(self, session, key, fn, *args):
+        """Queue ``fn(*args)`` for ``session`` unless a job for ``key`` is already pending.
+
+        ``session`` is any hashable token identifying the caller's session
+        (fairness unit); ``key`` identifies the result, so equal keys must
+        mean equal results. Returns a future for this caller.
+        """
+        waiter = Future()
+        with self._lock:
+            if self._shutdown:
+                raise RuntimeError("cannot submit after shutdown")
+            self.submitted += 1
+            job = self._jobs.get(key)
+            if job is not None:
+                self.deduplicated += 1
+                if job.started_at is not None:
+                    waiter.set_running_or_notify_cancel()
+            else:
+                job = self._jobs[key] = _Job(key, session, fn, args)
+                self._queues.setdefault(session, deque()).append(job)
+                self.peak_depth = max(self.peak_depth, self._depth())
+                self._spawn()
+                self._lock.notify()
+            job.waiters.append(waiter)
+        waiter.add_done_callback(lambda f: self._detach(job, f))
+        return waiter
+
+    def _depth(self):
+        return sum(len(queue) for queue in self._queues.values())
+
+    def _spawn(self):
+        # Threads are started lazily, up to max_workers
+        if len(self._threads) < self.max_workers and len(self._threads) < self._running + self._depth():
+            thread = threading.Thread(
+                target=self._work, name=f"{self._prefix}_{next(self._names)}", daemon=True
+            )
+            self._threads.append(thread)
+            thread.start()
+
+    def _detach(self, job, waiter):
+        if not waiter.cancelled():
+            return
+        with self._lock:
+            if waiter in job.waiters:
+                job.waiters.remove(waiter)
+            if job.waiters or job.started_at is not None:
+                return
+            queue = self._queues.get(job.session)
+            if queue is not None and job in queue:
+                queue.remove(job)
+                if not queue:
+                    del self._queues[job.session]
+                del self._jobs[job.key]
+                self.dropped += 1
+
+    def _next_job(self):
+        """Pop the next job, taking sessions in turn (caller holds the lock)."""
+        session, queue = next(iter(self._queues.items()))
+        job = queue.popleft()
+        del self._queues[session]
+        if queue:
+            self._queues[session] = queue  # back of the line
+        return job
+
+    def _work(self):
+        while True:
+            with self._lock:
+                while not self._queues and not self._shutdown:
+                    self._lock.wait()
+                if not self._queues:
+                    return
+                job = self._next_job()
+                job.started_at = time.perf_counter()
+                self._waits.append((job.started_at - job.queued_at) * 1000)
+                self._running += 1
+                # Running futures can no longer be cancelled; drop those that already were
+                job.waiters = [w for w in job.waiters if w.set_running_or_notify_cancel()]
+            try:
+                result = job.fn(*job.args)
+            except BaseException as e:
+                error = e
+            else:
+                error = None
+            with self._lock:
+                self._running -= 1
+                self._runs.append((time.perf_counter() - job.started_at) * 1000)
+                del self._jobs[job.key]
+                if error is None:
+                    self.completed += 1
+                else:
+                    self.failed += 1
+                waiters = job.waiters  # including callers that joined while it ran
+            for waiter in waiters:
+                if error is None:
+                    waiter.set_result(result)
+                else:
+                    waiter.set_exception(error)
+
+    def shutdown(self, wait=True):
+        """Stop accepting jobs; workers exit once the queue is drained."""
+        with self._lock:
+            self._shutdown = True
+            self._lock.notify_all()
+        if wait:
+            for thread in self._threads:
+                thread.join()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "max_workers": self.max_workers,
+                "running": self._running,
+                "queue_depth": self._depth(),
+                "peak_depth": self.peak_depth,
+                "sessions_waiting": len(self._queues),
+                "submitted": self.submitted,
+                "deduplicated": self.deduplicated,
+                "completed": self.completed,
+                "failed": self.failed,
+                "dropped": self.dropped,
+                "wait": percentiles(list(self._waits)),
+                "run": percentiles(list(self._runs)),
+            }
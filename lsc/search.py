@@ -0,0 +1,413 @@
+"""Inverted index and feature queries over a corpus of diagrams.
+
+Usage::
+
+    python -m lsc.search corpus/ -q "op:EVID@CLAUSE"
+    python -m lsc.search corpus/ -q "post.morph:clitic" --index corpus.idx.json
+
+Every document is reduced to a set of feature strings ``key:value``
+(lower-cased values), e.g. ``word:ran``, ``prcs.label:pp``,
+``post.morph:clitic``, ``op:evid@clause``, ``slot:prcs``. A query is a
+space-separated list of terms that must all match; ``a|b`` inside one term
+matches either value and a leading ``-`` excludes documents. Values may end
+in ``*`` for a prefix match, e.g. ``word:ka*``.
+
+Sources are .albura files and .albundle bundles (one document per entry);
+``refresh`` re-reads only the files whose mtime or size changed. A
+``CorpusIndex`` may be shared between threads (the app keeps one per
+corpus folder for every session).
+"""
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from pathlib import Path
+
+from lsc.bundle import BUNDLE_SUFFIX, BundleReader
+from lsc.graph import OP_ABBR
+from lsc.model import sentence_text
+
+INDEX_VERSION = 2
+CORPUS_ENV = "ALBURA_CORPUS_DIR"
+DEFAULT_CORPUS_DIR = "corpus"
+
+# Where each single constituent lives in the data, keyed by feature prefix
+_SINGLE = ("nucleus", "copula", "attribute", "prdp", "prcs", "pocs", "podp")
+_LISTS = {
+    "items_pre": "pre",
+    "items_post": "post",
+    "items_between": "between",
+    "extra_core_slots": "excs",
+    "realization_forms": "real",
+}
+_FIELDS = {
+    "text": "word",
+    "pos": "pos",
+    "label": "label",
+    "conn_type": "conn",
+    "arg_type": "arg",
+    "morph_form": "morph",
+    "position": "position",
+}
+
+
+def _norm(value):
+    return " ".join(str(value).split()).lower()
+
+
+def _drawn(item):
+    """Whether the renderer draws ``item`` (it skips constituents without text)."""
+    return isinstance(item, dict) and _norm(item.get("text") or "") != ""
+
+
+def _constituent_features(features, where, item):
+    if not _drawn(item):
+        return
+    for field, key in _FIELDS.items():
+        value = item.get(field)
+        if value in (None, ""):
+            continue
+        value = _norm(value)
+        features.add(f"{key}:{value}")
+        features.add(f"{where}.{key}:{value}")
+
+
+def document_features(data):
+    """Feature strings for one .albura ``data`` dict (see module docstring)."""
+    features = set()
+    if not isinstance(data, dict):
+        return features
+
+    pred_type = data.get("pred_type") or "verbal"
+    features.add(f"pred:{_norm(pred_type)}")
+
+    for where in _SINGLE:
+        item = data.get(where)
+        if where in ("copula", "attribute") and pred_type != "copular":
+            continue
+        if where == "nucleus" and pred_type == "copular":
+            continue
+        _constituent_features(features, where, item)
+        if where not in ("nucleus", "copula", "attribute") and _drawn(item):
+            features.add(f"slot:{where}")
+
+    for key, where in _LISTS.items():
+        items = data.get(key)
+        if not isinstance(items, list):
+            continue
+        for item in items:
+            _constituent_features(features, where, item)
+        if any(_drawn(item) for item in items):
+            features.add(f"slot:{where}")
+
+    for op in data.get("operators", []) or []:
+        if not isinstance(op, dict):
+            continue
+        layer = _norm(op.get("layer", ""))
+        names = {_norm(op.get("operator", ""))}
+        if op.get("operator") in OP_ABBR:
+            names.add(_norm(OP_ABBR[op["operator"]]))
+        names.discard("")
+        for name in names:
+            features.add(f"op:{name}")
+            if layer:
+                features.add(f"op:{name}@{layer}")
+        if layer:
+            features.add(f"op.layer:{layer}")
+        if op.get("value"):
+            features.add(f"op.value:{_norm(op['value'])}")
+        if op.get("side"):
+            features.add(f"op.side:{_norm(op['side'])}")
+        if op.get("targets"):
+            features.add("op:linked")
+
+    return features
+
+
+class QueryError(ValueError):
+    """Raised for malformed query strings."""
+
+
+def parse_query(query):
+    """Split a query into ``[(negated, [alternatives...]), ...]``."""
+    terms = []
+    for raw in query.split():
+        negated = raw.startswith("-")
+        if negated:
+            raw = raw[1:]
+        key, sep, values = raw.partition(":")
+        if not sep or not key or not values:
+            raise QueryError(f"Expected key:value, got {raw!r}")
+        terms.append((negated, [f"{key.lower()}:{value.lower()}" for value in values.split("|") if value]))
+    return terms
+
+
+class DocRecord:
+    """What the index remembers about one source document."""
+
+    __slots__ = ("key", "path", "entry", "sentence", "pred_type", "features")
+
+    def __init__(self, key, path, entry, sentence, pred_type, features):
+        self.key = key
+        self.path = path
+        self.entry = entry
+        self.sentence = sentence
+        self.pred_type = pred_type
+        self.features = frozenset(features)
+
+    def to_dict(self):
+        return {
+            "key": self.key,
+            "path": self.path,
+            "entry": self.entry,
+            "sentence": self.sentence,
+            "pred_type": self.pred_type,
+            "features": sorted(self.features),
+        }
+
+    @classmethod
+    def from_dict(cls, d):
+        return cls(d["key"], d["path"], d.get("entry"), d.get("sentence", ""), d.get("pred_type", ""), d["features"])
+
+    def load(self):
+        """Read the document itself back from its source."""
+        if self.entry is not None:
+            with BundleReader(self.path) as reader:
+                return reader.load(self.entry)
+        with open(self.path, encoding="utf-8") as f:
+            return json.load(f)
+
+
+class CorpusIndex:
+    """Inverted index (feature -> document keys) with incremental refresh.
+
+    Document keys are the file path, or ``path#entry`` for bundle entries.
+    Public methods hold the index's lock, so one index can be refreshed and
+    searched from several threads; read ``docs`` through ``records``.
+    """
+
+    def __init__(self):
+        self.docs = {}
+        self.postings = {}
+        self._stamps = {}
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        with self._lock:
+            return len(self.docs)
+
+    def add(self, record):
+        """Index ``record``, replacing any previous document with the same key."""
+        with self._lock:
+            self.remove(record.key)
+            self.docs[record.key] = record
+            for feature in record.features:
+                self.postings.setdefault(feature, set()).add(record.key)
+
+    def records(self, keys):
+        """``DocRecord``s for ``keys``, skipping documents no longer indexed."""
+        with self._lock:
+            return [self.docs[key] for key in keys if key in self.docs]
+
+    def remove(self, key):
+        with self._lock:
+            record = self.docs.pop(key, None)
+            if record is None:
+                return
+            for feature in record.features:
+                keys = self.postings.get(feature)
+                if keys is not None:
+                    keys.discard(key)
+                    if not keys:
+                        del self.postings[feature]
+
+    def _index_file(self, path):
+        if path.endswith(BUNDLE_SUFFIX):
+            with BundleReader(path) as reader:
+                for entry in reader:
+                    data = reader.load(entry.id)
+                    self.add(
+                        DocRecord(f"{path}#{entry.id}", path, entry.id, entry.sentence, entry.pred_type, document_features(data))
+                    )
+            return
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        self.add(DocRecord(path, path, None, sentence_text(data), data.get("pred_type", ""), document_features(data)))
+
+    def _drop_file(self, path):
+        if path.endswith(BUNDLE_SUFFIX):
+            for key in [key for key, record in self.docs.items() if record.path == path]:
+                self.remove(key)
+        else:
+            self.remove(path)
+        self._stamps.pop(path, None)
+
+    def refresh(self, paths):
+        """Bring the index in line with ``paths`` (the current source files).
+
+        Only new or changed files (by mtime and size) are re-read; files no
+        longer listed are dropped. Returns ``{"added", "updated", "removed",
+        "errors"}`` counts plus the list of unreadable files.
+        """
+        with self._lock:
+            return self._refresh(paths)
+
+    def _refresh(self, paths):
+        stats = {"added": 0, "updated": 0, "removed": 0, "errors": []}
+        current = set()
+        for path in paths:
+            path = str(path)
+            current.add(path)
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            stamp = (st.st_mtime_ns, st.st_size)
+            previous = self._stamps.get(path)
+            if previous == stamp:
+                continue
+            if previous is not None:
+                self._drop_file(path)
+            try:
+                self._index_file(path)
+            except (OSError, ValueError) as e:
+                stats["errors"].append(f"{path}: {e}")
+                continue
+            self._stamps[path] = stamp
+            stats["updated" if previous is not None else "added"] += 1
+
+        for path in [path for path in self._stamps if path not in current]:
+            self._drop_file(path)
+            stats["removed"] += 1
+        return stats
+
+    def _match(self, alternative):
+        if alternative.endswith("*"):
+            prefix = alternative[:-1]
+            found = set()
+            for feature, keys in self.postings.items():
+                if feature.startswith(prefix):
+                    found |= keys
+            return found
+        return self.postings.get(alternative, set())
+
+    def search(self, query):
+        """Keys of documents matching ``query``, sorted. Raises QueryError."""
+        terms = parse_query(query)
+        with self._lock:
+            return self._search(terms)
+
+    def _search(self, terms):
+        positive, negative = [], []
+        for negated, alternatives in terms:
+            keys = set()
+            for alternative in alternatives:
+                keys |= self._match(alternative)
+            (negative if negated else positive).append(keys)
+
+        if positive:
+            positive.sort(key=len)
+            result = set(positive[0])
+            for keys in positive[1:]:
+                result &= keys
+                if not result:
+                    break
+        else:
+            result = set(self.docs)
+        for keys in negative:
+            result -= keys
+        return sorted(result)
+
+    def features(self, prefix=""):
+        """Indexed features (optionally starting with ``prefix``) with document counts."""
+        with self._lock:
+            return sorted((f, len(keys)) for f, keys in self.postings.items() if f.startswith(prefix))
+
+    def save(self, path):
+        with self._lock:
+            payload = {
+                "version": INDEX_VERSION,
+                "stamps": {p: list(stamp) for p, stamp in self._stamps.items()},
+                "docs": [record.to_dict() for record in self.docs.values()],
+            }
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(payload, f, ensure_ascii=False)
+
+    @classmethod
+    def load(cls, path):
+        """Load a saved index; a missing or outdated file gives an empty index."""
+        index = cls()
+        try:
+            with open(path, encoding="utf-8") as f:
+                payload = json.load(f)
+        except (OSError, ValueError):
+            return index
+        if payload.get("version") != INDEX_VERSION:
+            return index
+        for d in payload.get("docs", []):
+            index.add(DocRecord.from_dict(d))
+        index._stamps = {p: tuple(stamp) for p, stamp in payload.get("stamps", {}).items()}
+        return index
+
+
+def corpus_root():
+    """The folder the app may search in (``ALBURA_CORPUS_DIR``, default ``corpus``), resolved."""
+    return os.path.realpath(os.environ.get(CORPUS_ENV) or DEFAULT_CORPUS_DIR)
+
+
+def resolve_corpus_dir(subdir, root=None):
+    """Resolve ``subdir`` inside ``root`` (default ``corpus_root()``).
+
+    Raises ValueError if it points outside ``root`` (``..``, absolute
+    paths, symlinks).
+    """
+    root = os.path.realpath(root or corpus_root())
+    path = os.path.realpath(os.path.join(root, subdir.strip()))
+    if os.path.commonpath([root, path]) != root:
+        raise ValueError(f"{subdir!r} is outside the corpus folder")
+    return path
+
+
+def corpus_sources(patterns):
+    """.albura files and .albundle bundles under ``patterns`` (files, dirs or globs)."""
+    from lsc.batch import collect_inputs
+
+    sources = set(collect_inputs(patterns))
+    for pattern in patterns:
+        path = Path(pattern)
+        if path.is_dir():
+            sources.update(path.rglob(f"*{BUNDLE_SUFFIX}"))
+    return sorted(sources)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m lsc.search", description="Query a corpus of Albura diagrams.")
+    parser.add_argument("corpus", nargs="+", help="files, directories or glob patterns")
+    parser.add_argument("-q", "--query", required=True)
+    parser.add_argument("--index", help="saved index to refresh and reuse (JSON)")
+    args = parser.parse_args(argv)
+
+    index = CorpusIndex.load(args.index) if args.index else CorpusIndex()
+    stats = index.refresh(corpus_sources(args.corpus))
+    if args.index:
+        index.save(args.index)
+    for error in stats["errors"]:
+        print(f"skipped {error}", file=sys.stderr)
+
+    start = time.perf_counter()
+    try:
+        keys = index.search(args.query)
+    except QueryError as e:
+        print(e, file=sys.stderr)
+        return 2
+    elapsed = (time.perf_counter() - start) * 1000
+    for record in index.records(keys):
+        print(f"{record.key}\t{record.sentence}")
+    print(f"{len(keys)} of {len(index)} documents ({elapsed:.2f} ms)", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
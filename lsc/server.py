@@ -0,0 +1,289 @@
+"""Local HTTP render service for .albura documents.
+
+Usage::
+
+    python -m lsc.server --port 8765
+    curl --data-binary @tree.albura "http://127.0.0.1:8765/render?format=pdf" -o tree.pdf
+
+Endpoints:
+
+* ``POST /render?format=svg|png|pdf|eps&dpi=300``: the body is an .albura
+  JSON document; the response is the diagram. ``format`` defaults to svg and
+  ``dpi`` only matters for PNG.
+* ``GET /health``: JSON with the scheduler and cache statistics.
+
+The service runs the same pipeline as the app (``draw_lsc_tree``, dot,
+``lsc.export``) on a ``RenderScheduler``, so at most ``--workers`` renders
+run at once and identical concurrent requests render once. Responses are
+cached by content: the ETag is the hash of the normalized diagram plus the
+format (and dpi), so a request whose ``If-None-Match`` lists that tag is
+answered with 304 before anything is rendered, POST included (see
+``etag_matches``). Requests beyond ``--max-pending``
+get 503, and renders slower than ``--timeout`` get 504 (dot itself is
+stopped at that point too).
+
+It only needs the standard library (asyncio streams, one request per
+connection). ``RenderService.handle`` takes and returns plain values, so it
+can be exercised without opening a socket.
+"""
+import argparse
+import asyncio
+import json
+import sys
+from urllib.parse import parse_qs, urlsplit
+
+from lsc.cache import RenderCache, canonical_hash
+from lsc.export import FORMATS, MIME_TYPES, VECTOR_FORMATS, export_drawing
+from lsc.layout import LayoutBudget, LayoutBudgetExceeded, budget_from_env
+from lsc.model import Diagram, DiagramError
+from lsc.render import render_drawing
+from lsc.scheduler import RenderScheduler
+
+MAX_BODY = 1 << 20  # bytes
+_REASONS = {
+    200: "OK",
+    304: "Not Modified",
+    400: "Bad Request",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    408: "Request Timeout",
+    413: "Payload Too Large",
+    500: "Internal Server Error",
+    503: "Service Unavailable",
+    504: "Gateway Timeout",
+}
+
+
+class Response:
+    __slots__ = ("status", "headers", "body")
+
+    def __init__(self, status, body=b"", headers=None):
+        self.status = status
+        self.body = body.encode("utf-8") if isinstance(body, str) else body
+        self.headers = dict(headers or {})
+
+
+def _error(status, message, **headers):
+    return Response(status, json.dumps({"error": message}), {"Content-Type": "application/json", **headers})
+
+
+def etag_matches(if_none_match, etag, method="GET"):
+    """True if an ``If-None-Match`` header value matches ``etag`` (weak comparison).
+
+    A listed tag matches for any method. Answering such a POST with 304 is
+    a deliberate cache shortcut outside RFC 9110 (which makes a non-GET/HEAD
+    match a 412): a render is a pure function of the request, so a client
+    that sends the tag already holds the response. ``*`` names no
+    response, so it only counts for GET and HEAD, as the RFC has it.
+    """
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return method in ("GET", "HEAD")
+    candidates = (tag.strip() for tag in if_none_match.split(","))
+    return etag in (tag[2:] if tag.startswith("W/") else tag for tag in candidates)
+
+
+class RenderService:
+    """Routes requests, validates documents and runs renders on a scheduler.
+
+    ``render(diagram, fmt, dpi, revision)`` produces the response body; the default
+    lays the diagram out once per content hash and exports each format
+    from that layout, with dot held to ``timeout`` (plus the memory cap
+    from ``ALBURA_LAYOUT_MEMORY_MB``) so a timed-out request does not leave
+    a layout running.
+    """
+
+    def __init__(self, scheduler=None, timeout=30.0, max_pending=64, cache_size=256, render=None):
+        self.scheduler = scheduler or RenderScheduler(thread_name_prefix="albura-server")
+        self.timeout = timeout
+        self.max_pending = max_pending
+        self.responses = RenderCache(maxsize=cache_size)
+        self.drawings = RenderCache(maxsize=max(1, cache_size // 2))
+        self._render = render or self._render_payload
+        self.pending = 0
+        self.timeouts = 0
+        self.rejected = 0
+
+    def _render_payload(self, diagram, fmt, dpi, revision):
+        budget = LayoutBudget(self.timeout, budget_from_env().memory_mb)
+        drawing = self.drawings.get_or_render(revision, lambda: render_drawing(diagram, budget=budget))
+        return export_drawing(drawing, fmt, dpi)
+
+    async def handle(self, method, target, headers, body, client=None):
+        """Answer one request; ``headers`` has lower-case names. Returns a ``Response``.
+
+        ``client`` (e.g. the peer address) is the scheduler's fairness unit.
+        """
+        url = urlsplit(target)
+        if url.path == "/health":
+            if method != "GET":
+                return _error(405, "use GET", Allow="GET")
+            return Response(200, json.dumps(self.stats()), {"Content-Type": "application/json"})
+        if url.path != "/render":
+            return _error(404, f"no such endpoint: {url.path}")
+        if method != "POST":
+            return _error(405, "use POST with an .albura document as the body", Allow="POST")
+
+        query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        fmt = query.get("format", "svg").lower()
+        if fmt not in FORMATS:
+            return _error(400, f"unsupported format {fmt!r}; expected one of {', '.join(FORMATS)}")
+        try:
+            dpi = int(query.get("dpi", 300))
+        except ValueError:
+            return _error(400, "dpi must be an integer")
+        if not 10 <= dpi <= 2400:
+            return _error(400, "dpi must be between 10 and 2400")
+
+        try:
+            diagram = Diagram.from_dict(json.loads(body.decode("utf-8")))
+        except (UnicodeDecodeError, json.JSONDecodeError) as e:
+            return _error(400, f"body is not JSON: {e}")
+        except DiagramError as e:
+            return _error(400, f"invalid .albura document: {e}")
+
+        revision = canonical_hash(diagram.to_dict())
+        key = (revision, fmt, None if fmt in VECTOR_FORMATS else dpi)
+        etag = '"{}-{}"'.format(revision[:32], fmt if key[2] is None else f"{fmt}-{dpi}")
+        cache_headers = {"ETag": etag, "Cache-Control": "no-cache"}
+        if etag_matches(headers.get("if-none-match"), etag, method):
+            return Response(304, b"", cache_headers)
+
+        payload = self.responses.get(key)
+        if payload is None:
+            if self.pending >= self.max_pending:
+                self.rejected += 1
+                return _error(503, "too many renders in progress", **{"Retry-After": "1"})
+            self.pending += 1
+            try:
+                future = self.scheduler.submit(client, key, self._render, diagram, fmt, dpi, revision)
+                payload = await asyncio.wait_for(asyncio.wrap_future(future), self.timeout)
+            except asyncio.TimeoutError:
+                self.timeouts += 1
+                return _error(504, f"render took longer than {self.timeout:g}s")
+            except LayoutBudgetExceeded as e:
+                if e.reason != "time":
+                    return _error(500, f"render failed: {e}")
+                self.timeouts += 1
+                return _error(504, f"render took longer than {self.timeout:g}s")
+            except Exception as e:
+                return _error(500, f"render failed: {e}")
+            finally:
+                self.pending -= 1
+            if isinstance(payload, str):
+                payload = payload.encode("utf-8")
+            self.responses.put(key, payload)
+
+        content_type = MIME_TYPES[fmt] + ("; charset=utf-8" if fmt == "svg" else "")
+        return Response(200, payload, {"Content-Type": content_type, **cache_headers})
+
+    def stats(self):
+        return {
+            "pending": self.pending,
+            "timeouts": self.timeouts,
+            "rejected": self.rejected,
+            "responses": self.responses.stats(),
+            "drawings": self.drawings.stats(),
+            "scheduler": self.scheduler.stats(),
+        }
+
+
+async def _read_request(reader, max_body):
+    """Parse one HTTP/1.x request: ``(method, target, headers, body)``; raises ``ValueError``."""
+    request_line = (await reader.readline()).decode("latin-1").strip()
+    parts = request_line.split()
+    if len(parts) != 3 or not parts[2].startswith("HTTP/1."):
+        raise ValueError("malformed request line")
+    method, target, _ = parts
+
+    headers = {}
+    while True:
+        line = (await reader.readline()).decode("latin-1")
+        if line in ("\r\n", "\n", ""):
+            break
+        name, sep, value = line.partition(":")
+        if not sep:
+            raise ValueError("malformed header")
+        headers[name.strip().lower()] = value.strip()
+
+    length = int(headers.get("content-length", 0) or 0)
+    if length > max_body:
+        raise OverflowError(length)
+    body = await reader.readexactly(length) if length else b""
+    return method.upper(), target, headers, body
+
+
+class RenderServer:
+    """Serves a ``RenderService`` over HTTP/1.1 with asyncio streams."""
+
+    def __init__(self, service, max_body=MAX_BODY, read_timeout=10.0):
+        self.service = service
+        self.max_body = max_body
+        self.read_timeout = read_timeout
+
+    async def _on_connection(self, reader, writer):
+        try:
+            try:
+                method, target, headers, body = await asyncio.wait_for(
+                    _read_request(reader, self.max_body), self.read_timeout
+                )
+            except asyncio.TimeoutError:
+                response = _error(408, "request not received in time")
+            except OverflowError:
+                response = _error(413, f"body larger than {self.max_body} bytes")
+            except (ValueError, asyncio.IncompleteReadError):
+                response = _error(400, "malformed HTTP request")
+            else:
+                client = (writer.get_extra_info("peername") or ("local",))[0]
+                response = await self.service.handle(method, target, headers, body, client)
+            await self._write(writer, response)
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    @staticmethod
+    async def _write(writer, response):
+        lines = [f"HTTP/1.1 {response.status} {_REASONS.get(response.status, '')}"]
+        headers = {**response.headers, "Content-Length": str(len(response.body)), "Connection": "close"}
+        lines += [f"{name}: {value}" for name, value in headers.items()]
+        writer.write(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1"))
+        if response.status != 304:
+            writer.write(response.body)
+        await writer.drain()
+
+    async def start(self, host="127.0.0.1", port=8765):
+        """Start listening and return the ``asyncio.Server`` (port 0 picks a free port)."""
+        return await asyncio.start_server(self._on_connection, host, port)
+
+    async def serve_forever(self, host="127.0.0.1", port=8765):
+        server = await self.start(host, port)
+        address = server.sockets[0].getsockname()
+        print(f"Serving .albura renders on http://{address[0]}:{address[1]}/render", file=sys.stderr)
+        async with server:
+            await server.serve_forever()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m lsc.server", description="Serve .albura renders over HTTP.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--workers", type=int, help="concurrent renders (default: one per CPU)")
+    parser.add_argument("--timeout", type=float, default=30.0, help="per-request render timeout (seconds)")
+    parser.add_argument("--max-pending", type=int, default=64, help="render requests in flight before 503")
+    parser.add_argument("--cache-size", type=int, default=256, help="rendered responses kept in memory")
+    args = parser.parse_args(argv)
+
+    scheduler = RenderScheduler(max_workers=args.workers, thread_name_prefix="albura-server")
+    service = RenderService(scheduler, args.timeout, args.max_pending, args.cache_size)
+    try:
+        asyncio.run(RenderServer(service).serve_forever(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        scheduler.shutdown(wait=False)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""Per-session editor state: widget key generations and memory accounting.
+
+Editor widgets are keyed ``<name>_<form_id>``; loading a file or starting
+a new diagram moves to the next ``form_id`` so every widget starts afresh
+from the loaded data. ``next_form`` deletes the keys of the generation it
+leaves, so a session keeps at most one generation of widget values no
+matter how many files it opens. ``state`` is ``st.session_state`` or any
+mutable mapping.
+"""
+import sys
+from collections import deque
+
+FORM_ID = "form_id"
+FORM_KEYS = "form_keys"
+LOADED_DATA = "loaded_data"
+
+
+def form_key(state, base_name):
+    """Widget key for ``base_name`` in the current generation (recorded for ``next_form``)."""
+    key = f"{base_name}_{state[FORM_ID]}"
+    keys = state.get(FORM_KEYS)
+    if keys is None:
+        keys = state[FORM_KEYS] = set()
+    keys.add(key)
+    return key
+
+
+def next_form(state, loaded=None):
+    """Start a new widget generation hydrated from ``loaded`` (``None`` for a blank form).
+
+    Returns the number of stale widget keys purged.
+    """
+    purged = 0
+    for key in state.get(FORM_KEYS) or ():
+        if key in state:
+            del state[key]
+            purged += 1
+    state[FORM_KEYS] = set()
+    state[LOADED_DATA] = loaded
+    state[FORM_ID] = state.get(FORM_ID, 0) + 1
+    return purged
+
+
+def deep_sizeof(obj, seen=None):
+    """Approximate bytes held by ``obj`` and everything it references.
+
+    Follows containers, instance ``__dict__``/``__slots__`` and buffers;
+    objects whose id is in ``seen`` (e.g. server-wide resources) are skipped.
+    """
+    seen = set() if seen is None else seen
+    total = 0
+    pending = deque([obj])
+    while pending:
+        obj = pending.popleft()
+        if id(obj) in seen or isinstance(obj, type) or type(obj).__name__ in ("module", "function", "method"):
+            continue
+        seen.add(id(obj))
+        try:
+            total += sys.getsizeof(obj)
+        except TypeError:
+            continue
+        if isinstance(obj, (str, bytes, bytearray, int, float, bool)) or obj is None:
+            continue
+        if isinstance(obj, dict):
+            pending.extend(obj.keys())
+            pending.extend(obj.values())
+        elif isinstance(obj, (list, tuple, set, frozenset, deque)):
+            pending.extend(obj)
+        elif isinstance(obj, memoryview):
+            pending.append(obj.obj)
+        else:
+            if hasattr(obj, "__dict__"):
+                pending.append(vars(obj))
+            for cls in type(obj).__mro__:
+                for name in getattr(cls, "__slots__", ()):
+                    if isinstance(name, str) and hasattr(obj, name):
+                        pending.append(getattr(obj, name))
+    return total
+
+
+def session_memory(state, shared=()):
+    """``[(key, bytes), ...]`` for every entry of ``state``, largest first.
+
+    Objects in ``shared`` (caches, worker pools) belong to the server, not
+    the session, and are not counted.
+    """
+    seen = {id(obj) for obj in shared}
+    report = []
+    for key in list(state.keys()):
+        try:
+            value = state[key]
+        except KeyError:
+            continue
+        report.append((key, deep_sizeof(value, seen)))
+    report.sort(key=lambda item: item[1], reverse=True)
+    return report
@@ -0,0 +1,257 @@
+"""SVG post-processing for graphviz output: operator links and viewBox padding."""
+import re
+import xml.etree.ElementTree as ET
+
+SVG_NS = "http://www.w3.org/2000/svg"
+XLINK_NS = "http://www.w3.org/1999/xlink"
+
+_G = f"{{{SVG_NS}}}g"
+_TITLE = f"{{{SVG_NS}}}title"
+_TEXT = f"{{{SVG_NS}}}text"
+_PATH = f"{{{SVG_NS}}}path"
+
+# Registered once at import; ET keeps this in a process-wide table.
+ET.register_namespace("", SVG_NS)
+ET.register_namespace("xlink", XLINK_NS)
+
+_LEADING_NUMBER = re.compile(r"^\s*([0-9.]+)")
+_SIZE_ATTR = re.compile(r'\s(width|height)="[^"]*"')
+
+LINK_STYLE = {
+    "stroke": "black",
+    "stroke-width": "0.8",
+    "stroke-dasharray": "5,3",
+    "fill": "none",
+}
+
+
+def index_nodes(root):
+    """Map node id -> approximate text bbox in a single pass over the SVG tree."""
+    index = {}
+    for g in root.iter(_G):
+        if g.get("class") != "node":
+            continue
+        title = g.find(_TITLE)
+        if title is None or title.text in index:
+            continue
+        text_elem = g.find(_TEXT)
+        if text_elem is None:
+            continue
+        x = float(text_elem.get("x", 0))
+        y = float(text_elem.get("y", 0))
+        text_content = text_elem.text or ""
+        width = len(text_content) * 7
+        height = 14
+        index[title.text] = {
+            "x": x,
+            "y": y,
+            "width": width,
+            "height": height,
+            "cx": x,
+            "cy": y - height * 0.35,
+        }
+    return index
+
+
+def _find_graph_group(root):
+    for g in root.iter(_G):
+        if g.get("class") == "graph":
+            return g
+    return root.find(f".//{_G}")
+
+
+def _viewbox(root):
+    vb = root.get("viewBox")
+    if vb:
+        parts = vb.strip().split()
+        if len(parts) == 4:
+            return tuple(map(float, parts))
+    return None
+
+
+def _n(value):
+    return round(value, 2)
+
+
+def operator_link_paths(connections, index, min_x=0.0, max_x=0.0):
+    """Compute dashed operator-link paths from a node bbox index.
+
+    Returns ``(paths, extra_left, extra_right)`` where ``paths`` is a list of
+    SVG path ``d`` strings and the extras are the horizontal padding needed to
+    keep every path inside the original ``[min_x, max_x]`` extent.
+    """
+    paths = []
+    min_x_used = min_x
+    max_x_used = max_x
+
+    for conn in connections:
+        target_ids = conn.get("target_node_ids", [])
+        side = conn["side"]
+        layer = conn.get("layer", "NUC")
+
+        if not target_ids:
+            continue
+
+        lbl_bbox = index.get(conn["lbl_id"])
+        if lbl_bbox is None:
+            continue
+
+        target_bboxes = [index[tid] for tid in target_ids if tid in index]
+        if not target_bboxes:
+            continue
+
+        if side == "Left":
+            p1_x = lbl_bbox["cx"] - lbl_bbox["width"] / 2 - 2
+        else:
+            p1_x = lbl_bbox["cx"] + lbl_bbox["width"] / 2 + 2
+        p1_y = lbl_bbox["cy"]
+
+        if layer == "CLAUSE":
+            distance = 10
+        elif layer == "CORE":
+            distance = 8
+        else:
+            distance = 5
+
+        if side == "Left":
+            p2_x = p1_x - distance
+        else:
+            p2_x = p1_x + distance
+        p2_y = p1_y
+
+        p3_x = p2_x
+        avg_target_y = sum(tb["cy"] for tb in target_bboxes) / len(target_bboxes)
+        p3_y = p2_y - distance if avg_target_y < p2_y else p2_y + distance
+
+        paths.append(f"M {_n(p1_x)},{_n(p1_y)} L {_n(p2_x)},{_n(p2_y)} L {_n(p3_x)},{_n(p3_y)}")
+
+        min_x_used = min(min_x_used, p1_x, p2_x, p3_x)
+        max_x_used = max(max_x_used, p1_x, p2_x, p3_x)
+
+        for tb in target_bboxes:
+            # extra clearance so the line does not visually touch the letters
+            offset = (tb.get("height", 14) * 0.25) + 8
+
+            p4_x = tb["cx"]
+            p4_y = tb["cy"] + offset if tb["cy"] < p3_y else tb["cy"] - offset
+
+            paths.append(f"M {_n(p3_x)},{_n(p3_y)} L {_n(p4_x)},{_n(p4_y)}")
+
+            min_x_used = min(min_x_used, p4_x)
+            max_x_used = max(max_x_used, p4_x)
+
+    extra_left = max(0, min_x - min_x_used + 20)
+    extra_right = max(0, max_x_used - max_x + 20)
+    return paths, extra_left, extra_right
+
+
+def _append_paths(graph_g, paths):
+    for d in paths:
+        elem = ET.SubElement(graph_g, _PATH)
+        elem.set("d", d)
+        for attr, value in LINK_STYLE.items():
+            elem.set(attr, value)
+
+
+def _padded_attrs(vb, w_attr, h_attr, pad_left, pad_right, pad_top, pad_bottom):
+    """New root viewBox/width/height values after padding the viewBox ``vb``."""
+    x, y, w, h = vb
+    attrs = {
+        "viewBox": f"{x - pad_left:.2f} {y - pad_top:.2f} {w + pad_left + pad_right:.2f} {h + pad_top + pad_bottom:.2f}"
+    }
+
+    if w_attr:
+        m = _LEADING_NUMBER.match(w_attr)
+        if m:
+            attrs["width"] = f"{float(m.group(1)) + pad_left + pad_right:.2f}pt"
+    if h_attr:
+        m = _LEADING_NUMBER.match(h_attr)
+        if m:
+            attrs["height"] = f"{float(m.group(1)) + pad_top + pad_bottom:.2f}pt"
+    return attrs
+
+
+def _pad_root(root, pad_left, pad_right, pad_top, pad_bottom):
+    vb = _viewbox(root)
+    if vb is None:
+        return False
+
+    attrs = _padded_attrs(vb, root.get("width"), root.get("height"), pad_left, pad_right, pad_top, pad_bottom)
+    for name, value in attrs.items():
+        root.set(name, value)
+    return True
+
+
+def display_variant(svg_code):
+    """Strip the root width/height so the browser scales the SVG to its box."""
+    start = svg_code.find("<svg")
+    if start < 0:
+        return svg_code
+    end = svg_code.find(">", start)
+    if end < 0:
+        return svg_code
+    root_tag = _SIZE_ATTR.sub("", svg_code[start:end])
+    return svg_code[:start] + root_tag + svg_code[end:]
+
+
+def finalize_svg(svg_code, connections, pad=10):
+    """Single post-processing stage for graphviz SVG output.
+
+    Parses once, indexes node geometry, appends the dashed operator links,
+    pads the viewBox (at least ``pad`` on every side, more horizontally if
+    links stick out) and serializes once. Returns ``(svg_code, svg_view)``
+    where ``svg_view`` is the size-less variant used for on-screen display.
+    """
+    try:
+        root = ET.fromstring(svg_code)
+    except ET.ParseError:
+        return svg_code, display_variant(svg_code)
+
+    extra_left = extra_right = 0
+    if connections:
+        graph_g = _find_graph_group(root)
+        if graph_g is not None:
+            vb = _viewbox(root)
+            min_x, max_x = (vb[0], vb[0] + vb[2]) if vb else (0, 0)
+            paths, extra_left, extra_right = operator_link_paths(connections, index_nodes(root), min_x, max_x)
+            _append_paths(graph_g, paths)
+
+    _pad_root(root, max(pad, extra_left), max(pad, extra_right), pad, pad)
+
+    svg_code = ET.tostring(root, encoding="unicode")
+    return svg_code, display_variant(svg_code)
+
+
+def postprocess_svg_with_connections(svg_code, connections, ref_to_node):
+    """Append operator links to ``svg_code``; returns ``(svg, extra_left, extra_right)``."""
+    if not connections:
+        return svg_code, 0, 0
+
+    try:
+        root = ET.fromstring(svg_code)
+    except ET.ParseError:
+        return svg_code, 0, 0
+
+    graph_g = _find_graph_group(root)
+    if graph_g is None:
+        return svg_code, 0, 0
+
+    vb = _viewbox(root)
+    min_x, max_x = (vb[0], vb[0] + vb[2]) if vb else (0, 0)
+    paths, extra_left, extra_right = operator_link_paths(connections, index_nodes(root), min_x, max_x)
+    _append_paths(graph_g, paths)
+
+    return ET.tostring(root, encoding="unicode"), extra_left, extra_right
+
+
+def expand_svg_viewbox(svg_code, pad_left=0, pad_right=0, pad_top=0, pad_bottom=0):
+    """Grow the SVG viewBox (and width/height) by the given padding in points."""
+    try:
+        root = ET.fromstring(svg_code)
+    except ET.ParseError:
+        return svg_code
+
+    if not _pad_root(root, pad_left, pad_right, pad_top, pad_bottom):
+        return svg_code
+
+    return ET.tostring(root, encoding="unicode")
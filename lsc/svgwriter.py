@@ -0,0 +1,247 @@
+"""Compact SVG writer driven by graphviz layout geometry.
+
+Replaces graphviz's own SVG output plus post-processing: the drawing
+operations of a ``lsc.geometry.Layout`` (nodes, visible edges, arrowheads)
+and the dashed operator links are written in one pass into a list of
+strings that is joined once. Coordinates stay in the layout frame, so no
+transform group is needed, and every node and edge gets a stable id derived
+from its name (``n-<node>``, ``e-<tail>-<head>``).
+"""
+from xml.sax.saxutils import escape, quoteattr
+
+from lsc.svg import LINK_STYLE, operator_link_paths
+
+# graphviz adds this many points around the drawing
+GRAPH_PAD = 4
+
+# CSS font-family lists for graphviz font names
+FONT_FAMILIES = {
+    "Helvetica": "Helvetica,sans-Serif",
+    "Arial": "Arial,sans-Serif",
+    "Times-Roman": "Times,serif",
+    "Courier": "Courier,monospace",
+}
+_ANCHORS = {"l": "start", "c": "middle", "r": "end"}
+# Bits of the xdraw "t" (font characteristics) operation
+BOLD, ITALIC, UNDERLINE, SUPERSCRIPT, SUBSCRIPT = 1, 2, 4, 8, 16
+
+
+def _f(value):
+    """Shortest fixed-point form with at most two decimals."""
+    text = f"{value:.2f}".rstrip("0").rstrip(".")
+    return "0" if text in ("", "-0") else text
+
+
+def _points(points):
+    return " ".join(f"{_f(x)},{_f(y)}" for x, y in points)
+
+
+def _paint(color):
+    """Split a graphviz color into an SVG paint and optional opacity."""
+    if not color:
+        return "none", None
+    if color.startswith("#") and len(color) == 9:
+        alpha = int(color[7:], 16) / 255
+        if alpha == 0:
+            return "none", None
+        return color[:7], None if alpha == 1 else round(alpha, 3)
+    return color, None
+
+
+class _Painter:
+    """Interprets graphviz (x)draw operations into SVG elements."""
+
+    def __init__(self, out):
+        self.out = out
+        self.pen = "#000000"
+        self.fill = "#000000"
+        self.width = 1.0
+        self.dash = None
+        self.invisible = False
+        self.size = 14.0
+        self.face = "Times-Roman"
+        self.flags = 0
+
+    def _stroke_attrs(self):
+        paint, opacity = _paint(self.pen)
+        attrs = f' stroke="{paint}"'
+        if opacity is not None:
+            attrs += f' stroke-opacity="{opacity}"'
+        if self.width != 1.0:
+            attrs += f' stroke-width="{_f(self.width)}"'
+        if self.dash:
+            attrs += f' stroke-dasharray="{self.dash}"'
+        return attrs
+
+    def _fill_attrs(self, filled):
+        if not filled:
+            return ' fill="none"'
+        paint, opacity = _paint(self.fill)
+        attrs = f' fill="{paint}"'
+        if opacity is not None:
+            attrs += f' fill-opacity="{opacity}"'
+        return attrs
+
+    def _style(self, style):
+        if style.startswith("setlinewidth("):
+            self.width = float(style[len("setlinewidth("):-1])
+        elif style == "dashed":
+            self.dash = "5,2"
+        elif style == "dotted":
+            self.dash = "1,5"
+        elif style == "solid":
+            self.dash = None
+        elif style == "invis":
+            self.invisible = True
+
+    def paint(self, ops):
+        out = self.out
+        for op in ops:
+            kind = op.get("op")
+            if kind == "c":
+                self.pen = op.get("color", self.pen)
+            elif kind == "C":
+                self.fill = op.get("color", self.fill)
+            elif kind == "S":
+                self._style(op.get("style", ""))
+            elif kind == "F":
+                self.size = float(op.get("size", self.size))
+                self.face = op.get("face", self.face)
+            elif kind == "t":
+                self.flags = int(op.get("fontchar", 0))
+            elif self.invisible:
+                continue
+            elif kind in ("B", "b"):
+                pts = op["points"]
+                d = f"M{_f(pts[0][0])},{_f(pts[0][1])}C" + _points(pts[1:])
+                out.append(f'<path d="{d}"{self._fill_attrs(kind == "b")}{self._stroke_attrs()}/>')
+            elif kind in ("P", "p"):
+                out.append(f'<polygon points="{_points(op["points"])}"{self._fill_attrs(kind == "P")}{self._stroke_attrs()}/>')
+            elif kind == "L":
+                out.append(f'<polyline points="{_points(op["points"])}" fill="none"{self._stroke_attrs()}/>')
+            elif kind in ("E", "e"):
+                x, y, rx, ry = op["rect"]
+                out.append(
+                    f'<ellipse cx="{_f(x)}" cy="{_f(y)}" rx="{_f(rx)}" ry="{_f(ry)}"'
+                    f'{self._fill_attrs(kind == "E")}{self._stroke_attrs()}/>'
+                )
+            elif kind == "T":
+                self._text(op)
+
+    def _text(self, op):
+        x, y = op["pt"]
+        attrs = (
+            f' text-anchor="{_ANCHORS.get(op.get("align"), "middle")}" x="{_f(x)}" y="{_f(y)}"'
+            f' font-family="{FONT_FAMILIES.get(self.face, self.face)}" font-size="{_f(self.size)}"'
+        )
+        if self.flags & BOLD:
+            attrs += ' font-weight="bold"'
+        if self.flags & ITALIC:
+            attrs += ' font-style="italic"'
+        if self.flags & UNDERLINE:
+            attrs += ' text-decoration="underline"'
+        if self.flags & SUBSCRIPT:
+            attrs += ' baseline-shift="sub"'
+        elif self.flags & SUPERSCRIPT:
+            attrs += ' baseline-shift="super"'
+        paint, _ = _paint(self.pen)
+        if paint not in ("#000000", "black"):
+            attrs += f' fill="{paint}"'
+        self.out.append(f"<text{attrs}>{escape(op.get('text', ''))}</text>")
+
+
+def _unique_id(base, seen):
+    count = seen.get(base, 0) + 1
+    seen[base] = count
+    return base if count == 1 else f"{base}-{count}"
+
+
+def view_box(layout, pad=10, extra_left=0, extra_right=0):
+    """``(x, y, width, height)`` of the final drawing in layout coordinates.
+
+    ``pad`` is added on every side (on top of graphviz's own 4pt), widened
+    horizontally to ``extra_left``/``extra_right`` when links stick out.
+    """
+    pad_left = max(pad, extra_left) + GRAPH_PAD
+    pad_right = max(pad, extra_right) + GRAPH_PAD
+    pad_y = pad + GRAPH_PAD
+    min_x, min_y, max_x, max_y = layout.bb
+    return (
+        min_x - pad_left,
+        min_y - pad_y,
+        max_x - min_x + pad_left + pad_right,
+        max_y - min_y + 2 * pad_y,
+    )
+
+
+def write_svg(layout, link_paths=(), pad=10, extra_left=0, extra_right=0):
+    """Write the final SVG for ``layout`` plus dashed operator ``link_paths``.
+
+    Padding as in ``view_box``. Returns ``(svg_code, svg_view)`` like
+    ``lsc.svg.finalize_svg``.
+    """
+    vb_x, vb_y, vb_w, vb_h = view_box(layout, pad, extra_left, extra_right)
+
+    out = [
+        f'<rect x="{_f(vb_x)}" y="{_f(vb_y)}" width="{_f(vb_w)}" height="{_f(vb_h)}" fill="white"/>',
+        '<g class="graph">',
+    ]
+    seen = {}
+
+    for edge in layout.edges:
+        if edge.invisible or not (edge.draw or edge.head_draw or edge.tail_draw):
+            continue
+        edge_id = _unique_id(f"e-{edge.tail}-{edge.head}", seen)
+        out.append(f'<g id={quoteattr(edge_id)} class="edge">')
+        painter = _Painter(out)
+        painter.paint(edge.draw)
+        painter.paint(edge.tail_draw)
+        painter.paint(edge.head_draw)
+        out.append("</g>")
+
+    for node in layout.nodes.values():
+        node_id = _unique_id(f"n-{node.name}", seen)
+        out.append(f'<g id={quoteattr(node_id)} class="node">')
+        _Painter(out).paint(node.draw)
+        out.append("</g>")
+
+    if link_paths:
+        style = " ".join(f'{attr}="{value}"' for attr, value in LINK_STYLE.items())
+        out.append(f'<g class="operator-links" {style}>')
+        out.extend(f'<path d="{d}"/>' for d in link_paths)
+        out.append("</g>")
+
+    out.append("</g></svg>\n")
+    body = "\n".join(out)
+
+    view_box_attr = f'viewBox="{_f(vb_x)} {_f(vb_y)} {_f(vb_w)} {_f(vb_h)}"'
+    xmlns = 'xmlns="http://www.w3.org/2000/svg"'
+    svg_code = f'<svg width="{vb_w:.2f}pt" height="{vb_h:.2f}pt" {view_box_attr} {xmlns}>\n' + body
+    svg_view = f"<svg {view_box_attr} {xmlns}>\n" + body
+    return svg_code, svg_view
+
+
+def route_links(layout, connections):
+    """Dashed operator-link paths over ``layout``.
+
+    Returns ``(paths, extra_left, extra_right)`` as ``lsc.svg.operator_link_paths``.
+    """
+    if not connections:
+        return (), 0, 0
+    names = set()
+    for conn in connections:
+        names.add(conn["lbl_id"])
+        names.update(conn.get("target_node_ids", []))
+    return operator_link_paths(
+        connections, layout.bbox_index(names), layout.bb[0] - GRAPH_PAD, layout.bb[2] + GRAPH_PAD
+    )
+
+
+def finalize_layout(layout, connections, pad=10):
+    """Route the operator ``connections`` over ``layout`` and write the final SVG.
+
+    Drop-in for ``lsc.svg.finalize_svg`` when only the layout geometry is
+    available (graphviz ``-Tjson``). Returns ``(svg_code, svg_view)``.
+    """
+    paths, extra_left, extra_right = route_links(layout, connections)
+    return write_svg(layout, paths, pad, extra_left, extra_right)
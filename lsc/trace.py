@@ -0,0 +1,119 @@
+"""Opt-in per-render stage timing.
+
+Enable with ``ALBURA_TRACE=1`` (or ``?trace=1`` in the app URL). Each rerun
+then records wall time and output sizes per stage and appends one JSON line
+to ``ALBURA_TRACE_LOG`` (default ``albura_trace.jsonl``).
+"""
+import json
+import os
+import statistics
+import threading
+import time
+from contextlib import contextmanager
+
+TRACE_ENV = "ALBURA_TRACE"
+TRACE_LOG_ENV = "ALBURA_TRACE_LOG"
+DEFAULT_TRACE_LOG = "albura_trace.jsonl"
+
+_write_lock = threading.Lock()
+
+
+def trace_enabled():
+    return os.environ.get(TRACE_ENV, "").strip().lower() in ("1", "true", "yes", "on")
+
+
+def trace_log_path():
+    return os.environ.get(TRACE_LOG_ENV, DEFAULT_TRACE_LOG)
+
+
+def percentiles(values):
+    """p50/p90/p95/p99/max of ``values`` (milliseconds), rounded; ``{}`` if empty."""
+    if not values:
+        return {}
+    values = sorted(values)
+    if len(values) == 1:
+        cuts = values * 99
+    else:
+        cuts = statistics.quantiles(values, n=100, method="inclusive")
+    return {
+        "p50_ms": round(cuts[49], 1),
+        "p90_ms": round(cuts[89], 1),
+        "p95_ms": round(cuts[94], 1),
+        "p99_ms": round(cuts[98], 1),
+        "max_ms": round(values[-1], 1),
+    }
+
+
+class Trace:
+    """Stage timings and sizes for one rerun (or one render)."""
+
+    def __init__(self, **meta):
+        self.started = time.time()
+        self.meta = dict(meta)
+        self.stages = []
+
+    @contextmanager
+    def stage(self, name):
+        """Time a block; the yielded dict can be filled with sizes (e.g. ``svg_bytes``)."""
+        record = {"stage": name}
+        start = time.perf_counter()
+        try:
+            yield record
+        finally:
+            record["ms"] = round((time.perf_counter() - start) * 1000, 3)
+            self.stages.append(record)
+
+    def __bool__(self):
+        return True
+
+    def note(self, key, value):
+        """Attach a piece of metadata (e.g. cache hit/miss) to the trace."""
+        self.meta[key] = value
+
+    def add(self, name, ms, **sizes):
+        """Record a stage timed elsewhere."""
+        self.stages.append({"stage": name, "ms": round(ms, 3), **sizes})
+
+    def merge(self, stages):
+        """Append stages recorded by another trace (e.g. on a worker thread)."""
+        self.stages.extend(dict(record) for record in stages)
+
+    @property
+    def total_ms(self):
+        return round(sum(s["ms"] for s in self.stages), 3)
+
+    def to_dict(self):
+        return {"time": self.started, **self.meta, "total_ms": self.total_ms, "stages": self.stages}
+
+    def write(self, path=None):
+        """Append this trace as one JSON line to ``path`` (default: the trace log)."""
+        line = json.dumps(self.to_dict(), ensure_ascii=False)
+        with _write_lock:
+            with open(path or trace_log_path(), "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+
+
+class NullTrace:
+    """Stand-in used when tracing is off; records nothing and is falsy.
+
+    Callers can guard size computations with ``if trace:``.
+    """
+
+    def __bool__(self):
+        return False
+
+    @contextmanager
+    def stage(self, name):
+        yield {}
+
+    def note(self, key, value):
+        pass
+
+    def add(self, name, ms, **sizes):
+        pass
+
+    def merge(self, stages):
+        pass
+
+
+NULL_TRACE = NullTrace()
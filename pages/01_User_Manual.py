@@ -55,7 +55,7 @@ with tab_intro:
         * **Constituent Projection:** Visualize the hierarchy from Sentence down to Word level.
         * **Operator Projection:** Map grammatical categories (Tense, Aspect, Modality, etc.) clearly.
         * **Morphological Precision:** Distinct handling for affixes and clitics.
-        * **Publication Ready:** Export in high-resolution PNG.
+        * **Publication Ready:** Export as SVG, PDF, EPS or high-resolution PNG.
     """)
 
     st.subheader("What does *Albura* mean?")
@@ -83,7 +83,7 @@ with tab_interface:
         #### 2. Visualizer (Right)
         * **Real-time Rendering:** Watch the tree grow as you type.
         * **Save diagram as .albura:** Save your work to a `.albura` file for later editing.
-        * **Export diagram as .png:** Download a high-resolution image of your diagram.
+        * **Export diagram:** Download your diagram as SVG, PDF, EPS or PNG (150–600 dpi).
         * **Create new diagram:** Clear the state and start fresh.
         """)
 
@@ -113,7 +113,7 @@ with tab_workflow:
 
     #### 4. Save and Export
     * **Save diagram as .albura:** Save your work to continue editing later. The `.albura` file preserves all your data.
-    * **Export diagram as .png:** Download a publication-ready image of your diagram.
+    * **Export diagram:** Download a publication-ready SVG, PDF or EPS (vector) or PNG image of your diagram.
     """)
 
 with tab_tech:
@@ -0,0 +1,121 @@
+import os
+import time
+
+import pandas as pd
+import streamlit as st
+
+from lsc.model import Diagram
+from lsc.search import CORPUS_ENV, CorpusIndex, QueryError, corpus_root, corpus_sources, resolve_corpus_dir
+from lsc.session import next_form
+
+st.set_page_config(
+    page_title="Albura — Corpus Search",
+    page_icon="🔎",
+    layout="wide",
+    initial_sidebar_state="collapsed",
+)
+
+# --- Navigation ---
+top_l, top_r = st.columns([0.8, 0.2])
+with top_l:
+    st.page_link("albura.py", label=" Return to Albura", icon="🏠")
+
+st.divider()
+
+st.title("Corpus Search")
+st.caption("Find diagrams in a folder of .albura files (and .albundle bundles) by words, labels, arguments and operators.")
+
+
+@st.cache_resource
+def get_corpus_index(corpus_dir):
+    """One index per corpus folder, shared by every session and refreshed on each search."""
+    return CorpusIndex()
+
+
+root_dir = corpus_root()
+subdir = st.text_input(
+    "Corpus folder",
+    value="",
+    placeholder="(whole corpus)",
+    help=f"Subfolder of the server's corpus directory (set with {CORPUS_ENV}); searched recursively",
+)
+query = st.text_input(
+    "Query",
+    placeholder="op:EVID@CLAUSE",
+    help="Space-separated key:value terms that must all match; a|b for either value, -term to exclude, value* for a prefix",
+)
+
+with st.expander("Query syntax", expanded=False):
+    st.markdown("""
+    | Query | Finds |
+    |---|---|
+    | `op:EVID@CLAUSE` | diagrams with an Evidentiality operator at clause level |
+    | `post.morph:clitic` | clitic arguments in post-nuclear position |
+    | `prcs.label:PP` | PrCS filled with a PP |
+    | `word:ka*` | any word starting with *ka* |
+    | `op:TNS\\|EVID -pred:copular` | verbal diagrams with Tense or Evidentiality |
+
+    **Keys:** `word`, `pos`, `label`, `conn`, `arg`, `morph`, `position`, each also scoped to a
+    position: `nucleus.`, `copula.`, `attribute.`, `pre.`, `post.`, `between.`, `prdp.`, `prcs.`,
+    `pocs.`, `podp.`, `excs.`, `real.` — plus `pred`, `slot` (e.g. `slot:prcs`), `op`
+    (name or abbreviation, optionally `@LAYER`), `op.layer`, `op.value` and `op.side`.
+    Matching ignores case.
+    """)
+
+try:
+    corpus_dir = resolve_corpus_dir(subdir, root_dir)
+except ValueError as e:
+    st.error(f"Invalid folder: {e}")
+    st.stop()
+if not os.path.isdir(corpus_dir):
+    st.info("Enter a folder of the corpus directory that holds .albura files.")
+    st.stop()
+
+index = get_corpus_index(corpus_dir)
+refresh_start = time.perf_counter()
+stats = index.refresh(corpus_sources([corpus_dir]))
+refresh_ms = (time.perf_counter() - refresh_start) * 1000
+for error in stats["errors"]:
+    st.warning(f"Skipped {error}")
+
+if not query.strip():
+    st.caption(f"{len(index)} diagrams indexed ({refresh_ms:.0f} ms to refresh).")
+    st.stop()
+
+try:
+    search_start = time.perf_counter()
+    keys = index.search(query)
+    search_ms = (time.perf_counter() - search_start) * 1000
+except QueryError as e:
+    st.error(f"Invalid query: {e}")
+    st.stop()
+
+st.caption(f"{len(keys)} of {len(index)} diagrams · search {search_ms:.1f} ms · refresh {refresh_ms:.0f} ms")
+
+# Records are looked up once: another session's refresh may drop keys meanwhile
+records = {record.key: record for record in index.records(keys)}
+if records:
+    rows = [
+        {
+            "Diagram": record.entry or os.path.basename(record.path),
+            "Sentence": record.sentence,
+            "Type": record.pred_type,
+            "File": os.path.relpath(record.path, root_dir),
+        }
+        for record in records.values()
+    ]
+    st.dataframe(pd.DataFrame(rows), use_container_width=True, hide_index=True)
+
+    chosen = st.selectbox(
+        "Open a result in the editor",
+        list(records),
+        format_func=lambda key: f"{records[key].entry or os.path.basename(key)} · {records[key].sentence}",
+    )
+    if st.button("Open in Albura"):
+        try:
+            data = Diagram.from_dict(records[chosen].load())
+        except (OSError, ValueError) as e:
+            st.error(f"Error loading file: {e}")
+        else:
+            next_form(st.session_state, data)
+            st.switch_page("albura.py")
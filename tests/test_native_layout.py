@@ -0,0 +1,89 @@
+"""Native layout engine: node order and overlaps, and agreement with dot."""
+import random
+import shutil
+
+import pytest
+
+from lsc.corpus import generate_document, scaled_params
+from lsc.graph import build_lsc_tree
+from lsc.layoutcheck import check_document
+from lsc.native_layout import native_layout
+
+EPSILON = 1e-6
+
+
+def _documents(count=30):
+    rng = random.Random(0)
+    documents = [
+        pytest.param({}, id="empty"),
+        pytest.param({"nucleus": {"text": "run"}}, id="nucleus-only"),
+        pytest.param({"pred_type": "copular"}, id="copular-empty"),
+    ]
+    for i in range(count):
+        pred_type = "verbal" if i % 2 == 0 else "copular"
+        data = generate_document(rng, **scaled_params(1 + i % 4, pred_type))
+        documents.append(pytest.param(data, id=f"{pred_type}-{i:02d}"))
+    return documents
+
+
+DOCUMENTS = _documents()
+
+
+def _ranks(layout):
+    """Nodes grouped by y, each rank sorted left to right."""
+    ranks = {}
+    for node in layout.nodes.values():
+        ranks.setdefault(round(node.y, 3), []).append(node)
+    return [sorted(nodes, key=lambda n: n.x) for _, nodes in sorted(ranks.items())]
+
+
+@pytest.mark.parametrize("data", DOCUMENTS)
+def test_words_follow_bottom_order(data):
+    graph = build_lsc_tree(data)
+    layout = native_layout(graph)
+    words = [layout.nodes[name] for name in graph.bottom]
+    assert [word.x for word in words] == sorted(word.x for word in words)
+    assert len({round(word.y, 3) for word in words}) <= 1
+
+
+@pytest.mark.parametrize("data", DOCUMENTS)
+def test_rows_keep_their_order(data):
+    graph = build_lsc_tree(data)
+    layout = native_layout(graph)
+    for name, row in graph.rows.items():
+        xs = [layout.nodes[node].x for node in row]
+        assert xs == sorted(xs), name
+
+
+@pytest.mark.parametrize("data", DOCUMENTS)
+def test_no_overlap_within_a_rank(data):
+    layout = native_layout(build_lsc_tree(data))
+    for rank in _ranks(layout):
+        for left, right in zip(rank, rank[1:]):
+            assert left.x + left.width / 2 <= right.x - right.width / 2 + EPSILON, (left.name, right.name)
+
+
+@pytest.mark.parametrize("data", DOCUMENTS)
+def test_layout_fits_its_bounding_box(data):
+    layout = native_layout(build_lsc_tree(data))
+    min_x, min_y, max_x, max_y = layout.bb
+    for node in layout.nodes.values():
+        assert min_x - EPSILON <= node.x - node.width / 2 and node.x + node.width / 2 <= max_x + EPSILON
+        assert min_y - EPSILON <= node.y - node.height / 2 and node.y + node.height / 2 <= max_y + EPSILON
+
+
+def test_edges_are_stroked_not_filled():
+    layout = native_layout(build_lsc_tree(DOCUMENTS[5].values[0]))
+    curves = [op["op"] for edge in layout.edges for op in edge.draw if "points" in op]
+    assert curves and set(curves) == {"B"}
+
+
+@pytest.mark.skipif(shutil.which("dot") is None, reason="needs the Graphviz dot executable")
+def test_order_matches_dot():
+    pairs = agree = 0
+    for param in DOCUMENTS:
+        result = check_document(param.values[0])
+        assert result["words_match"], (param.id, result["mismatches"])
+        pairs += result["pairs"]
+        agree += result["agree"]
+    assert pairs == 0 or agree / pairs >= 0.95
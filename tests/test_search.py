@@ -0,0 +1,30 @@
+"""Corpus search: features follow what the renderer draws."""
+from lsc.search import CorpusIndex, DocRecord, document_features
+
+DOCUMENT = {
+    "nucleus": {"text": "ran"},
+    "prcs": {"text": "", "label": "PP"},
+    "items_pre": [{"text": "  ", "label": "XP", "conn_type": "Peri-Core"}],
+    "items_post": [{"text": "", "label": "NP"}, {"text": "home", "label": "NP", "arg_type": "obj"}],
+}
+
+
+def test_blank_items_are_not_indexed():
+    features = document_features(DOCUMENT)
+    assert "word:ran" in features
+    assert "slot:prcs" not in features
+    assert "prcs.label:pp" not in features
+    assert "slot:pre" not in features
+    assert "pre.conn:peri-core" not in features
+    assert "slot:post" in features
+    assert "post.word:home" in features
+    assert "post.label:np" in features
+
+
+def test_blank_placeholder_does_not_match_queries():
+    index = CorpusIndex()
+    index.add(DocRecord("doc", "doc.albura", None, "ran home", "verbal", document_features(DOCUMENT)))
+    assert index.search("prcs.label:pp") == []
+    assert index.search("pre.conn:peri-core") == []
+    assert index.search("slot:pre|prcs") == []
+    assert index.search("slot:post word:home") == ["doc"]
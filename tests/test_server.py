@@ -0,0 +1,195 @@
+"""Render service: routing, validation, caching and errors, without a socket."""
+import asyncio
+import json
+import threading
+
+import pytest
+
+from lsc import server
+from lsc.layout import LayoutBudget, LayoutBudgetExceeded
+from lsc.server import RenderService, etag_matches
+
+DOCUMENT = json.dumps({"nucleus": {"text": "run"}}).encode("utf-8")
+
+
+class FakeRender:
+    """Stands in for the dot pipeline and counts its calls."""
+
+    def __init__(self, result="<svg/>", delay=0.0, error=None):
+        self.result = result
+        self.delay = delay
+        self.error = error
+        self.calls = []
+        self._release = threading.Event()
+
+    def __call__(self, diagram, fmt, dpi, revision):
+        self.calls.append((fmt, dpi, revision))
+        if self.delay:
+            self._release.wait(self.delay)
+        if self.error is not None:
+            raise self.error
+        return self.result
+
+
+@pytest.fixture
+def make_service():
+    services = []
+
+    def make(render=None, **kwargs):
+        service = RenderService(render=render or FakeRender(), **kwargs)
+        services.append(service)
+        return service
+
+    yield make
+    for service in services:
+        service.scheduler.shutdown(wait=False)
+
+
+def request(service, method="POST", target="/render", headers=None, body=DOCUMENT):
+    return asyncio.run(service.handle(method, target, headers or {}, body, client="test"))
+
+
+def error_of(response):
+    return json.loads(response.body)["error"]
+
+
+def test_health(make_service):
+    response = request(make_service(), "GET", "/health", body=b"")
+    assert response.status == 200
+    assert json.loads(response.body)["pending"] == 0
+
+
+@pytest.mark.parametrize("method, target, status", [
+    ("GET", "/nowhere", 404),
+    ("GET", "/render", 405),
+    ("POST", "/health", 405),
+])
+def test_routing(make_service, method, target, status):
+    assert request(make_service(), method, target).status == status
+
+
+@pytest.mark.parametrize("target, body", [
+    ("/render?format=gif", DOCUMENT),
+    ("/render?format=png&dpi=lots", DOCUMENT),
+    ("/render?format=png&dpi=5", DOCUMENT),
+    ("/render", b"{not json"),
+    ("/render", b"\xff\xfe"),
+    ("/render", b"[1, 2]"),
+])
+def test_bad_requests(make_service, target, body):
+    render = FakeRender()
+    response = request(make_service(render), target=target, body=body)
+    assert response.status == 400
+    assert not render.calls
+
+
+def test_render_and_cache(make_service):
+    render = FakeRender()
+    service = make_service(render)
+    first = request(service)
+    assert first.status == 200
+    assert first.body == b"<svg/>"
+    assert first.headers["Content-Type"].startswith("image/svg+xml")
+    etag = first.headers["ETag"]
+
+    second = request(service)
+    assert second.status == 200
+    assert second.headers["ETag"] == etag
+    assert len(render.calls) == 1
+
+
+def test_dpi_only_keys_raster_formats(make_service):
+    render = FakeRender(result=b"png")
+    service = make_service(render)
+    low = request(service, target="/render?format=png&dpi=72")
+    high = request(service, target="/render?format=png&dpi=300")
+    assert low.headers["ETag"] != high.headers["ETag"]
+    request(service, target="/render?format=svg&dpi=72")
+    request(service, target="/render?format=svg&dpi=300")
+    assert [call[:2] for call in render.calls] == [("png", 72), ("png", 300), ("svg", 72)]
+
+
+def test_if_none_match(make_service):
+    render = FakeRender()
+    service = make_service(render)
+    etag = request(service).headers["ETag"]
+    service.responses.clear()
+
+    response = request(service, headers={"if-none-match": f'"other", W/{etag}'})
+    assert response.status == 304
+    assert response.body == b""
+    assert response.headers["ETag"] == etag
+    assert len(render.calls) == 1
+
+
+def test_if_none_match_star_is_ignored_for_post(make_service):
+    render = FakeRender()
+    response = request(make_service(render), headers={"if-none-match": "*"})
+    assert response.status == 200
+    assert len(render.calls) == 1
+
+
+def test_overload(make_service):
+    render = FakeRender()
+    response = request(make_service(render, max_pending=0))
+    assert response.status == 503
+    assert response.headers["Retry-After"] == "1"
+    assert not render.calls
+
+
+def test_timeout(make_service):
+    render = FakeRender(delay=5.0)
+    service = make_service(render, timeout=0.05)
+    try:
+        response = request(service)
+    finally:
+        render._release.set()
+    assert response.status == 504
+    assert service.timeouts == 1
+    assert service.pending == 0
+
+
+@pytest.mark.parametrize("error, status", [
+    (LayoutBudgetExceeded("time", LayoutBudget(1.0)), 504),
+    (LayoutBudgetExceeded("memory", LayoutBudget(1.0, 64)), 500),
+    (RuntimeError("dot crashed"), 500),
+])
+def test_render_errors(make_service, error, status):
+    service = make_service(FakeRender(error=error))
+    response = request(service)
+    assert response.status == status
+    assert service.timeouts == (status == 504)
+    assert not service.responses.stats()["size"]
+
+
+def test_default_render_is_budgeted(make_service, monkeypatch):
+    budgets = []
+
+    def render_drawing(diagram, budget=None):
+        budgets.append(budget)
+        return "drawing"
+
+    monkeypatch.setattr(server, "render_drawing", render_drawing)
+    monkeypatch.setattr(server, "export_drawing", lambda drawing, fmt, dpi: f"{drawing}:{fmt}")
+    service = RenderService(timeout=2.5)
+    try:
+        response = request(service, target="/render?format=pdf")
+    finally:
+        service.scheduler.shutdown(wait=False)
+    assert response.body == b"drawing:pdf"
+    assert [budget.timeout for budget in budgets] == [2.5]
+
+
+@pytest.mark.parametrize("header, method, expected", [
+    (None, "GET", False),
+    ('"abc-svg"', "GET", True),
+    ('W/"abc-svg"', "POST", True),
+    ('"x", "abc-svg"', "POST", True),
+    ('"abc-png"', "GET", False),
+    ("*", "GET", True),
+    ("*", "HEAD", True),
+    ("*", "POST", False),
+])
+def test_etag_matches(header, method, expected):
+    # A listed tag gives 304 on POST too (a cache shortcut); "*" follows RFC 9110
+    assert etag_matches(header, '"abc-svg"', method) is expected